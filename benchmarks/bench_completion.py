@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tab completion benchmark at 1k/10k/100k names.
+
+Completes random 2 character prefixes with `PrefixIndex.search` and with a
+scan of every name followed by a sort, as before the index. Both must
+return the same matches in the same case-insensitive order (names equal
+but for case may be in a different order).
+
+Usage:
+    python benchmarks/bench_completion.py [--sizes 1000,10000,100000]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from juiced.lib.util import PrefixIndex  # noqa: E402
+
+
+def scan(names, partial):
+    """Completion matches as found before the index."""
+    partial_lower = partial.lower()
+    matches = [name for name in names if name.lower().startswith(partial_lower)]
+    return sorted(matches, key=str.lower)
+
+
+def same(result, expected):
+    if sorted(result) != sorted(expected):
+        return False
+    return [name.lower() for name in result] == [name.lower() for name in expected]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rnd = random.Random(1)
+    letters = string.ascii_letters
+    for size in map(int, args.sizes.split(",")):
+        names = list(
+            {
+                "#" + "".join(rnd.choice(letters) for _ in range(rnd.randint(3, 12)))
+                for _ in range(size)
+            }
+        )
+        queries = ["#" + rnd.choice(letters) for _ in range(args.queries)]
+
+        start = time.perf_counter()
+        index = PrefixIndex(names)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = [index.search(partial) for partial in queries]
+        indexed = (time.perf_counter() - start) / len(queries)
+
+        start = time.perf_counter()
+        expected = [scan(names, partial) for partial in queries]
+        scanned = (time.perf_counter() - start) / len(queries)
+
+        print(
+            "%6d names  build %7.2fms  index %8.2fus/tab  scan %9.2fus/tab"
+            "  x%-5.0f  identical: %s"
+            % (
+                len(names),
+                build * 1e3,
+                indexed * 1e6,
+                scanned * 1e6,
+                scanned / indexed,
+                "yes" if all(map(same, result, expected)) else "NO",
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
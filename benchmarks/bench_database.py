@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Sustained event-rate ingestion benchmark for the embedded bot database.
+
+Replays a mix of chat, join, leave and user count events at a target rate
+and reports how long the caller (the event loop) spends per call and how
+long it takes until everything is committed.
+
+Usage:
+    python benchmarks/bench_database.py [--events N] [--rate EVENTS_PER_SEC]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from juiced.lib.database import BotDatabase  # noqa: E402
+from juiced.lib.write_behind import WriteBehindDatabase  # noqa: E402
+
+
+def make_events(count, users=300, seed=1):
+    rnd = random.Random(seed)
+    names = ["user%d" % i for i in range(users)]
+    events = []
+    for i in range(count):
+        roll = rnd.random()
+        name = rnd.choice(names)
+        if roll < 0.80:
+            events.append(("user_chat_message", (name, "message %d" % i)))
+        elif roll < 0.88:
+            events.append(("user_joined", (name,)))
+        elif roll < 0.96:
+            events.append(("user_left", (name,)))
+        else:
+            events.append(("update_high_water_mark", (rnd.randint(1, users), users)))
+    return events
+
+
+def run(db, events, rate):
+    interval = 1.0 / rate if rate else 0.0
+    latencies = []
+    start = time.perf_counter()
+    for i, (name, args) in enumerate(events):
+        if interval:
+            delay = start + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        t0 = time.perf_counter()
+        getattr(db, name)(*args)
+        latencies.append(time.perf_counter() - t0)
+    submitted = time.perf_counter()
+    db.flush()
+    if isinstance(db, WriteBehindDatabase):
+        db.db.flush()
+    done = time.perf_counter()
+    latencies.sort()
+    return {
+        "events": len(events),
+        "elapsed": done - start,
+        "drain": done - submitted,
+        "throughput": len(events) / (done - start),
+        "p50_us": latencies[len(latencies) // 2] * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99)] * 1e6,
+        "max_us": latencies[-1] * 1e6,
+    }
+
+
+def report(label, res):
+    print(
+        "%-22s %7d events  %8.0f ev/s  drain %6.3fs  "
+        "call p50 %6.1fus  p99 %7.1fus  max %8.1fus"
+        % (
+            label,
+            res["events"],
+            res["throughput"],
+            res["drain"],
+            res["p50_us"],
+            res["p99_us"],
+            res["max_us"],
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument(
+        "--rate", type=float, default=0, help="events per second (0 = unthrottled)"
+    )
+    args = parser.parse_args()
+    events = make_events(args.events)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = BotDatabase(os.path.join(tmp, "direct.db"))
+        report("BotDatabase", run(db, events, args.rate))
+        db.close()
+
+        db = WriteBehindDatabase(BotDatabase(os.path.join(tmp, "buffered.db")))
+        report("WriteBehindDatabase", run(db, events, args.rate))
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Highlight benchmark with 10/100/1000 keywords.
+
+Classifies random chat messages with `Highlighter` and with a substring
+search per keyword, and reports the time per message. Both must find the
+same keywords.
+
+Usage:
+    python benchmarks/bench_highlight.py [--sizes 10,100,1000] [--messages N]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from juiced.lib.highlight import Highlighter  # noqa: E402
+
+
+def linear_search(keywords, text):
+    """One substring search per keyword."""
+    text = text.lower()
+    found = {}
+    for word in keywords:
+        start = text.find(word.lower())
+        if start >= 0:
+            found[word] = start
+    return set(found)
+
+
+def make_words(count, rnd):
+    return [
+        "".join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(4, 10)))
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--messages", type=int, default=5000)
+    args = parser.parse_args()
+
+    rnd = random.Random(1)
+    vocabulary = make_words(2000, rnd)
+    messages = [
+        " ".join(rnd.choice(vocabulary) for _ in range(rnd.randint(3, 25)))
+        for _ in range(args.messages)
+    ]
+    print("%d messages" % len(messages))
+    for size in map(int, args.sizes.split(",")):
+        keywords = rnd.sample(vocabulary, size // 2) + make_words(size // 2, rnd)
+        start = time.perf_counter()
+        highlighter = Highlighter(keywords)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = [highlighter.search(msg) for msg in messages]
+        automaton = (time.perf_counter() - start) / len(messages)
+
+        start = time.perf_counter()
+        expected = [linear_search(keywords, msg) for msg in messages]
+        linear = (time.perf_counter() - start) / len(messages)
+
+        same = all(set(a) == b for a, b in zip(result, expected))
+        print(
+            "%5d keywords  build %6.1fms  automaton %6.2fus/msg"
+            "  linear %8.2fus/msg  x%.1f  identical: %s"
+            % (
+                size,
+                build * 1e3,
+                automaton * 1e6,
+                linear * 1e6,
+                linear / automaton,
+                "yes" if same else "NO",
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
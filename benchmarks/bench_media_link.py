@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""MediaLink.from_url benchmark.
+
+Resolves a corpus of media URLs, as found in chat and playlist imports,
+with the previous resolver (every pattern in turn) and with
+`MediaLink.from_url` with a cold and a warm cache. Checks that both give
+the same link or the same error for every URL.
+
+Usage:
+    python benchmarks/bench_media_link.py [--count 20000] [--unique 2000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from urllib.parse import parse_qsl, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from juiced.lib.media_link import MediaLink  # noqa: E402
+
+
+def linear_from_url(url):
+    """`MediaLink.from_url` as before the resolver."""
+    url = url.strip().replace("feature=player_embedded&", "")
+    parsed_url = urlparse(url)
+
+    if parsed_url.scheme == "rtmp":
+        return MediaLink("rt", url)
+
+    for expr, type_, id_ in MediaLink.URL_TO_LINK:
+        match = re.search(expr, url)
+        if match is not None:
+            args = match.groups()
+            kwargs = dict(parse_qsl(parsed_url.query))
+            kwargs["url"] = url
+            return MediaLink(type_.format(*args, **kwargs), id_.format(*args, **kwargs))
+
+    if parsed_url.scheme == "https":
+        _, ext = os.path.splitext(parsed_url.path)
+        if ext == ".json":
+            return MediaLink("cm", url)
+        if ext in MediaLink.FILE_TYPES:
+            return MediaLink("fi", url)
+        raise ValueError("unsupported file extension")
+    raise ValueError("plain http")
+
+
+TEMPLATES = [
+    (30, "https://www.youtube.com/watch?v={id}"),
+    (10, "https://youtube.com/watch?v={id}&t=42s"),
+    (5, "https://www.youtube.com/watch?feature=player_embedded&v={id}"),
+    (15, "https://youtu.be/{id}"),
+    (3, "https://youtu.be/{id}?t=10"),
+    (3, "https://www.youtube.com/playlist?list=PL{id}"),
+    (2, "https://clips.twitch.tv/{word}"),
+    (2, "https://www.twitch.tv/videos/{num}"),
+    (1, "https://www.twitch.tv/{word}/v/{num}"),
+    (3, "https://twitch.tv/{word}"),
+    (1, "https://livestream.com/{word}"),
+    (1, "https://www.ustream.tv/channel/{word}"),
+    (1, "https://www.smashcast.tv/{word}"),
+    (4, "https://vimeo.com/{num}"),
+    (3, "https://www.dailymotion.com/video/x{id}"),
+    (1, "https://imgur.com/a/{word}"),
+    (3, "https://soundcloud.com/{word}/{word}"),
+    (2, "https://drive.google.com/file/d/{id}/view"),
+    (1, "https://drive.google.com/open?id={id}"),
+    (1, "https://vid.me/embedded/{word}"),
+    (2, "https://streamable.com/{word}"),
+    (2, "https://cdn.example.com/live/{word}.m3u8"),
+    (3, "https://files.example.com/{word}.mp4"),
+    (1, "https://files.example.com/{word}.json"),
+    (1, "https://files.example.com/{word}.txt"),
+    (1, "http://files.example.com/{word}.mp4"),
+    (1, "rtmp://live.example.com/app/{word}"),
+    (2, "yt:{id}"),
+    (1, "dm:x{id}"),
+    (1, "fi:https://files.example.com/{word}.webm"),
+    (1, "  https://youtu.be/{id}  "),
+]
+
+
+def make_corpus(count, unique, seed=1):
+    rnd = random.Random(seed)
+    weights = [weight for weight, _ in TEMPLATES]
+    urls = []
+    for _ in range(unique):
+        _, template = rnd.choices(TEMPLATES, weights)[0]
+        urls.append(
+            template.format(
+                id="".join(rnd.choices("abcdefghijkABCDEFGHIJK0123456789_-", k=11)),
+                word="".join(rnd.choices("abcdefghijklmnop", k=8)),
+                num=rnd.randrange(10**6, 10**9),
+            )
+        )
+    return [rnd.choice(urls) for _ in range(count)], urls
+
+
+def run(func, urls, repeat=3, cold=False):
+    """Best time of `repeat` runs and the (type, id) of every URL."""
+    best = float("inf")
+    for _ in range(repeat):
+        if cold:
+            MediaLink._resolve_url.cache_clear()
+        results = []
+        start = time.perf_counter()
+        for url in urls:
+            try:
+                results.append(func(url))
+            except ValueError:
+                results.append(None)
+        best = min(best, time.perf_counter() - start)
+    return best, [None if link is None else (link.type, link.id) for link in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--unique", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus, unique = make_corpus(args.count, args.unique)
+    old, expected = run(linear_from_url, corpus)
+    cold, _ = run(MediaLink.from_url, unique, cold=True)
+    new, results = run(MediaLink.from_url, corpus)
+
+    mismatches = [(url, a, b) for url, a, b in zip(corpus, expected, results) if a != b]
+    print("%d URLs, %d unique" % (len(corpus), len(unique)))
+    print(
+        "  linear scan  %7.2fus/url" % (old / len(corpus) * 1e6),
+    )
+    print(
+        "  resolver     %7.2fus/url (no cache hits)  x%.1f"
+        % (cold / len(unique) * 1e6, (old / len(corpus)) / (cold / len(unique)))
+    )
+    print("  cached       %7.2fus/url  x%.1f" % (new / len(corpus) * 1e6, old / new))
+    print("  identical results: %s" % ("yes" if not mismatches else "NO"))
+    for url, a, b in mismatches[:10]:
+        print("    %r: %r != %r" % (url, a, b))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
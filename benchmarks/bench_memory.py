@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Model memory benchmark.
+
+Reports bytes per user and per playlist item (with its media link) for
+the slotted models, and for dict-backed equivalents of the previous
+models for comparison. Input data is decoded JSON, as received from the
+server, so strings are not shared unless the model interns them.
+
+Usage:
+    python benchmarks/bench_memory.py [--count 10000]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from juiced.lib.playlist import PlaylistItem  # noqa: E402
+from juiced.lib.user import User  # noqa: E402
+
+
+class DictMediaLink:
+    def __init__(self, type_, id_):
+        self.type = type_
+        self.id = id_
+
+
+class DictPlaylistItem:
+    def __init__(self, data):
+        self.uid = data["uid"]
+        self.temp = data["temp"]
+        self.username = data["queueby"]
+        data = data["media"]
+        self.link = DictMediaLink(data["type"], data["id"])
+        self.title = data["title"]
+        self.duration = data["seconds"]
+
+
+class DictUser:
+    def __init__(self, name="", rank=-1, profile=None, meta=None):
+        profile = profile or {}
+        meta = meta or {}
+        self.name = name
+        self.password = None
+        self.rank = rank
+        self.image = profile.get("image", "")
+        self.text = profile.get("text", "")
+        self.afk = meta.get("afk", False)
+        self.muted = meta.get("muted", False)
+        self.smuted = meta.get("smuted", False)
+        self._ip = meta.get("ip")
+        self.uncloaked_ip = None
+        self.aliases = meta.get("aliases", [])
+
+
+def make_items(count):
+    return json.loads(
+        json.dumps(
+            [
+                {
+                    "uid": uid,
+                    "temp": True,
+                    "queueby": "user%d" % (uid % 50),
+                    "media": {
+                        "type": "yt",
+                        "id": "%011d" % uid,
+                        "title": "Video title number %d" % uid,
+                        "seconds": 180,
+                    },
+                }
+                for uid in range(count)
+            ]
+        )
+    )
+
+
+def make_users(count):
+    return json.loads(
+        json.dumps(
+            [
+                {
+                    "name": "user%d" % i,
+                    "rank": 1,
+                    "profile": {"image": "", "text": ""},
+                    "meta": {"afk": False, "muted": False, "aliases": []},
+                }
+                for i in range(count)
+            ]
+        )
+    )
+
+
+def measure(func, data):
+    """Bytes allocated per object, not counting the input data."""
+    gc.collect()
+    tracemalloc.start()
+    objects = [func(item) for item in data]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (size - sys.getsizeof(objects)) / len(objects)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+
+    items = make_items(args.count)
+    users = make_users(args.count)
+    for name, new, old, data in (
+        ("playlist item", PlaylistItem, DictPlaylistItem, items),
+        ("user", lambda data: User(**data), lambda data: DictUser(**data), users),
+    ):
+        slotted = measure(new, data)
+        dict_backed = measure(old, data)
+        print(
+            "%-14s  slots %6.0fB  dict %6.0fB  -%.0f%%"
+            % (name, slotted, dict_backed, 100 - 100 * slotted / dict_backed)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""MessageParser benchmark.
+
+Parses a corpus of chat messages in the forms CyTube sends them (plain
+text, escaped text, formatting, emotes, links, spoilers, unclosed tags)
+with the previous parser and with `MessageParser` with and without its
+cache, and checks that every output is identical.
+
+Usage:
+    python benchmarks/bench_message_parser.py [--count 20000] [--seed 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from html.parser import HTMLParser, unescape
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from juiced.lib.util import MessageParser  # noqa: E402
+
+
+class LegacyMessageParser(HTMLParser):
+    """`MessageParser` as before the fast path and lookup tables."""
+
+    def __init__(self, markup=MessageParser.DEFAULT_MARKUP):
+        super().__init__()
+        self.markup = markup
+        self.message = ""
+        self.tags = []
+
+    def get_tag_markup(self, tag, attr):
+        if self.markup is None:
+            return None
+        attr = dict(attr)
+        for tag_, attr_, start, end in self.markup:
+            if tag_ is not None and tag_ != tag:
+                continue
+            if attr_ is not None:
+                match = True
+                for name, value in attr_.items():
+                    if attr.get(name, None) != value:
+                        match = False
+                        break
+                if not match:
+                    continue
+            return start, end
+
+    def handle_starttag(self, tag, attr):
+        markup = self.get_tag_markup(tag, attr)
+        if markup is not None:
+            start, end = markup
+            if start is not None:
+                self.message += start
+            if end is not None:
+                self.tags.append((tag, end))
+        else:
+            for name, value in attr:
+                if name in ("src", "href"):
+                    self.message += " %s " % value
+
+    def handle_endtag(self, tag):
+        while self.tags:
+            tag_, end = self.tags.pop()
+            self.message += end
+            if tag_ == tag:
+                return
+
+    def handle_data(self, data):
+        self.message += unescape(data)
+
+    def parse(self, msg):
+        self.message = ""
+        self.tags = []
+        self.feed(msg)
+        self.close()
+        self.reset()
+        for _, end in reversed(self.tags):
+            self.message += end
+        return self.message
+
+
+WORDS = "lol this song is great who queued that skip pls nice one gg".split()
+
+TEMPLATES = [
+    (50, "{text}"),
+    (8, "{text} &lt;3"),
+    (4, "{text} &amp; {text}"),
+    (3, "&quot;{text}&quot; &#39;{text}&#39;"),
+    (2, "&amp;lt;b&amp;gt; {text}"),
+    (
+        6,
+        '<img class="channel-emote" src="https://i.imgur.com/{word}.png" title=":{word}:">',
+    ),
+    (
+        4,
+        '{text} <img class="channel-emote" src="https://i.imgur.com/{word}.gif" title=":{word}:">',
+    ),
+    (
+        5,
+        '<a href="https://youtu.be/{word}" target="_blank" rel="noopener">https://youtu.be/{word}</a>',
+    ),
+    (3, "<strong>{text}</strong> {text}"),
+    (2, "<em>{text}</em>"),
+    (2, "<code>{text}</code>"),
+    (1, "<s>{text}</s>"),
+    (2, '<span class="spoiler">{text}</span>'),
+    (1, "<strong><em>{text}</em> {text}"),
+    (1, "<strong>{text}</em></strong>"),
+    (1, "{text} < {text} > {text}"),
+    (1, '<span class="greentext">&gt;{text}</span>'),
+    (1, "{text} &notanentity; &#x1F600;"),
+]
+
+
+def make_corpus(count, seed=1):
+    rnd = random.Random(seed)
+    weights = [weight for weight, _ in TEMPLATES]
+    recent = []
+    corpus = []
+    for _ in range(count):
+        if recent and rnd.random() < 0.2:
+            # Spam, repeated bot output and emote walls
+            corpus.append(rnd.choice(recent))
+            continue
+        _, template = rnd.choices(TEMPLATES, weights)[0]
+        msg = template.format(
+            text=" ".join(rnd.choices(WORDS, k=rnd.randrange(1, 12))),
+            word="".join(rnd.choices("abcdefghijklmnop", k=6)),
+        )
+        corpus.append(msg)
+        recent = (recent + [msg])[-50:]
+    return corpus
+
+
+def run(make_parser, corpus, repeat=3):
+    """Best time of `repeat` runs, each with a new parser."""
+    best = float("inf")
+    for _ in range(repeat):
+        parser = make_parser()
+        start = time.perf_counter()
+        results = [parser.parse(msg) for msg in corpus]
+        best = min(best, time.perf_counter() - start)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.count, args.seed)
+    old, expected = run(LegacyMessageParser, corpus)
+    new, results = run(MessageParser, corpus)
+    cached, cached_results = run(lambda: MessageParser(cache_size=512), corpus)
+
+    mismatches = [
+        (msg, a, b, c)
+        for msg, a, b, c in zip(corpus, expected, results, cached_results)
+        if not a == b == c
+    ]
+    print("%d messages" % len(corpus))
+    print("  previous  %7.2fus/msg" % (old / len(corpus) * 1e6))
+    print("  new       %7.2fus/msg  x%.1f" % (new / len(corpus) * 1e6, old / new))
+    print("  cached    %7.2fus/msg  x%.1f" % (cached / len(corpus) * 1e6, old / cached))
+    print("  identical output: %s" % ("yes" if not mismatches else "NO"))
+    for msg, a, b, c in mismatches[:10]:
+        print("    %r: %r / %r / %r" % (msg, a, b, c))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
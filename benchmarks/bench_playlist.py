@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Playlist event benchmark at 1k/10k/100k items.
+
+Fills a playlist, then replays a random mix of the playlist events the bot
+handles (queue after an item, delete, moveVideo, setTemp, setCurrent) and
+reports the time per event. A list-based playlist equivalent to the
+previous implementation is measured for comparison.
+
+Usage:
+    python benchmarks/bench_playlist.py [--sizes 1000,10000,100000] [--ops N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from juiced.lib.playlist import Playlist, PlaylistItem  # noqa: E402
+
+
+class ListPlaylist:
+    """List-based playlist, as before the uid index."""
+
+    def __init__(self):
+        self.queue = []
+        self.current = None
+
+    def index(self, item):
+        return self.queue.index(item)
+
+    def get(self, uid):
+        return self.queue[self.index(uid)]
+
+    def remove(self, item):
+        self.queue.remove(item)
+
+    def add(self, after, item):
+        if not isinstance(after, int):
+            self.queue.append(item)
+        else:
+            self.queue.insert(self.index(after) + 1, item)
+
+    def move(self, item, after):
+        item = self.get(item)
+        self.remove(item)
+        self.add(after, item)
+
+
+def make_item(uid):
+    return PlaylistItem(
+        {
+            "uid": uid,
+            "temp": True,
+            "queueby": "user",
+            "media": {"type": "yt", "id": "id%d" % uid, "title": "", "seconds": 1},
+        }
+    )
+
+
+def make_ops(size, count, seed=1):
+    """Random events that keep the playlist at about `size` items."""
+    rnd = random.Random(seed)
+    uids = list(range(size))
+    next_uid = size
+    ops = []
+    for _ in range(count):
+        roll = rnd.random()
+        if roll < 0.25:
+            ops.append(("queue", rnd.choice(uids), next_uid))
+            uids.append(next_uid)
+            next_uid += 1
+        elif roll < 0.5:
+            uid = uids.pop(rnd.randrange(len(uids)))
+            ops.append(("delete", uid))
+        elif roll < 0.75:
+            a, b = rnd.sample(uids, 2)
+            ops.append(("move", a, b))
+        elif roll < 0.9:
+            ops.append(("temp", rnd.choice(uids)))
+        else:
+            ops.append(("current", rnd.choice(uids)))
+    return ops
+
+
+def run(cls, size, ops):
+    playlist = cls()
+    for uid in range(size):
+        playlist.add(None, make_item(uid))
+    items = {op[2]: make_item(op[2]) for op in ops if op[0] == "queue"}
+    start = time.perf_counter()
+    for op in ops:
+        kind = op[0]
+        if kind == "queue":
+            playlist.add(op[1], items[op[2]])
+        elif kind == "delete":
+            playlist.remove(op[1])
+        elif kind == "move":
+            playlist.move(op[1], op[2])
+        elif kind == "temp":
+            playlist.get(op[1]).temp = False
+        else:
+            playlist.current = playlist.get(op[1])
+    return (time.perf_counter() - start) / len(ops)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+
+    for size in map(int, args.sizes.split(",")):
+        ops = make_ops(size, args.ops)
+        indexed = run(Playlist, size, ops)
+        listed = run(ListPlaylist, size, ops)
+        print(
+            "%7d items  Playlist %8.2fus/event  list %10.2fus/event  x%.0f"
+            % (size, indexed * 1e6, listed * 1e6, listed / indexed)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Playlist snapshot load benchmark.
+
+Reconciles a `playlist` event into an empty playlist and into one already
+holding the same items, the way `Bot._on_playlist` does on join and on
+reconnect, with lazy and eager item construction. Reports both times, the
+peak memory allocated during the first load and the memory retained by
+the playlist.
+
+Usage:
+    python benchmarks/bench_playlist_snapshot.py [--size 10000] [--repeat 5]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from juiced.lib.playlist import Playlist  # noqa: E402
+
+
+def make_snapshot(size):
+    return [
+        {
+            "uid": uid,
+            "temp": uid % 3 == 0,
+            "queueby": "user%d" % (uid % 50),
+            "media": {
+                "type": "yt",
+                "id": "%011d" % uid,
+                "title": "Video title number %d" % uid,
+                "seconds": 180 + uid % 300,
+                "duration": "03:00",
+                "meta": {},
+            },
+        }
+        for uid in range(size)
+    ]
+
+
+def measure(lazy, snapshot, repeat):
+    best = best_reload = float("inf")
+    for _ in range(repeat):
+        playlist = Playlist(lazy=lazy)
+        start = time.perf_counter()
+        playlist.reconcile(snapshot)
+        best = min(best, time.perf_counter() - start)
+        start = time.perf_counter()
+        playlist.reconcile(snapshot)
+        best_reload = min(best_reload, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    playlist = Playlist(lazy=lazy)
+    playlist.reconcile(snapshot)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, best_reload, peak, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    snapshot = make_snapshot(args.size)
+    for name, lazy in (("lazy", True), ("eager", False)):
+        elapsed, reload, peak, retained = measure(lazy, snapshot, args.repeat)
+        print(
+            "%5s  %d items  load %7.2fms  reload %7.2fms  peak %7.1fKiB"
+            "  retained %7.1fKiB"
+            % (
+                name,
+                args.size,
+                elapsed * 1e3,
+                reload * 1e3,
+                peak / 1024,
+                retained / 1024,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""userlist IP uncloaking benchmark.
+
+Builds the users of a `userlist` event with cloaked IPs, as a moderator
+receives it, with cold caches and again with warm caches (a refresh of
+the same channel), and resolves their uncloaked IPs. The previous
+brute-force implementation is measured for comparison. Building the users
+alone is the cost left on the event dispatch path.
+
+Usage:
+    python benchmarks/bench_uncloak.py [--users 300] [--prefixes 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from juiced.lib import user as user_mod  # noqa: E402
+from juiced.lib import util  # noqa: E402
+from juiced.lib.user import User  # noqa: E402
+
+
+def brute_force(ip, start=0):
+    """Uncloak IP by hashing every candidate, as before the cache."""
+    parts = ip.split(".")
+    ret = []
+
+    def search(uncloaked, acc, i):
+        if i > 3:
+            ret.append(".".join(uncloaked))
+            return
+        for part in range(256):
+            if util.ip_hash("%s%s%s" % (acc, part, i), 3) == parts[i]:
+                search(uncloaked[:i] + [str(part)], "%s%d" % (acc, part), i + 1)
+
+    search(list(parts), "", start)
+    return ret
+
+
+def make_userlist(users, prefixes, seed=1):
+    """Users from a few networks, like a real channel."""
+    rnd = random.Random(seed)
+    networks = [(rnd.randrange(1, 224), rnd.randrange(256)) for _ in range(prefixes)]
+    data = []
+    for i in range(users):
+        a, b = rnd.choice(networks)
+        ip = "%d.%d.%d.%d" % (a, b, rnd.randrange(256), rnd.randrange(256))
+        data.append({"name": "user%d" % i, "meta": {"ip": util.cloak_ip(ip)}})
+    return data
+
+
+def load(data, resolve=True):
+    start = time.perf_counter()
+    for user in data:
+        user = User(**user)
+        if resolve:
+            user.uncloaked_ip
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--prefixes", type=int, default=20)
+    args = parser.parse_args()
+
+    data = make_userlist(args.users, args.prefixes)
+    dispatch = load(data, resolve=False)
+    util._uncloak_cached.cache_clear()
+    util._uncloak_table.cache_clear()
+    cold = load(data)
+    warm = load(data)
+
+    user_mod.uncloak_ip = brute_force
+    try:
+        old = load(data)
+    finally:
+        user_mod.uncloak_ip = util.uncloak_ip
+
+    print("%d users, %d networks" % (args.users, args.prefixes))
+    print("  dispatch     %9.2fms" % (dispatch * 1e3))
+    print("  brute force  %9.2fms" % (old * 1e3))
+    print("  cold cache   %9.2fms  x%.1f" % (cold * 1e3, old / cold))
+    print("  warm cache   %9.2fms  x%.0f" % (warm * 1e3, old / warm))
+
+
+if __name__ == "__main__":
+    main()
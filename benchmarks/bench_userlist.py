@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""User list display order benchmark at 100/1k/10k users.
+
+Measures the ordered view the TUI draws every second: partitioning and
+sorting all users on every redraw, as before the `UserList` indexes, and
+`UserList.ordered` limited to the visible rows. Also reports the cost of
+keeping the indexes up to date on AFK changes. Both views must be the same.
+
+Usage:
+    python benchmarks/bench_userlist.py [--sizes 100,1000,10000] [--rows 40]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from juiced.lib.user import User, UserList  # noqa: E402
+
+
+def partition_sort(userlist, hide_afk, limit):
+    """Display order as computed on every redraw before the indexes."""
+    mods = []
+    regular_users = []
+    afk_users = []
+    for user in userlist.values():
+        if user.rank >= 2:
+            mods.append(user)
+        elif user.afk:
+            afk_users.append(user)
+        else:
+            regular_users.append(user)
+    mods.sort(key=lambda u: (-u.rank, u.name.lower()))
+    regular_users.sort(key=lambda u: u.name.lower())
+    afk_users.sort(key=lambda u: u.name.lower())
+    sorted_users = mods + regular_users
+    if not hide_afk:
+        sorted_users += afk_users
+    return sorted_users[:limit]
+
+
+def timeit(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--rows", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rnd = random.Random(1)
+    for size in map(int, args.sizes.split(",")):
+        userlist = UserList()
+        for i in range(size):
+            rank = rnd.choice((0, 1, 1, 1, 2, 3)) if i % 50 == 0 else rnd.choice((0, 1))
+            userlist.add(
+                User("user%d" % i, rank=rank, meta={"afk": rnd.random() < 0.3})
+            )
+        names = list(userlist)
+
+        same = userlist.ordered(limit=args.rows) == partition_sort(
+            userlist, False, args.rows
+        )
+        legacy = timeit(lambda: partition_sort(userlist, False, args.rows), args.repeat)
+        indexed = timeit(lambda: userlist.ordered(limit=args.rows), args.repeat)
+        update = timeit(
+            lambda: userlist.set_afk(rnd.choice(names), rnd.random() < 0.3),
+            args.repeat,
+        )
+        print(
+            "%6d users  sort %9.2fus/redraw  ordered %6.2fus/redraw  x%-6.0f"
+            "  setAFK %5.2fus  identical: %s"
+            % (
+                size,
+                legacy * 1e6,
+                indexed * 1e6,
+                legacy / indexed,
+                update * 1e6,
+                "yes" if same else "NO",
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
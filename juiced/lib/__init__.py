@@ -2,22 +2,30 @@
 
 from .bot import Bot
 from .channel import Channel
+from .chat_filter import ChatFilter
 from .config import get_config
+from .database import BotDatabase
 from .error import CytubeError, SocketIOError
+from .highlight import Highlighter
 from .media_link import MediaLink
 from .playlist import Playlist, PlaylistItem
+from .scheduler import Scheduler
 from .socket_io import SocketIO
 from .user import User
 from .util import MessageParser
 
 __all__ = [
     "Bot",
+    "BotDatabase",
     "Channel",
+    "ChatFilter",
     "CytubeError",
     "SocketIOError",
+    "Highlighter",
     "MediaLink",
     "Playlist",
     "PlaylistItem",
+    "Scheduler",
     "SocketIO",
     "User",
     "MessageParser",
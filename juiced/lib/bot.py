@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 import asyncio
 import collections
+import functools
 import json
 import logging
 import re
@@ -11,21 +12,25 @@ from .error import (
     ChannelError,
     ChannelPermissionError,
     CytubeError,
+    DuplicateMediaError,
     Kicked,
     LoginError,
     SocketConfigError,
 )
 from .media_link import MediaLink
 from .playlist import PlaylistItem
+from .rate_limit import TokenBucket
+from .scheduler import Scheduler
 from .socket_io import SocketIO, SocketIOError, SocketIOResponse
 from .user import User
 from .util import get as default_get
-from .util import to_sequence
+from .util import to_sequence, uncloak_ip
+from .write_behind import WriteBehindDatabase
 
 try:
     from common.database import BotDatabase
 except ImportError:
-    BotDatabase = None
+    from .database import BotDatabase
 
 
 class Bot:
@@ -54,6 +59,38 @@ class Bot:
         socket.io connection.
     handlers : `collections.defaultdict` of (`str`, `list` of `function`)
         Event handlers.
+    filters : `collections.defaultdict` of (`str`, `list` of `function`)
+        Event filters, run before the handlers. See `add_filter`.
+    scheduler : `cytube_bot.scheduler.Scheduler`
+        Periodic jobs, started by `run`. Plugins can add their own.
+    chat_limiter : `cytube_bot.rate_limit.TokenBucket`
+        Paces chat messages and PMs to stay within the channel's
+        antiflood settings. Unlimited if the bot's rank is exempt.
+    queue_limiter : `cytube_bot.rate_limit.TokenBucket`
+        Paces playlist additions.
+    state_version : `int`
+        Incremented when bot state outside the channel changes
+        (rank, connection). See also `Channel.version`.
+    capabilities : `frozenset` of `str`
+        Actions the bot user may perform, see `can`.
+    status_heartbeat : `float`
+        Maximum delay in seconds between two full status writes.
+
+    Notes
+    -----
+    Full `playlist` and `userlist` snapshots are reconciled with the
+    current state instead of replacing it. The differences are then
+    triggered as the events `syncQueue`, `syncDelete`, `syncMoveVideo`,
+    `syncSetTemp`, `syncAddUser`, `syncUserLeave` and `syncUpdateUser`,
+    with the same data as the server events they are named after
+    (`syncUpdateUser` - the user data), after the handlers of the
+    snapshot event.
+
+    `capabilities` are recomputed when `setPermissions` or the rank of
+    the bot user changes. If they change, the event `capabilities` is
+    triggered with the data `{"capabilities": capabilities, "added":
+    actions, "removed": actions}`. Permissions edited in place are picked
+    up by `update_capabilities`.
     """
 
     logger = logging.getLogger(__name__)
@@ -72,6 +109,27 @@ class Bot:
 
     EVENT_LOG_LEVEL_DEFAULT = logging.INFO
 
+    # CyTube defaults for chat_antiflood_params
+    ANTIFLOOD_BURST = 4
+    ANTIFLOOD_SUSTAINED = 1
+    # Send a little slower than allowed, arrival times at the server jitter
+    ANTIFLOOD_MARGIN = 0.9
+    # The server does not apply chat antiflood to moderators
+    ANTIFLOOD_EXEMPT_RANK = 2
+
+    # The server does not announce its queue throttle, stay well below it
+    QUEUE_BURST = 10
+    QUEUE_SUSTAINED = 1
+    QUEUE_THROTTLED = re.compile(r".*\btoo quickly", re.I)
+
+    BULK_WINDOW = 8  # Playlist requests in flight in bulk operations
+
+    MAINTENANCE_STARTUP_DELAY = 300  # Never run maintenance right at startup
+    MAINTENANCE_INTERVAL = 72000  # Minimum delay between two runs
+    MAINTENANCE_CHUNK = 500  # Rows or pages per maintenance chunk
+    MAINTENANCE_PAUSE = 0.05  # Pause between chunks
+    MAINTENANCE_BUDGET = 60  # Seconds per run, the rest waits for the next run
+
     def __init__(
         self,
         domain,
@@ -83,6 +141,7 @@ class Bot:
         socket_io=SocketIO.connect,
         db_path="bot_data.db",
         enable_db=True,
+        status_heartbeat=60,
     ):
         """
         Parameters
@@ -107,6 +166,8 @@ class Bot:
             Path to SQLite database file.
         enable_db : `bool`, optional
             Whether to enable database tracking.
+        status_heartbeat : `float`, optional
+            Maximum delay in seconds between two full status writes.
         """
         import time
 
@@ -120,18 +181,32 @@ class Bot:
         self.server = None
         self.socket = None
         self.handlers = collections.defaultdict(list)
+        self.filters = collections.defaultdict(list)
         self.start_time = time.time()  # Track bot start time
         self.connect_time = None  # Track connection time
-        self._history_task = None  # Background task for logging user counts
-        self._status_task = None  # Background task for updating status
-        self._outbound_task = None  # Background task for sending messages
-        self._maintenance_task = None  # Background task for DB maintenance
+        self.scheduler = Scheduler()
+        self.chat_limiter = TokenBucket()
+        self.queue_limiter = TokenBucket(self.QUEUE_SUSTAINED, self.QUEUE_BURST)
+        self._maintenance_min_delay = self.MAINTENANCE_STARTUP_DELAY
+        self._maintenance_next = None  # Time of the next maintenance run
+        self.state_version = 0
+        self.capabilities = frozenset()
+        self._capabilities_for = (None, None)  # Permissions and rank
+        self.status_heartbeat = status_heartbeat
+        self._status_version = None  # Versions of the last status write
+        self._status_saved = {}  # Last status fields written to the database
+        self._status_time = None  # Time of the last full status write
+        self._deferred = collections.deque()  # Events to trigger next
+        self._triggering = 0  # Depth of nested trigger calls
+        self._event_tasks = set()  # Events triggered outside of trigger
+        self._uncloak_task = None
+        self._queueing = collections.Counter()  # Links being added
 
         # Initialize database if available and enabled
         self.db = None
         if enable_db and BotDatabase is not None:
             try:
-                self.db = BotDatabase(db_path)
+                self.db = WriteBehindDatabase(BotDatabase(db_path))
                 self.logger.info("Database tracking enabled")
             except Exception as e:
                 self.logger.error("Failed to initialize database: %s", e)
@@ -143,28 +218,55 @@ class Bot:
                 self.on(attr[4:], getattr(self, attr))
 
     def _on_rank(self, _, data):
-        self.user.rank = data
+        self.state_version += 1
+        if self.user.name in self.channel.userlist:
+            self.channel.userlist.set_rank(self.user.name, data)
+        else:
+            self.user.rank = data
+        self.update_capabilities()
+        self._configure_chat_limiter()
 
     def _on_setMotd(self, _, data):
+        self.channel.version += 1
         self.channel.motd = data
 
     def _on_channelCSSJS(self, _, data):
+        self.channel.version += 1
         self.channel.css = data.get("css", "")
         self.channel.js = data.get("js", "")
 
     def _on_channelOpts(self, _, data):
+        self.channel.version += 1
         self.channel.options = data
+        self._configure_chat_limiter()
 
     def _on_setPermissions(self, _, data):
+        self.channel.version += 1
         self.channel.permissions = data
+        self.update_capabilities()
 
     def _on_emoteList(self, _, data):
-        self.channel.emotes = data
+        self.channel.version += 1
+        self.channel.emotes.reset(data)
+
+    def _on_updateEmote(self, _, data):
+        self.channel.version += 1
+        self.channel.emotes.update(data)
+
+    def _on_renameEmote(self, _, data):
+        self.channel.version += 1
+        self.channel.emotes.rename(data)
+
+    def _on_removeEmote(self, _, data):
+        self.channel.version += 1
+        self.channel.emotes.remove(data)
 
     def _on_drinkCount(self, _, data):
+        self.channel.version += 1
         self.channel.drink_count = data
 
     def _on_usercount(self, _, data):
+        self.channel.version += 1
         self.channel.userlist.count = data
 
         # Update high water mark for connected count when it changes
@@ -195,16 +297,30 @@ class Bot:
         if data["name"] == self.user.name:
             self.user.update(**data)
             self.channel.userlist.add(self.user)
+            self.update_capabilities()
         else:
             self.channel.userlist.add(User(**data))
 
     def _on_userlist(self, _, data):
-        self.channel.userlist.clear()
+        self.channel.version += 1
+        userlist = self.channel.userlist
+        names = {user["name"] for user in data}
+        for name in [name for name in userlist if name not in names]:
+            del userlist[name]
+            self._defer("syncUserLeave", {"name": name})
         for user in data:
-            self._add_user(user)
+            if user["name"] not in userlist:
+                self._add_user(user)
+                self._defer("syncAddUser", user)
+            elif userlist.update_user(user):
+                self._defer("syncUpdateUser", user)
+        self.update_capabilities()
         self.logger.info("userlist: %s", self.channel.userlist)
+        if any(not user.uncloaked for user in userlist.values()):
+            self._uncloak_in_background()
 
     def _on_addUser(self, _, data):
+        self.channel.version += 1
         self._add_user(data)
         self.logger.info("userlist: %s", self.channel.userlist)
 
@@ -219,6 +335,7 @@ class Bot:
                 self.db.update_high_water_mark(user_count, connected_count)
 
     def _on_userLeave(self, _, data):
+        self.channel.version += 1
         user = data["name"]
 
         # Track user leave in database
@@ -237,8 +354,9 @@ class Bot:
         # Ignore blank usernames (server sometimes sends these)
         if not user_name:
             return
+        self.channel.version += 1
         if user_name in self.channel.userlist:
-            self.channel.userlist[user_name].meta = data["meta"]
+            self.channel.userlist.set_meta(user_name, data["meta"])
         else:
             self.logger.warning("setUserMeta: user %s not in userlist yet", user_name)
 
@@ -248,8 +366,12 @@ class Bot:
         # Ignore blank usernames (server sometimes sends these)
         if not user_name:
             return
+        self.channel.version += 1
         if user_name in self.channel.userlist:
-            self.channel.userlist[user_name].rank = data["rank"]
+            self.channel.userlist.set_rank(user_name, data["rank"])
+            if user_name == self.user.name:
+                self.update_capabilities()
+                self._configure_chat_limiter()
         else:
             self.logger.warning("setUserRank: user %s not in userlist yet", user_name)
 
@@ -259,23 +381,28 @@ class Bot:
         # Ignore blank usernames (server sometimes sends these)
         if not user_name:
             return
+        self.channel.version += 1
         if user_name in self.channel.userlist:
-            self.channel.userlist[user_name].afk = data["afk"]
+            self.channel.userlist.set_afk(user_name, data["afk"])
         else:
             self.logger.warning("setAFK: user %s not in userlist yet", user_name)
 
     def _on_setLeader(self, _, data):
+        self.channel.version += 1
         self.channel.userlist.leader = data
         self.logger.info("leader %r", self.channel.userlist.leader)
 
     def _on_setPlaylistMeta(self, _, data):
+        self.channel.version += 1
         self.channel.playlist.time = data.get("rawTime", 0)
 
     def _on_mediaUpdate(self, _, data):
+        self.channel.version += 1
         self.channel.playlist.paused = data.get("paused", True)
         self.channel.playlist.current_time = data.get("currentTime", 0)
 
     def _on_voteskip(self, _, data):
+        self.channel.version += 1
         self.channel.voteskip_count = data.get("count", 0)
         self.channel.voteskip_need = data.get("need", 0)
         self.logger.info(
@@ -283,31 +410,38 @@ class Bot:
         )
 
     def _on_setCurrent(self, _, data):
+        self.channel.version += 1
         self.channel.playlist.current = data
         self.logger.info("setCurrent %s", self.channel.playlist.current)
 
     def _on_queue(self, _, data):
+        self.channel.version += 1
         self.channel.playlist.add(data["after"], data["item"])
-        self.logger.info("queue %s", self.channel.playlist.queue)
+        self.logger.info("queue %s after %s", data["item"]["uid"], data["after"])
 
     def _on_delete(self, _, data):
+        self.channel.version += 1
         self.channel.playlist.remove(data["uid"])
-        self.logger.info("delete %s", self.channel.playlist.queue)
+        self.logger.info("delete %s", data["uid"])
 
     def _on_setTemp(self, _, data):
-        self.channel.playlist.get(data["uid"]).temp = data["temp"]
+        self.channel.version += 1
+        self.channel.playlist.set_temp(data["uid"], data["temp"])
 
     def _on_moveVideo(self, _, data):
+        self.channel.version += 1
         self.channel.playlist.move(data["from"], data["after"])
-        self.logger.info("move %s", self.channel.playlist.queue)
+        self.logger.info("move %s after %s", data["from"], data["after"])
 
     def _on_playlist(self, _, data):
-        self.channel.playlist.clear()
-        for item in data:
-            self.channel.playlist.add(None, item)
-        self.logger.info("playlist %s", self.channel.playlist.queue)
+        self.channel.version += 1
+        changes = self.channel.playlist.reconcile(data)
+        for event, change in changes:
+            self._defer("sync" + event[0].upper() + event[1:], change)
+        self.logger.info("playlist: %d items, %d changes", len(data), len(changes))
 
     def _on_setPlaylistLocked(self, _, data):
+        self.channel.version += 1
         self.channel.playlist.locked = data
         self.logger.info("playlist locked %s", data)
 
@@ -384,6 +518,10 @@ class Bot:
         finally:
             self.socket = None
             self.user.rank = -1
+            if self.user.name in self.channel.userlist:
+                self.channel.userlist.refresh(self.user.name)
+            self.state_version += 1
+            self.update_capabilities()
 
     async def connect(self):
         """Get server URL and connect.
@@ -400,6 +538,7 @@ class Bot:
         self.logger.info("connect %s", self.server)
         self.socket = await self.socket_io(self.server, loop=asyncio.get_running_loop())
         self.connect_time = time.time()  # Record connection time
+        self.state_version += 1
 
     async def login(self):
         """Connect, join channel, log in.
@@ -454,209 +593,348 @@ class Bot:
                     raise LoginError(err)
         await self.trigger("login", self)
 
-    async def _log_user_counts_periodically(self):
-        """Background task to periodically log user counts for graphing
+    def _log_user_counts(self):
+        """Log user counts for graphing (job, every 5 minutes)."""
+        if self.db and self.channel and self.channel.userlist:
+            chat_users = len(self.channel.userlist)
+            connected_users = self.channel.userlist.count or chat_users
 
-        Logs user counts every 5 minutes to build historical data
-        """
-        try:
-            while True:
-                await asyncio.sleep(300)  # 5 minutes
+            try:
+                self.db.log_user_count(chat_users, connected_users)
+                self.logger.debug(
+                    "Logged user counts: %d chat, %d connected",
+                    chat_users,
+                    connected_users,
+                )
+            except Exception as e:
+                self.logger.error("Failed to log user counts: %s", e)
+
+    def _status_snapshot(self):
+        """Current bot/channel state as `update_current_status` fields."""
+        status = {
+            "bot_name": self.user.name,
+            "bot_rank": self.user.rank,
+            "bot_afk": 1 if self.user.afk else 0,
+            "channel_name": self.channel.name,
+            "current_chat_users": len(self.channel.userlist),
+            "current_connected_users": (
+                self.channel.userlist.count or len(self.channel.userlist)
+            ),
+            "bot_start_time": int(self.start_time),
+            "bot_connected": 1 if self.socket else 0,
+        }
+
+        # Add playlist info if available
+        if self.channel.playlist:
+            status["playlist_items"] = len(self.channel.playlist)
+            if self.channel.playlist.current:
+                status["current_media_title"] = self.channel.playlist.current.title
+                status["current_media_duration"] = (
+                    self.channel.playlist.current.duration
+                )
 
-                if self.db and self.channel and self.channel.userlist:
-                    chat_users = len(self.channel.userlist)
-                    connected_users = self.channel.userlist.count or chat_users
+        return status
 
-                    try:
-                        self.db.log_user_count(chat_users, connected_users)
-                        self.logger.debug(
-                            "Logged user counts: %d chat, %d connected",
-                            chat_users,
-                            connected_users,
-                        )
-                    except Exception as e:
-                        self.logger.error("Failed to log user counts: %s", e)
-        except asyncio.CancelledError:
-            self.logger.debug("User count logging task cancelled")
+    def _update_current_status(self, now=None):
+        """Write the current status if it has changed.
+
+        Nothing is read or written while `Channel.version` and
+        `state_version` are unchanged since the last write. Otherwise
+        only the fields that differ from the last write are persisted.
+        The full status is written at least once every `status_heartbeat`
+        seconds, which also refreshes its `last_updated` time.
 
-    async def _update_current_status_periodically(self):
-        """Background task to update current status for web display
+        Parameters
+        ----------
+        now : `None` or `float`, optional
+            Current time (`time.time()` if `None`).
 
-        Updates every 10 seconds with current bot/channel state
+        Returns
+        -------
+        `dict`
+            Fields written (empty if nothing was written).
         """
-        try:
-            while True:
-                await asyncio.sleep(10)  # 10 seconds
+        import time
 
-                if self.db and self.channel:
-                    try:
-                        status = {
-                            "bot_name": self.user.name,
-                            "bot_rank": self.user.rank,
-                            "bot_afk": 1 if self.user.afk else 0,
-                            "channel_name": self.channel.name,
-                            "current_chat_users": len(self.channel.userlist),
-                            "current_connected_users": (
-                                self.channel.userlist.count
-                                or len(self.channel.userlist)
-                            ),
-                            "bot_start_time": int(self.start_time),
-                            "bot_connected": 1 if self.socket else 0,
-                        }
-
-                        # Add playlist info if available
-                        if self.channel.playlist:
-                            status["playlist_items"] = len(self.channel.playlist.queue)
-                            if self.channel.playlist.current:
-                                status[
-                                    "current_media_title"
-                                ] = self.channel.playlist.current.title
-                                status[
-                                    "current_media_duration"
-                                ] = self.channel.playlist.current.duration
-
-                        self.db.update_current_status(**status)
-                        self.logger.debug("Updated current status")
-                    except Exception as e:
-                        self.logger.error("Failed to update status: %s", e)
-        except asyncio.CancelledError:
-            self.logger.debug("Status update task cancelled")
+        if now is None:
+            now = time.time()
+        version = (self.channel.version, self.state_version)
+        heartbeat = (
+            self._status_time is None
+            or now - self._status_time >= self.status_heartbeat
+        )
+        if version == self._status_version and not heartbeat:
+            return {}
 
-    async def _process_outbound_messages_periodically(self):
-        """Background task to send outbound messages queued by web UI.
+        status = self._status_snapshot()
+        if heartbeat:
+            fields = status
+        else:
+            fields = {
+                key: value
+                for key, value in status.items()
+                if key not in self._status_saved or self._status_saved[key] != value
+            }
+        if fields:
+            self.db.update_current_status(**fields)
+            self._status_saved.update(fields)
+        if heartbeat:
+            self._status_time = now
+        self._status_version = version
+        return fields
+
+    def _write_status(self):
+        """Update current status for web display (job, every 10 seconds).
+
+        Writes only what has changed, see `_update_current_status`.
+        """
+        if self.db and self.channel:
+            try:
+                fields = self._update_current_status()
+                if fields:
+                    self.logger.debug("Updated current status: %s", ", ".join(fields))
+            except Exception as e:
+                self.logger.error("Failed to update status: %s", e)
+
+    async def _process_outbound_messages(self):
+        """Send outbound messages queued by web UI (job, every 2 seconds).
 
         Implements gentle retry logic with exponential backoff:
         - Permanent errors (permission/muted/flood) stop retries immediately
         - Transient errors (network issues) retry with increasing delays
         - Max 3 retry attempts before giving up
         """
+        # Check if bot is connected and ready
+        if not self.db:
+            return
+        if not self.socket:
+            self.logger.debug("Outbound processor waiting for socket connection")
+            return
+        if not self.channel.permissions:
+            self.logger.debug(
+                "Outbound processor waiting for channel permissions to load"
+            )
+            return
+
+        loop = asyncio.get_running_loop()
+
+        def run(func, *args, **kwargs):
+            # The database may be busy, never wait for it on the loop
+            return loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
         try:
-            while True:
-                await asyncio.sleep(2)  # Poll every 2 seconds
-
-                # Check if bot is connected and ready
-                if not self.db:
-                    continue
-                if not self.socket:
-                    self.logger.debug(
-                        "Outbound processor waiting for socket connection"
-                    )
-                    continue
-                if not self.channel.permissions:
-                    self.logger.debug(
-                        "Outbound processor waiting for channel " "permissions to load"
-                    )
-                    continue
+            # Fetch messages ready for sending (respects retry backoff)
+            messages = await run(
+                self.db.get_unsent_outbound_messages, limit=20, max_retries=3
+            )
+
+            if messages:
+                self.logger.debug(
+                    "Processing %d queued outbound message(s)", len(messages)
+                )
+
+            for m in messages:
+                mid = m["id"]
+                text = m["message"]
+                retry_count = m.get("retry_count", 0)
 
                 try:
-                    # Fetch messages ready for sending (respects retry backoff)
-                    messages = self.db.get_unsent_outbound_messages(
-                        limit=20, max_retries=3
-                    )
-
-                    if messages:
-                        self.logger.debug(
-                            "Processing %d queued outbound message(s)", len(messages)
+                    await self.chat(text)
+                    await run(self.db.mark_outbound_sent, mid)
+
+                    if retry_count > 0:
+                        self.logger.info(
+                            "Sent outbound id=%s after %d retries",
+                            mid,
+                            retry_count,
+                        )
+                    else:
+                        self.logger.info("Sent outbound id=%s", mid)
+
+                except Exception as send_exc:
+                    from .error import ChannelError, ChannelPermissionError
+
+                    error_msg = str(send_exc)
+
+                    # Classify error as permanent or transient
+                    if isinstance(send_exc, (ChannelPermissionError, ChannelError)):
+                        # Permanent: permissions, muted, flood control
+                        await run(
+                            self.db.mark_outbound_failed,
+                            mid,
+                            error_msg,
+                            is_permanent=True,
+                        )
+                        self.logger.error(
+                            "Permanent failure for outbound id=%s: %s",
+                            mid,
+                            error_msg,
+                        )
+                    else:
+                        # Transient: network, timeout, etc - will retry
+                        await run(
+                            self.db.mark_outbound_failed,
+                            mid,
+                            error_msg,
+                            is_permanent=False,
+                        )
+                        self.logger.warning(
+                            "Transient failure for outbound id=%s (retry %d): %s",
+                            mid,
+                            retry_count + 1,
+                            error_msg,
                         )
 
-                    for m in messages:
-                        mid = m["id"]
-                        text = m["message"]
-                        retry_count = m.get("retry_count", 0)
-
-                        try:
-                            await self.chat(text)
-                            self.db.mark_outbound_sent(mid)
-
-                            if retry_count > 0:
-                                self.logger.info(
-                                    "Sent outbound id=%s after %d retries",
-                                    mid,
-                                    retry_count,
-                                )
-                            else:
-                                self.logger.info("Sent outbound id=%s", mid)
-
-                        except Exception as send_exc:
-                            from .error import ChannelError, ChannelPermissionError
-
-                            error_msg = str(send_exc)
-
-                            # Classify error as permanent or transient
-                            if isinstance(
-                                send_exc, (ChannelPermissionError, ChannelError)
-                            ):
-                                # Permanent: permissions, muted, flood control
-                                self.db.mark_outbound_failed(
-                                    mid, error_msg, is_permanent=True
-                                )
-                                self.logger.error(
-                                    "Permanent failure for outbound id=%s: %s",
-                                    mid,
-                                    error_msg,
-                                )
-                            else:
-                                # Transient: network, timeout, etc - will retry
-                                self.db.mark_outbound_failed(
-                                    mid, error_msg, is_permanent=False
-                                )
-                                self.logger.warning(
-                                    "Transient failure for outbound id=%s "
-                                    "(retry %d): %s",
-                                    mid,
-                                    retry_count + 1,
-                                    error_msg,
-                                )
+        except Exception as e:
+            self.logger.error("Error processing outbound messages: %s", e)
 
-                except Exception as e:
-                    self.logger.error("Error processing outbound messages: %s", e)
-        except asyncio.CancelledError:
-            self.logger.debug("Outbound processing task cancelled")
+    def _quiet_hour(self, days=7):
+        """Hour of the day (UTC) with the fewest chat users on average.
 
-    async def _perform_maintenance_periodically(self):
-        """Background task for periodic database maintenance.
+        Returns
+        -------
+        `None` or `int`
+            `None` if there is no user count history.
+        """
+        get_history = getattr(self.db, "get_user_count_history", None)
+        if get_history is None:
+            return None
+        totals = [0] * 24
+        samples = [0] * 24
+        for row in get_history(hours=days * 24):
+            hour = (row["timestamp"] // 3600) % 24
+            totals[hour] += row["chat_users"]
+            samples[hour] += 1
+        averages = [
+            (totals[hour] / samples[hour], hour) for hour in range(24) if samples[hour]
+        ]
+        if not averages:
+            return None
+        return min(averages)[1]
+
+    def _maintenance_delay(self, now, min_delay, quiet_hour):
+        """Seconds until the next maintenance run.
+
+        The run starts at the beginning of `quiet_hour` (UTC), but no
+        sooner than `min_delay` seconds from `now`.
+        """
+        earliest = now + min_delay
+        if quiet_hour is None:
+            return min_delay
+        start = earliest - earliest % 86400 + quiet_hour * 3600
+        if start < earliest:
+            start += 86400
+        return start - now
+
+    async def _run_maintenance(self):
+        """Run database maintenance off the event loop.
+
+        Every step of `db.MAINTENANCE_STEPS` is run in chunks of
+        `MAINTENANCE_CHUNK` rows or pages in the default executor until
+        it is complete or `MAINTENANCE_BUDGET` is used up. Databases
+        without `maintenance_step` fall back to `perform_maintenance`.
 
-        Runs once per day (at startup + every 24h) to:
-        - Clean up old records (history, outbound messages, tokens)
-        - VACUUM database to reclaim space
-        - Update query planner statistics
+        Returns
+        -------
+        `list` of (`str`, `int`, `float`)
+            Step, rows or pages processed and seconds taken.
         """
-        try:
+        import time
+
+        loop = asyncio.get_running_loop()
+        steps = getattr(self.db, "MAINTENANCE_STEPS", None)
+        if steps is None or not hasattr(self.db, "maintenance_step"):
+            start = time.monotonic()
+            log = await loop.run_in_executor(None, self.db.perform_maintenance)
+            elapsed = time.monotonic() - start
+            self.logger.info(
+                "maintenance: %s (%.3fs)", ", ".join(map(str, log)), elapsed
+            )
+            return [("all", 0, elapsed)]
+
+        report = []
+        deadline = time.monotonic() + self.MAINTENANCE_BUDGET
+        for step in steps:
+            if time.monotonic() >= deadline:
+                self.logger.warning("maintenance budget used up before %s", step)
+                break
+            start = time.monotonic()
+            total = 0
             while True:
-                # Run immediately on startup, then every 24 hours
-                if self.db:
-                    try:
-                        self.logger.info("Starting database maintenance...")
-                        maintenance_log = self.db.perform_maintenance()
-                        self.logger.info(
-                            "Maintenance complete: %s", ", ".join(maintenance_log)
-                        )
-                    except Exception as e:
-                        self.logger.error("Database maintenance failed: %s", e)
+                count = await loop.run_in_executor(
+                    None, self.db.maintenance_step, step, self.MAINTENANCE_CHUNK
+                )
+                total += count
+                if count < self.MAINTENANCE_CHUNK or time.monotonic() >= deadline:
+                    break
+                await asyncio.sleep(self.MAINTENANCE_PAUSE)
+            elapsed = time.monotonic() - start
+            self.logger.info("maintenance %s: %d in %.3fs", step, total, elapsed)
+            report.append((step, total, elapsed))
+        return report
+
+    async def _perform_maintenance(self):
+        """Periodic database maintenance (job, checked every minute).
+
+        Runs about once per day, at the start of the hour with the fewest
+        users in the last week of user count history, and never within
+        `MAINTENANCE_STARTUP_DELAY` seconds of startup:
+        - Clean up old records (history, chat, outbound messages)
+        - Incrementally vacuum the database to reclaim space
+        - Update query planner statistics
+        """
+        import time
 
-                # Wait 24 hours before next maintenance
-                await asyncio.sleep(86400)
+        if not self.db:
+            return
+        now = time.time()
+        if self._maintenance_next is None:
+            quiet_hour = None
+            try:
+                quiet_hour = await asyncio.get_running_loop().run_in_executor(
+                    None, self._quiet_hour
+                )
+            except Exception as e:
+                self.logger.error("Failed to read user count history: %s", e)
+            delay = self._maintenance_delay(
+                now, self._maintenance_min_delay, quiet_hour
+            )
+            self._maintenance_next = now + delay
+            self.logger.info("Next database maintenance in %ds", delay)
+        if now < self._maintenance_next:
+            return
 
-        except asyncio.CancelledError:
-            self.logger.debug("Maintenance task cancelled")
+        self._maintenance_next = None
+        self._maintenance_min_delay = self.MAINTENANCE_INTERVAL
+        try:
+            self.logger.info("Starting database maintenance...")
+            report = await self._run_maintenance()
+            self.logger.info(
+                "Maintenance complete in %.3fs",
+                sum(elapsed for _, _, elapsed in report),
+            )
+        except Exception as e:
+            self.logger.error("Database maintenance failed: %s", e)
+
+    def _add_jobs(self):
+        """Add the database jobs to the scheduler."""
+        jobs = (
+            ("user_counts", self._log_user_counts, 300, 10),
+            ("status", self._write_status, 10, 1),
+            ("outbound", self._process_outbound_messages, 2, 0),
+            ("maintenance", self._perform_maintenance, 60, 0),
+        )
+        for name, func, interval, jitter in jobs:
+            if name not in self.scheduler.jobs:
+                self.scheduler.add(name, func, interval, jitter=jitter)
 
     async def run(self):
         """Main loop."""
         try:
-            # Start background tasks for logging and status updates
+            # Start periodic jobs for logging, status updates, etc.
             if self.db:
-                self._history_task = asyncio.create_task(
-                    self._log_user_counts_periodically()
-                )
-                self._status_task = asyncio.create_task(
-                    self._update_current_status_periodically()
-                )
-                self._outbound_task = asyncio.create_task(
-                    self._process_outbound_messages_periodically()
-                )
-                self._maintenance_task = asyncio.create_task(
-                    self._perform_maintenance_periodically()
-                )
+                self._add_jobs()
+            self.scheduler.start()
 
             while True:
                 try:
@@ -675,34 +953,19 @@ class Bot:
         except asyncio.CancelledError:
             self.logger.info("cancelled")
         finally:
-            # Cancel background tasks
-            if self._history_task:
-                self._history_task.cancel()
-                try:
-                    await self._history_task
-                except asyncio.CancelledError:
-                    pass
-
-            if self._status_task:
-                self._status_task.cancel()
-                try:
-                    await self._status_task
-                except asyncio.CancelledError:
-                    pass
-
-            if self._outbound_task:
-                self._outbound_task.cancel()
+            # Cancel periodic jobs
+            await self.scheduler.stop()
+            if self._uncloak_task is not None:
+                self._uncloak_task.cancel()
+
+            # Write out anything the event handlers buffered and wait for
+            # the commit, the writer threads do not outlive the process
+            close = getattr(self.db, "close", None) or getattr(self.db, "flush", None)
+            if close is not None:
                 try:
-                    await self._outbound_task
-                except asyncio.CancelledError:
-                    pass
-
-            if self._maintenance_task:
-                self._maintenance_task.cancel()
-                try:
-                    await self._maintenance_task
-                except asyncio.CancelledError:
-                    pass
+                    await asyncio.get_running_loop().run_in_executor(None, close)
+                except Exception as e:
+                    self.logger.error("Failed to close database: %s", e)
 
             await self.disconnect()
 
@@ -744,6 +1007,52 @@ class Bot:
                 self.logger.warning("off: handler not found: %s %s", event, handler)
         return self
 
+    def add_filter(self, event, *filters):
+        """Add event filters.
+
+        Filters are called with the event name and data before the event is
+        logged or handled, and return `None` to keep the event, `True` to
+        drop it, or an (event, data) tuple to trigger instead.
+
+        Parameters
+        ----------
+        event : `str`
+            Event name.
+        filters : `list` of `function`
+            Event filters, e.g. `cytube_bot.chat_filter.ChatFilter`.
+        """
+        ev_filters = self.filters[event]
+        for event_filter in filters:
+            if event_filter not in ev_filters:
+                ev_filters.append(event_filter)
+                self.logger.info("add_filter: %s %s", event, event_filter)
+            else:
+                self.logger.warning(
+                    "add_filter: filter exists: %s %s", event, event_filter
+                )
+        return self
+
+    def remove_filter(self, event, *filters):
+        """Remove event filters.
+
+        Parameters
+        ----------
+        event : `str`
+            Event name.
+        filters : `list` of `function`
+            Event filters.
+        """
+        ev_filters = self.filters[event]
+        for event_filter in filters:
+            try:
+                ev_filters.remove(event_filter)
+                self.logger.info("remove_filter: %s %s", event, event_filter)
+            except ValueError:
+                self.logger.warning(
+                    "remove_filter: filter not found: %s %s", event, event_filter
+                )
+        return self
+
     async def trigger(self, event, data):
         """Trigger an event.
 
@@ -759,6 +1068,23 @@ class Bot:
         `cytube_bot.error.LoginError`
         `cytube_bot.error.Kicked`
         """
+        self._triggering += 1
+        try:
+            await self._handle(event, data)
+        finally:
+            self._triggering -= 1
+        while self._deferred:
+            await self.trigger(*self._deferred.popleft())
+
+    async def _handle(self, event, data):
+        for event_filter in self.filters.get(event, ()):
+            result = event_filter(event, data)
+            if result is True:
+                self.logger.debug("filtered: %s %s", event, data)
+                return
+            if result:
+                await self.trigger(*result)
+                return
         level = self.EVENT_LOG_LEVEL.get(event, self.EVENT_LOG_LEVEL_DEFAULT)
         self.logger.log(level, "trigger: %s %s", event, data)
         try:
@@ -776,6 +1102,141 @@ class Bot:
             if event != "error":
                 await self.trigger("error", {"event": event, "data": data, "error": ex})
 
+    def _defer(self, event, data):
+        """Trigger an event after the handlers of the current event,
+        or right away outside of event handlers.
+        """
+        if self._triggering:
+            self._deferred.append((event, data))
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.logger.debug("no event loop, %s not triggered", event)
+            return
+        task = loop.create_task(self.trigger(event, data))
+        self._event_tasks.add(task)
+        task.add_done_callback(self._event_tasks.discard)
+
+    def update_capabilities(self):
+        """Recompute `capabilities`.
+
+        Triggers `capabilities` if they changed, after the handlers of
+        the current event if there is one.
+
+        Returns
+        -------
+        `frozenset` of `str`
+            Actions the bot user may perform.
+        """
+        permissions = self.channel.permissions
+        rank = self.user.rank
+        self._capabilities_for = (permissions, rank)
+        capabilities = self.channel.permitted_actions(rank)
+        previous = self.capabilities
+        if capabilities != previous:
+            self.capabilities = capabilities
+            self._defer(
+                "capabilities",
+                {
+                    "capabilities": capabilities,
+                    "added": capabilities - previous,
+                    "removed": previous - capabilities,
+                },
+            )
+        return self.capabilities
+
+    def _current_capabilities(self):
+        permissions, rank = self._capabilities_for
+        if permissions is not self.channel.permissions or rank != self.user.rank:
+            return self.update_capabilities()
+        return self.capabilities
+
+    def can(self, action):
+        """Check if the bot user may perform an action.
+
+        Parameters
+        ----------
+        action : `str`
+            Permission to check, see `cytube_bot.channel.Channel.permissions`.
+
+        Returns
+        -------
+        `bool`
+            `True` if the action is allowed, `False` if it is not or
+            is unknown.
+        """
+        return action in self._current_capabilities()
+
+    def _check_permission(self, action):
+        """`cytube_bot.channel.Channel.check_permission` for the bot user."""
+        if action not in self._current_capabilities():
+            # Raises the permission error
+            self.channel.check_permission(action, self.user)
+
+    async def uncloak_ips(self, users=None):
+        """Uncloak user IPs in a background thread.
+
+        Parameters
+        ----------
+        users : `None` or `list` of `cytube_bot.user.User`, optional
+            Users. `None` - all users in the channel.
+
+        Returns
+        -------
+        `dict` of (`str`, `None` or `list` of `str`)
+            Uncloaked IPs by user name.
+        """
+        if users is None:
+            users = list(self.channel.userlist.values())
+        pending = [user for user in users if not user.uncloaked]
+        if pending:
+            ips = [user.ip for user in pending]
+            uncloaked = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: [uncloak_ip(ip) for ip in ips]
+            )
+            for user, ip, result in zip(pending, ips, uncloaked):
+                if user.ip == ip:
+                    user.uncloaked_ip = result
+            self.logger.debug("uncloaked %d ips", len(pending))
+        return {user.name: user.uncloaked_ip for user in users}
+
+    def _uncloak_in_background(self):
+        """Start uncloaking IPs in the channel, replacing a run in progress."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Uncloaked on access
+        if self._uncloak_task is not None:
+            self._uncloak_task.cancel()
+        self._uncloak_task = loop.create_task(self.uncloak_ips())
+        self._uncloak_task.add_done_callback(self._uncloak_done)
+
+    def _uncloak_done(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.error("uncloak_ips: %r", task.exception())
+
+    def _configure_chat_limiter(self):
+        """Set `chat_limiter` from the channel antiflood options
+        and the bot's rank.
+        """
+        options = self.channel.options
+        if (
+            not options.get("chat_antiflood", False)
+            or self.user.rank + Channel.RANK_PRECISION >= self.ANTIFLOOD_EXEMPT_RANK
+        ):
+            self.chat_limiter.configure(None)
+            return
+        params = options.get("chat_antiflood_params") or {}
+        try:
+            burst = int(params.get("burst", self.ANTIFLOOD_BURST))
+            sustained = float(params.get("sustained", self.ANTIFLOOD_SUSTAINED))
+        except (TypeError, ValueError):
+            self.logger.warning("invalid chat_antiflood_params: %r", params)
+            burst, sustained = self.ANTIFLOOD_BURST, self.ANTIFLOOD_SUSTAINED
+        self.chat_limiter.configure(sustained * self.ANTIFLOOD_MARGIN, burst)
+        self.logger.info("chat limiter: %s", self.chat_limiter)
+
     async def chat(self, msg, meta=None):
         """Send a chat message.
 
@@ -803,11 +1264,12 @@ class Bot:
             return False
 
         self.logger.info("chat %s", msg)
-        self.channel.check_permission("chat", self.user)
+        self._check_permission("chat")
 
         if self.user.muted or self.user.smuted:
             raise ChannelPermissionError("muted")
 
+        await self.chat_limiter.acquire()
         res = await self.socket.emit(
             "chatMsg",
             {"msg": msg, "meta": meta if meta else {}},
@@ -819,6 +1281,7 @@ class Bot:
             raise ChannelError("could not send chat message")
         if res[0] == "noflood":
             self.logger.error("chat: noflood: %s", res)
+            self.chat_limiter.drain()
             raise ChannelPermissionError(res[1].get("msg", "noflood"))
             # if self.MUTED.match(res['msg']):
             #     raise ChannelPermissionError('muted')
@@ -852,11 +1315,12 @@ class Bot:
             return False
 
         self.logger.info("pm %s %s", to, msg)
-        self.channel.check_permission("chat", self.user)
+        self._check_permission("chat")
 
         if self.user.muted or self.user.smuted:
             raise ChannelPermissionError("muted")
 
+        await self.chat_limiter.acquire()
         res = await self.socket.emit(
             "pm",
             {"msg": msg, "to": to, "meta": meta if meta else {}},
@@ -883,6 +1347,7 @@ class Bot:
         cytube_bot.error.ChannelPermissionError
         """
         if self.user.afk != value:
+            await self.chat_limiter.acquire()
             await self.socket.emit("chatMsg", {"msg": "/afk"})
 
     async def clear_chat(self):
@@ -892,7 +1357,7 @@ class Bot:
         ------
         cytube_bot.error.ChannelPermissionError
         """
-        self.channel.check_permission("chatclear", self.user)
+        self._check_permission("chatclear")
         await self.socket.emit("chatMsg", {"msg": "/clear"})
 
     async def kick(self, user, reason=""):
@@ -917,7 +1382,7 @@ class Bot:
                 return data.get("name") == user
             return False
 
-        self.channel.check_permission("kick", self.user)
+        self._check_permission("kick")
         if not isinstance(user, User):
             user = self.channel.userlist.get(user)
         if self.user.rank <= user.rank:
@@ -938,7 +1403,29 @@ class Bot:
         if res[0] == "errorMsg":
             raise ChannelPermissionError(res[1].get("msg", "<no message>"))
 
-    async def add_media(self, link, append=True, temp=True):
+    def find_media(self, link):
+        """Find a media link in the playlist.
+
+        Parameters
+        ----------
+        link : `str` or `cytube_bot.media_link.MediaLink`
+            Media link.
+
+        Returns
+        -------
+        `list` of `cytube_bot.playlist.PlaylistItem`
+            Playlist items with this link.
+
+        Raises
+        ------
+        ValueError
+            If media URL is not supported.
+        """
+        if not isinstance(link, MediaLink):
+            link = MediaLink.from_url(link)
+        return self.channel.playlist.find(link)
+
+    async def add_media(self, link, append=True, temp=True, duplicate=True):
         """Add media link to playlist.
 
         Parameters
@@ -949,6 +1436,8 @@ class Bot:
             `True` - append, `False` - insert after current item.
         temp : `bool`, optional
             `True` to add temporary item.
+        duplicate : `bool`, optional
+            `False` to refuse media that is in the playlist or being added.
 
         Returns
         -------
@@ -958,13 +1447,16 @@ class Bot:
         Raises
         ------
         cytube_bot.error.ChannelPermissionError
+        cytube_bot.error.DuplicateMediaError
+            If `duplicate` is `False` and the media is in the playlist.
         cytube_bot.error.ChannelError
         ValueError
         """
 
         def match_add_media_response(event, data):
             if event == "queueFail":
-                return True
+                # Match failures for other media when they say which
+                return not isinstance(data, dict) or data.get("id", link.id) == link.id
             if event == "queue":
                 item = data.get("item", {})
                 media = item.get("media", {})
@@ -975,36 +1467,123 @@ class Bot:
                 )
             return False
 
+        # A queueFail without an id goes to the oldest add in flight
+        match_add_media_response.exclusive = True
+
         action = "playlist" if self.channel.playlist.locked else "oplaylist"
         self.logger.info("add media %s", link)
-        self.channel.check_permission(action + "add", self.user)
+        self._check_permission(action + "add")
         if not append:
-            self.channel.check_permission(action + "next", self.user)
+            self._check_permission(action + "next")
         if not temp:
-            self.channel.check_permission("addnontemp", self.user)
+            self._check_permission("addnontemp")
 
         if not isinstance(link, MediaLink):
             link = MediaLink.from_url(link)
+        if not duplicate and (self._queueing[link] or self.find_media(link)):
+            raise DuplicateMediaError("%s is already in the playlist" % link)
 
-        res = await self.socket.emit(
-            "queue",
-            {
-                "type": link.type,
-                "id": link.id,
-                "pos": "end" if append else "next",
-                "temp": temp,
-            },
-            match_add_media_response,
-            self.response_timeout,
-        )
+        self._queueing[link] += 1
+        try:
+            await self.queue_limiter.acquire()
+            res = await self.socket.emit(
+                "queue",
+                {
+                    "type": link.type,
+                    "id": link.id,
+                    "pos": "end" if append else "next",
+                    "temp": temp,
+                },
+                match_add_media_response,
+                self.response_timeout,
+            )
+        finally:
+            self._queueing[link] -= 1
+            if not self._queueing[link]:
+                del self._queueing[link]
 
         if res is None:
             raise ChannelError("add media response timeout")
         if res[0] == "queueFail":
             self.logger.info("queueFail %r", res)
-            raise ChannelError(res[1].get("msg", "<no message>"))
+            msg = res[1].get("msg", "<no message>")
+            if self.QUEUE_THROTTLED.match(msg):
+                self.queue_limiter.drain()
+            raise ChannelError(msg)
         return res[1]
 
+    async def _pipeline(self, calls, window=None):
+        """Run playlist requests with up to `window` in flight.
+
+        Requests are started in order, so the server receives them in
+        order. Each response is matched to its own request.
+
+        Parameters
+        ----------
+        calls : `list` of `function` ()
+            Coroutine functions.
+        window : `None` or `int`, optional
+            Maximum number of requests in flight (`BULK_WINDOW` if `None`).
+
+        Returns
+        -------
+        `list`
+            Result or exception of every call, in order.
+        """
+        semaphore = asyncio.Semaphore(window or self.BULK_WINDOW)
+
+        async def run(call):
+            async with semaphore:
+                try:
+                    return await call()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as ex:  # pylint: disable=broad-except
+                    return ex
+
+        return await asyncio.gather(*(run(call) for call in calls))
+
+    async def add_media_many(
+        self, links, append=True, temp=True, window=None, duplicate=True
+    ):
+        """Add several media links to the playlist.
+
+        Up to `window` requests are in flight at once, paced by
+        `queue_limiter`.
+
+        Parameters
+        ----------
+        links : `list` of (`str` or `cytube_bot.media_link.MediaLink`)
+            Media links, added in this order.
+        append : `bool`, optional
+            `True` - append, `False` - insert after current item.
+        temp : `bool`, optional
+            `True` to add temporary items.
+        window : `None` or `int`, optional
+            Maximum number of requests in flight (`BULK_WINDOW` if `None`).
+        duplicate : `bool`, optional
+            `False` to refuse media that is in the playlist or being added.
+
+        Returns
+        -------
+        `list` of (`dict` or `Exception`)
+            Playlist item data or error for every link, in order.
+        """
+        if not append:
+            # Every item is inserted after the current one, so the server
+            # must add them in reverse order to keep the given order
+            links = list(reversed(links))
+        results = await self._pipeline(
+            [
+                functools.partial(self.add_media, link, append, temp, duplicate)
+                for link in links
+            ],
+            window,
+        )
+        if not append:
+            results.reverse()
+        return results
+
     async def remove_media(self, item):
         """Remove playlist item.
 
@@ -1024,11 +1603,13 @@ class Bot:
                 return data.get("uid") == item.uid
             return False
 
+        match_remove_media_response.exclusive = True
+
         if self.channel.playlist.locked:
             action = "playlistdelete"
         else:
             action = "oplaylistdelete"
-        self.channel.check_permission(action, self.user)
+        self._check_permission(action)
         if not isinstance(item, PlaylistItem):
             item = self.channel.playlist.get(item)
         res = await self.socket.emit(
@@ -1037,13 +1618,33 @@ class Bot:
         if res is None:
             raise ChannelError("remove media response timeout")
 
+    async def remove_media_many(self, items, window=None):
+        """Remove several playlist items.
+
+        Parameters
+        ----------
+        items : `list` of (`int` or `cytube_bot.playlist.PlaylistItem`)
+            Items to remove.
+        window : `None` or `int`, optional
+            Maximum number of requests in flight (`BULK_WINDOW` if `None`).
+
+        Returns
+        -------
+        `list` of (`None` or `Exception`)
+            `None` or error for every item, in order.
+        """
+        return await self._pipeline(
+            [functools.partial(self.remove_media, item) for item in items], window
+        )
+
     async def move_media(self, item, after):
         """Move a playlist item.
 
         Parameters
         ----------
         item: `int` or `cytube_bot.playlist.PlaylistItem`
-        after: `int` or `cytube_bot.playlist.PlaylistItem`
+        after: `int` or `cytube_bot.playlist.PlaylistItem` or 'prepend'
+            Item to move after, 'prepend' to move to the beginning.
 
         Raises
         ------
@@ -1054,29 +1655,83 @@ class Bot:
 
         def match_remove_media_response(event, data):
             if event == "moveVideo":
-                return data.get("from") == item.uid and data.get("after") == after.uid
+                return data.get("from") == item.uid and data.get("after") == after_uid
             return False
 
+        match_remove_media_response.exclusive = True
+
         if self.channel.playlist.locked:
             action = "playlistmove"
         else:
             action = "oplaylistmove"
-        self.channel.check_permission(action, self.user)
+        self._check_permission(action)
 
         if not isinstance(item, PlaylistItem):
             item = self.channel.playlist.get(item)
-        if not isinstance(after, PlaylistItem):
-            after = self.channel.playlist.get(after)
+        if after == "prepend":
+            after_uid = after
+        else:
+            if not isinstance(after, PlaylistItem):
+                after = self.channel.playlist.get(after)
+            after_uid = after.uid
 
         res = await self.socket.emit(
             "moveMedia",
-            {"from": item.uid, "after": after.uid},
+            {"from": item.uid, "after": after_uid},
             match_remove_media_response,
             self.response_timeout,
         )
         if res is None:
             raise ChannelError("move media response timeout")
 
+    async def reorder(self, items, window=None):
+        """Move playlist items to the beginning of the playlist
+        in the given order.
+
+        Moves of items that are already in place are skipped. The moves
+        are pipelined; the server applies them in the order they are sent.
+
+        Parameters
+        ----------
+        items : `list` of (`int` or `cytube_bot.playlist.PlaylistItem`)
+            Items in the new order.
+        window : `None` or `int`, optional
+            Maximum number of requests in flight (`BULK_WINDOW` if `None`).
+
+        Returns
+        -------
+        `list` of (`None` or `Exception`)
+            `None` or error for every item, in order. Items that were
+            already in place count as moved.
+
+        Raises
+        ------
+        ValueError
+            If an item does not exist.
+        """
+        playlist = self.channel.playlist
+        items = [
+            item if isinstance(item, PlaylistItem) else playlist.get(item)
+            for item in items
+        ]
+        # Simulate the moves to skip the ones that change nothing
+        order = [item.uid for item in playlist.queue]
+        calls = []
+        indices = []
+        for i, item in enumerate(items):
+            after = items[i - 1] if i else "prepend"
+            position = order.index(item.uid)
+            if position == i:
+                continue
+            order.insert(i, order.pop(position))
+            calls.append(functools.partial(self.move_media, item, after))
+            indices.append(i)
+
+        results = [None] * len(items)
+        for i, res in zip(indices, await self._pipeline(calls, window)):
+            results[i] = res
+        return results
+
     async def set_current_media(self, item):
         """Set current playlist item.
 
@@ -1100,7 +1755,7 @@ class Bot:
             action = "playlistjump"
         else:
             action = "oplaylistjump"
-        self.channel.check_permission(action, self.user)
+        self._check_permission(action)
         if not isinstance(item, PlaylistItem):
             item = self.channel.playlist.get(item)
         res = await self.socket.emit(
@@ -1131,7 +1786,7 @@ class Bot:
                     return data == user.name
             return False
 
-        self.channel.check_permission("leaderctl", self.user)
+        self._check_permission("leaderctl")
         if user is not None and not isinstance(user, User):
             user = self.channel.userlist.get(user)
         res = await self.socket.emit(
@@ -1,10 +1,148 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import itertools
 import logging
 
 from .error import ChannelPermissionError
+from .highlight import Highlighter
 from .playlist import Playlist
 from .user import UserList
+from .util import PrefixIndex
+
+
+class EmoteRegistry:
+    """Channel emotes by name.
+
+    Emotes are stored once, as received, by name. Each name has a sequence
+    number giving its `emoteList` position, so renaming an emote does not
+    move it; the order is restored when the emotes are iterated. Names are
+    kept in a prefix index for completion; `find` scans messages for them.
+
+    Attributes
+    ----------
+    names : `cytube_bot.util.PrefixIndex`
+        Emote names. Read-only.
+    """
+
+    def __init__(self, emotes=()):
+        self._emotes = {}
+        self._order = {}  # name -> sequence number
+        self._sorted = None  # Emotes in order, built on first iteration
+        self._sequence = itertools.count()
+        self.names = PrefixIndex()
+        self._matcher = None  # Built on first use of `find`
+        self.reset(emotes)
+
+    def __str__(self):
+        return "<emotes (%d)>" % len(self._emotes)
+
+    __repr__ = __str__
+
+    def __len__(self):
+        return len(self._emotes)
+
+    def __iter__(self):
+        if self._sorted is None:
+            names = sorted(self._emotes, key=self._order.__getitem__)
+            self._sorted = [self._emotes[name] for name in names]
+        return iter(self._sorted)
+
+    def __contains__(self, name):
+        return name in self._emotes
+
+    def __getitem__(self, name):
+        return self._emotes[name]
+
+    def get(self, name, default=None):
+        return self._emotes.get(name, default)
+
+    def reset(self, emotes):
+        """Replace all emotes (`emoteList` event).
+
+        Parameters
+        ----------
+        emotes : `iterable` of `dict`
+            Emotes with a "name".
+        """
+        self._emotes = {emote["name"]: emote for emote in emotes}
+        self._order = dict(zip(self._emotes, self._sequence))
+        self._sorted = None
+        self.names = PrefixIndex(self._emotes)
+        self._matcher = None
+
+    def update(self, emote):
+        """Add or replace an emote (`updateEmote` event).
+
+        Parameters
+        ----------
+        emote : `dict`
+            Emote with a "name".
+        """
+        name = emote["name"]
+        if name not in self._emotes:
+            self._order[name] = next(self._sequence)
+            self.names.add(name)
+            self._matcher = None
+        self._emotes[name] = emote
+        self._sorted = None
+
+    def rename(self, emote):
+        """Rename an emote (`renameEmote` event).
+
+        Parameters
+        ----------
+        emote : `dict`
+            Emote with the new "name" and the previous name as "old".
+            The emote keeps its position in `emoteList` order.
+        """
+        old = emote.get("old")
+        emote = {key: value for key, value in emote.items() if key != "old"}
+        if old not in self._emotes:
+            self.update(emote)
+            return
+        name = emote["name"]
+        del self._emotes[old]
+        sequence = self._order.pop(old)
+        self._emotes[name] = emote
+        self._order[name] = sequence
+        self._sorted = None
+        self.names.discard(old)
+        self.names.add(name)
+        self._matcher = None
+
+    def remove(self, emote):
+        """Remove an emote (`removeEmote` event). Does nothing if it does not
+        exist.
+
+        Parameters
+        ----------
+        emote : `dict` or `str`
+            Emote or emote name.
+        """
+        name = emote.get("name") if isinstance(emote, dict) else emote
+        if self._emotes.pop(name, None) is not None:
+            del self._order[name]
+            self._sorted = None
+            self.names.discard(name)
+            self._matcher = None
+
+    def find(self, text):
+        """Find emotes in a message.
+
+        Parameters
+        ----------
+        text : `str`
+
+        Returns
+        -------
+        `tuple` of `str`
+            Names of the emotes used, in order of their first use.
+        """
+        if self._matcher is None:
+            self._matcher = Highlighter(
+                self._emotes, ignore_case=False, whole_words=True
+            )
+        return self._matcher.search(text)
 
 
 class Channel:
@@ -20,11 +158,15 @@ class Channel:
     motd: `str`
     css: `str`
     js: `str`
-    emotes: `list` of `dict`
+    emotes: `cytube_bot.channel.EmoteRegistry`
     permissions : `dict` of (`str`, `float`)
     options : `dict`
     userlist : `cytube_bot.user.UserList`
     playlist : `cytube_bot.playlist.Playlist`
+    version : `int`
+        Incremented by the bot event handlers on every change to the
+        channel state. Consumers compare it to a saved value to tell
+        whether anything has changed.
     """
 
     logger = logging.getLogger(__name__)
@@ -40,11 +182,12 @@ class Channel:
         self.motd = ""
         self.css = ""
         self.js = ""
-        self.emotes = []
+        self.emotes = EmoteRegistry()
         self.permissions = {}
         self.options = {}
         self.userlist = UserList()
         self.playlist = Playlist()
+        self.version = 0
 
     def __str__(self):
         return '<channel "%s">' % self.name
@@ -91,3 +234,21 @@ class Channel:
     def has_permission(self, action, user):
         """check_permission(action, user, False)"""
         return self.check_permission(action, user, False)
+
+    def permitted_actions(self, rank):
+        """Actions a user of a rank may perform.
+
+        Parameters
+        ----------
+        rank : `float`
+            User rank.
+
+        Returns
+        -------
+        `frozenset` of `str`
+            Actions `check_permission` allows for the rank.
+        """
+        rank += self.RANK_PRECISION
+        return frozenset(
+            action for action, min_rank in self.permissions.items() if rank >= min_rank
+        )
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import collections
+import logging
+import re
+import time
+
+
+class ChatFilter:
+    """Drops or collapses chat messages before they are handled.
+
+    A filter for `cytube_bot.bot.Bot.add_filter`, e.g. for `chatMsg` and
+    `pm` events. A message is dropped if it is from an ignored user
+    (case-insensitive) or its raw text matches a pattern. Patterns are
+    compiled into a single regular expression when they can be, e.g. not
+    if one has global inline flags like `(?i)`, and searched one by one
+    otherwise. Invalid patterns are logged and skipped. A message identical to the
+    previous message of the same user within `repeat_window` seconds is
+    collapsed: the event is replaced by `<event>Repeat` (e.g.
+    `chatMsgRepeat`) with the data of the message and `count`, the number
+    of times it was sent.
+
+    Attributes
+    ----------
+    ignore : `tuple` of `str`
+        Ignored user names.
+    patterns : `tuple` of `str`
+        Valid regular expressions.
+    rejected : `dict` of (`str`, `str`)
+        Error by invalid pattern.
+    repeat_window : `None` or `float`
+        `None` or 0 - do not collapse repeated messages.
+    checked : `int`
+        Number of messages checked.
+    hits : `collections.Counter` of (`str`, `int`)
+        Number of messages dropped or collapsed by rule:
+        "user:<name>", "pattern:<pattern>" and "repeat".
+    """
+
+    logger = logging.getLogger(__name__)
+
+    REPEAT_USERS = 1000  # Last messages remembered for repeat detection
+
+    def __init__(self, ignore=(), patterns=(), repeat_window=None):
+        """
+        Parameters
+        ----------
+        ignore : `iterable` of `str`, optional
+        patterns : `iterable` of `str`, optional
+        repeat_window : `None` or `float`, optional
+        """
+        self.ignore = tuple(ignore)
+        self.repeat_window = repeat_window
+        self.checked = 0
+        self.hits = collections.Counter()
+        self.rejected = {}
+        self._ignore = {name.lower(): name for name in self.ignore}
+
+        regexes = []
+        for pattern in dict.fromkeys(patterns):
+            try:
+                regexes.append(re.compile(pattern))
+            except re.error as ex:
+                self.logger.warning('invalid filter pattern "%s": %s', pattern, ex)
+                self.rejected[pattern] = str(ex)
+        self.patterns = tuple(regex.pattern for regex in regexes)
+        self._regexes = regexes
+        self._regex = None
+        # Groups and backreferences are numbered differently in the
+        # combined expression, such patterns are searched one by one
+        if len(regexes) > 1 and not any(regex.groups for regex in regexes):
+            try:
+                self._regex = re.compile(
+                    "|".join(
+                        "(?P<p%d>%s)" % (i, pattern)
+                        for i, pattern in enumerate(self.patterns)
+                    )
+                )
+            except re.error:
+                pass
+        self._last = {}  # (event, user name): (message, time, count)
+
+    def __str__(self):
+        return "<chat filter (%d ignored, %d patterns, %d hits)>" % (
+            len(self.ignore),
+            len(self.patterns),
+            sum(self.hits.values()),
+        )
+
+    __repr__ = __str__
+
+    def _time(self):
+        return time.monotonic()
+
+    def __call__(self, event, data):
+        """Check a message.
+
+        Returns
+        -------
+        `None` or `True` or (`str`, `dict`)
+            `None` - keep, `True` - drop, (event, data) - replacement event.
+        """
+        self.checked += 1
+        username = data.get("username") or ""
+        msg = data.get("msg") or ""
+
+        name = self._ignore.get(username.lower())
+        if name is not None:
+            self.hits["user:" + name] += 1
+            return True
+
+        if self._regex is not None:
+            match = self._regex.search(msg)
+            if match is not None:
+                self.hits["pattern:" + self.patterns[int(match.lastgroup[1:])]] += 1
+                return True
+        elif self._regexes:
+            for regex in self._regexes:
+                if regex.search(msg) is not None:
+                    self.hits["pattern:" + regex.pattern] += 1
+                    return True
+
+        if self.repeat_window:
+            now = self._time()
+            key = (event, username)
+            last = self._last.pop(key, None)
+            if (
+                last is not None
+                and last[0] == msg
+                and now - last[1] <= self.repeat_window
+            ):
+                count = last[2] + 1
+                self._last[key] = (msg, now, count)
+                self.hits["repeat"] += 1
+                return event + "Repeat", dict(data, count=count)
+            # Most recent last, the oldest are forgotten first
+            self._last[key] = (msg, now, 1)
+            if len(self._last) > self.REPEAT_USERS:
+                del self._last[next(iter(self._last))]
+        return None
@@ -0,0 +1,748 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import collections
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+
+class BotDatabase:
+    """Embedded SQLite store for bot statistics, status and outbound messages.
+
+    Implements the methods `cytube_bot.bot.Bot` calls on its database.
+
+    The database runs in WAL mode so readers never wait for the writer.
+    All writes go through a queue to a single writer thread, which drains
+    up to `batch_size` queued operations and applies them in one
+    transaction. Statements are class constants, so the statement cache of
+    each connection reuses their prepared form.
+
+    Write methods return immediately. Methods that return a value wait for
+    the writer. `flush` waits until everything queued so far is committed.
+
+    Maintenance is split into the `MAINTENANCE_STEPS`, which
+    `maintenance_step` runs in bounded chunks so that other writes are
+    applied in between. New databases use incremental auto-vacuum, so
+    free pages are returned to the file system a few at a time instead
+    of by a full `VACUUM`. Older databases are converted by a one-time
+    `VACUUM` in their first "vacuum" step.
+
+    Attributes
+    ----------
+    path : `str`
+        Database file path.
+    batch_size : `int`
+        Maximum number of operations per write transaction.
+    history_days : `int`
+        Days of user count history kept by `perform_maintenance`.
+    chat_history_size : `int`
+        Number of recent chat messages kept by `perform_maintenance`.
+    outbound_days : `int`
+        Days sent or failed outbound messages are kept.
+    retry_delay : `float`
+        Base delay in seconds before a failed outbound message is retried.
+        Doubles with every retry.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS user_stats (
+            username TEXT PRIMARY KEY,
+            first_seen INTEGER NOT NULL,
+            last_seen INTEGER NOT NULL,
+            total_chat_lines INTEGER NOT NULL DEFAULT 0,
+            total_time_connected INTEGER NOT NULL DEFAULT 0,
+            current_session_start INTEGER
+        )""",
+        """CREATE TABLE IF NOT EXISTS user_count_history (
+            id INTEGER PRIMARY KEY,
+            timestamp INTEGER NOT NULL,
+            chat_users INTEGER NOT NULL,
+            connected_users INTEGER NOT NULL
+        )""",
+        """CREATE INDEX IF NOT EXISTS user_count_history_timestamp
+            ON user_count_history (timestamp)""",
+        """CREATE TABLE IF NOT EXISTS high_water_mark (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            max_users INTEGER NOT NULL DEFAULT 0,
+            max_users_timestamp INTEGER,
+            max_connected INTEGER NOT NULL DEFAULT 0,
+            max_connected_timestamp INTEGER
+        )""",
+        "INSERT OR IGNORE INTO high_water_mark (id) VALUES (1)",
+        """CREATE TABLE IF NOT EXISTS recent_chat (
+            id INTEGER PRIMARY KEY,
+            timestamp INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            message TEXT NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS current_status (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            bot_name TEXT,
+            bot_rank REAL,
+            bot_afk INTEGER,
+            channel_name TEXT,
+            current_chat_users INTEGER,
+            current_connected_users INTEGER,
+            playlist_items INTEGER,
+            current_media_title TEXT,
+            current_media_duration INTEGER,
+            bot_start_time INTEGER,
+            bot_connected INTEGER,
+            last_updated INTEGER
+        )""",
+        "INSERT OR IGNORE INTO current_status (id) VALUES (1)",
+        """CREATE TABLE IF NOT EXISTS outbound_messages (
+            id INTEGER PRIMARY KEY,
+            timestamp INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            sent INTEGER NOT NULL DEFAULT 0,
+            sent_timestamp INTEGER,
+            failed INTEGER NOT NULL DEFAULT 0,
+            retry_count INTEGER NOT NULL DEFAULT 0,
+            next_attempt INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT
+        )""",
+        """CREATE INDEX IF NOT EXISTS outbound_messages_pending
+            ON outbound_messages (sent, failed, next_attempt)""",
+    )
+
+    STATUS_COLUMNS = frozenset(
+        (
+            "bot_name",
+            "bot_rank",
+            "bot_afk",
+            "channel_name",
+            "current_chat_users",
+            "current_connected_users",
+            "playlist_items",
+            "current_media_title",
+            "current_media_duration",
+            "bot_start_time",
+            "bot_connected",
+        )
+    )
+
+    THREAD_SAFE = True  # Methods can be called from any thread
+
+    MAINTENANCE_STEPS = ("history", "chat", "outbound", "vacuum", "optimize")
+
+    MAINTENANCE_LOG = {
+        "history": "removed {} history rows",
+        "chat": "removed {} chat rows",
+        "outbound": "removed {} outbound messages",
+        "vacuum": "freed {} pages",
+        "optimize": "analyzed",
+    }
+
+    BATCH_OPS = frozenset(
+        (
+            "user_joined",
+            "user_left",
+            "user_chat_message",
+            "update_high_water_mark",
+            "log_user_count",
+        )
+    )
+
+    USER_JOINED = """
+        INSERT INTO user_stats
+            (username, first_seen, last_seen, current_session_start)
+        VALUES (?1, ?2, ?2, ?2)
+        ON CONFLICT (username) DO UPDATE SET
+            last_seen = excluded.last_seen,
+            current_session_start = excluded.current_session_start
+    """
+    USER_LEFT = """
+        UPDATE user_stats SET
+            total_time_connected =
+                total_time_connected + MAX(?1 - current_session_start, 0),
+            current_session_start = NULL,
+            last_seen = ?1
+        WHERE username = ?2 AND current_session_start IS NOT NULL
+    """
+    USER_CHAT = """
+        INSERT INTO user_stats
+            (username, first_seen, last_seen, total_chat_lines)
+        VALUES (?1, ?2, ?2, 1)
+        ON CONFLICT (username) DO UPDATE SET
+            last_seen = excluded.last_seen,
+            total_chat_lines = total_chat_lines + 1
+    """
+    RECENT_CHAT = (
+        "INSERT INTO recent_chat (timestamp, username, message) VALUES (?, ?, ?)"
+    )
+    HIGH_WATER_USERS = """
+        UPDATE high_water_mark SET max_users = ?1, max_users_timestamp = ?2
+        WHERE id = 1 AND max_users < ?1
+    """
+    HIGH_WATER_CONNECTED = """
+        UPDATE high_water_mark SET max_connected = ?1, max_connected_timestamp = ?2
+        WHERE id = 1 AND max_connected < ?1
+    """
+    LOG_USER_COUNT = """
+        INSERT INTO user_count_history (timestamp, chat_users, connected_users)
+        VALUES (?, ?, ?)
+    """
+    ADD_OUTBOUND = "INSERT INTO outbound_messages (timestamp, message) VALUES (?, ?)"
+    UNSENT_OUTBOUND = """
+        SELECT id, timestamp, message, retry_count, last_error
+        FROM outbound_messages
+        WHERE sent = 0 AND failed = 0 AND retry_count < ? AND next_attempt <= ?
+        ORDER BY id LIMIT ?
+    """
+    OUTBOUND_SENT = """
+        UPDATE outbound_messages SET sent = 1, sent_timestamp = ? WHERE id = ?
+    """
+    OUTBOUND_FAILED_PERMANENT = """
+        UPDATE outbound_messages SET failed = 1, last_error = ? WHERE id = ?
+    """
+    OUTBOUND_FAILED_RETRY = """
+        UPDATE outbound_messages SET
+            retry_count = retry_count + 1,
+            last_error = ?1,
+            next_attempt = ?2 + CAST(?3 * (1 << MIN(retry_count, 16)) AS INTEGER)
+        WHERE id = ?4
+    """
+
+    def __init__(
+        self,
+        path="bot_data.db",
+        batch_size=500,
+        history_days=30,
+        chat_history_size=1000,
+        outbound_days=7,
+        retry_delay=30,
+    ):
+        """
+        Parameters
+        ----------
+        path : `str`, optional
+            Database file path. ':memory:' keeps the database in memory;
+            reads then go through the writer thread.
+        batch_size : `int`, optional
+            Maximum number of operations per write transaction.
+        history_days : `int`, optional
+            Days of user count history to keep.
+        chat_history_size : `int`, optional
+            Number of recent chat messages to keep.
+        outbound_days : `int`, optional
+            Days sent or failed outbound messages are kept.
+        retry_delay : `float`, optional
+            Base outbound retry delay in seconds.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.history_days = history_days
+        self.chat_history_size = chat_history_size
+        self.outbound_days = outbound_days
+        self.retry_delay = retry_delay
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._closed = False
+        self._marking = collections.Counter()  # Uncommitted outbound marks
+        self._marking_lock = threading.Lock()
+
+        self._conn = self._connect()
+        with self._conn:
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+        self._shared = path == ":memory:"
+        self._read_conn = None if self._shared else self._connect()
+
+    def __str__(self):
+        return '<database "%s">' % self.path
+
+    __repr__ = __str__
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=64,
+        )
+        conn.row_factory = sqlite3.Row
+        # Only takes effect on a new database, must precede journal_mode
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    # Writer thread
+
+    def _start_writer(self):
+        with self._writer_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("database is closed")
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._run_writer, name="juiced-db-writer", daemon=True
+                )
+                self._writer.start()
+
+    def _submit(self, ops, wait=False):
+        """Queue operations for the writer thread.
+
+        Parameters
+        ----------
+        ops : `list` of (`function`, `tuple`)
+            Operations. Each function is called with the writer connection
+            followed by its arguments.
+        wait : `bool`, optional
+            `True` to wait for the operations and return the result of
+            the last one.
+        """
+        self._start_writer()
+        future = Future()
+        self._queue.put((ops, future))
+        if wait:
+            return future.result()
+        return future
+
+    def _run_writer(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(item is None for item in batch)
+            batch = [item for item in batch if item is not None]
+            if batch:
+                self._apply(batch)
+            if stop:
+                return
+
+    def _apply(self, batch):
+        conn = self._conn
+        in_transaction = False
+        outcomes = []
+        try:
+            for ops, future in batch:
+                result = None
+                error = None
+                for func, args in ops:
+                    exclusive = getattr(func, "exclusive", False)
+                    if exclusive and in_transaction:
+                        conn.execute("COMMIT")
+                        in_transaction = False
+                    elif not exclusive and not in_transaction:
+                        conn.execute("BEGIN")
+                        in_transaction = True
+                    try:
+                        result = func(conn, *args)
+                    except Exception as ex:
+                        self.logger.error("%s%r: %r", func.__name__, args, ex)
+                        error = ex
+                outcomes.append((future, result, error))
+            if in_transaction:
+                conn.execute("COMMIT")
+        except Exception as ex:  # pylint: disable=broad-except
+            # BEGIN or COMMIT failed (disk full, locked, I/O error). Fail
+            # the whole batch and keep the writer thread running.
+            self.logger.error("write batch of %d failed: %r", len(batch), ex)
+            if conn.in_transaction:
+                try:
+                    conn.execute("ROLLBACK")
+                except Exception as rollback_ex:  # pylint: disable=broad-except
+                    self.logger.error("rollback: %r", rollback_ex)
+            for _, future in batch:
+                future.set_exception(ex)
+            return
+        # Resolve futures only once their writes are visible to readers
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def flush(self):
+        """Wait until all queued writes are committed."""
+        if self._writer is not None:
+            self._submit([], wait=True)
+
+    def close(self):
+        """Commit queued writes, stop the writer thread and close
+        the database.
+        """
+        with self._writer_lock:
+            if self._closed:
+                return
+            self._closed = True
+            writer = self._writer
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+        if self._read_conn is not None:
+            self._read_conn.close()
+        self._conn.close()
+
+    def _read(self, func, *args):
+        if self._shared:
+            return self._submit([(func, args)], wait=True)
+        with self._read_lock:
+            return func(self._read_conn, *args)
+
+    def write_batch(self, calls):
+        """Queue several write calls as one unit.
+
+        Parameters
+        ----------
+        calls : `list` of (`str`, `tuple`)
+            Method names and arguments, e.g. `('user_joined', ('alice',))`.
+        """
+        now = int(time.time())
+        ops = []
+        for name, args in calls:
+            if name not in self.BATCH_OPS:
+                raise ValueError('unknown write operation "%s"' % name)
+            ops.append((getattr(self, "_" + name), (now,) + tuple(args)))
+        return self._submit(ops)
+
+    # Write operations (run on the writer thread)
+
+    def _user_joined(self, conn, now, username):
+        conn.execute(self.USER_JOINED, (username, now))
+
+    def _user_left(self, conn, now, username):
+        conn.execute(self.USER_LEFT, (now, username))
+
+    def _user_chat_message(self, conn, now, username, message):
+        conn.execute(self.USER_CHAT, (username, now))
+        conn.execute(self.RECENT_CHAT, (now, username, message))
+
+    def _update_high_water_mark(self, conn, now, chat_users, connected_users):
+        conn.execute(self.HIGH_WATER_USERS, (chat_users, now))
+        if connected_users is not None:
+            conn.execute(self.HIGH_WATER_CONNECTED, (connected_users, now))
+
+    def _log_user_count(self, conn, now, chat_users, connected_users):
+        conn.execute(self.LOG_USER_COUNT, (now, chat_users, connected_users))
+
+    def _update_current_status(self, conn, now, fields):
+        columns = ", ".join("%s = ?" % name for name in fields)
+        conn.execute(
+            "UPDATE current_status SET %s, last_updated = ? WHERE id = 1" % columns,
+            tuple(fields.values()) + (now,),
+        )
+
+    def _add_outbound_message(self, conn, now, message):
+        return conn.execute(self.ADD_OUTBOUND, (now, message)).lastrowid
+
+    def _mark_outbound_sent(self, conn, now, message_id):
+        conn.execute(self.OUTBOUND_SENT, (now, message_id))
+
+    def _mark_outbound_failed(self, conn, now, message_id, error, is_permanent):
+        if is_permanent:
+            conn.execute(self.OUTBOUND_FAILED_PERMANENT, (error, message_id))
+        else:
+            conn.execute(
+                self.OUTBOUND_FAILED_RETRY, (error, now, self.retry_delay, message_id)
+            )
+
+    def _unsent_outbound_messages(self, conn, now, limit, max_retries):
+        rows = conn.execute(self.UNSENT_OUTBOUND, (max_retries, now, limit))
+        return [dict(row) for row in rows]
+
+    def _maintenance_history(self, conn, now, limit):
+        cur = conn.execute(
+            """DELETE FROM user_count_history WHERE id IN
+                (SELECT id FROM user_count_history
+                    WHERE timestamp < ? ORDER BY id LIMIT ?)""",
+            (now - self.history_days * 86400, limit),
+        )
+        return cur.rowcount
+
+    def _maintenance_chat(self, conn, now, limit):
+        cur = conn.execute(
+            """DELETE FROM recent_chat WHERE id IN
+                (SELECT id FROM recent_chat WHERE id <=
+                    (SELECT id FROM recent_chat ORDER BY id DESC LIMIT 1 OFFSET ?)
+                    ORDER BY id LIMIT ?)""",
+            (self.chat_history_size, limit),
+        )
+        return cur.rowcount
+
+    def _maintenance_outbound(self, conn, now, limit):
+        cur = conn.execute(
+            """DELETE FROM outbound_messages WHERE id IN
+                (SELECT id FROM outbound_messages
+                    WHERE (sent = 1 OR failed = 1) AND timestamp < ?
+                    ORDER BY id LIMIT ?)""",
+            (now - self.outbound_days * 86400, limit),
+        )
+        return cur.rowcount
+
+    def _maintenance_vacuum(self, conn, now, limit):
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # Created without incremental auto-vacuum, only a full VACUUM
+            # frees pages and switches it on
+            self.logger.warning(
+                "converting %s to incremental auto-vacuum (%d free pages)",
+                self.path,
+                free,
+            )
+            conn.executescript("PRAGMA auto_vacuum = INCREMENTAL; VACUUM")
+            return free
+        # executescript steps the pragma to completion
+        conn.executescript("PRAGMA incremental_vacuum(%d)" % max(limit, 0))
+        return free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    _maintenance_vacuum.exclusive = True
+
+    def _maintenance_optimize(self, conn, now, limit):
+        # Approximate statistics, reads at most ~1000 rows per index
+        conn.executescript("PRAGMA analysis_limit = 1000; ANALYZE")
+        return 0
+
+    _maintenance_optimize.exclusive = True
+
+    def _write(self, func, *args, wait=False):
+        return self._submit([(func, (int(time.time()),) + args)], wait=wait)
+
+    # Public API
+
+    def user_joined(self, username):
+        """Record a user joining the channel."""
+        self._write(self._user_joined, username)
+
+    def user_left(self, username):
+        """Record a user leaving the channel."""
+        self._write(self._user_left, username)
+
+    def user_chat_message(self, username, message=""):
+        """Record a chat message."""
+        self._write(self._user_chat_message, username, message)
+
+    def update_high_water_mark(self, chat_users, connected_users=None):
+        """Raise the high water marks if the counts exceed them."""
+        self._write(self._update_high_water_mark, chat_users, connected_users)
+
+    def log_user_count(self, chat_users, connected_users):
+        """Append a user count sample to the history."""
+        self._write(self._log_user_count, chat_users, connected_users)
+
+    def update_current_status(self, **fields):
+        """Update the current status row.
+
+        Only the given fields are written.
+
+        Raises
+        ------
+        ValueError
+            If a field is not a status column.
+        """
+        unknown = set(fields) - self.STATUS_COLUMNS
+        if unknown:
+            raise ValueError("unknown status fields: %s" % ", ".join(sorted(unknown)))
+        if fields:
+            self._write(self._update_current_status, fields)
+
+    def add_outbound_message(self, message):
+        """Queue a chat message to be sent by the bot.
+
+        Returns
+        -------
+        `int`
+            Message ID.
+        """
+        return self._write(self._add_outbound_message, message, wait=True)
+
+    def _mark_outbound(self, func, message_id, *args):
+        with self._marking_lock:
+            self._marking[message_id] += 1
+        try:
+            future = self._write(func, message_id, *args)
+        except Exception:
+            self._unmark_outbound(message_id)
+            raise
+        future.add_done_callback(lambda _: self._unmark_outbound(message_id))
+
+    def _unmark_outbound(self, message_id):
+        with self._marking_lock:
+            self._marking[message_id] -= 1
+            if not self._marking[message_id]:
+                del self._marking[message_id]
+
+    def mark_outbound_sent(self, message_id):
+        self._mark_outbound(self._mark_outbound_sent, message_id)
+
+    def mark_outbound_failed(self, message_id, error, is_permanent=False):
+        """Record a failed send.
+
+        Permanent failures are never retried. Transient failures are
+        retried after `retry_delay * 2 ** retry_count` seconds.
+        """
+        self._mark_outbound(self._mark_outbound_failed, message_id, error, is_permanent)
+
+    def get_unsent_outbound_messages(self, limit=20, max_retries=3):
+        """Get outbound messages that are due to be sent.
+
+        Read without waiting for the writer thread. Messages with a
+        `mark_outbound_*` call that is not committed yet are left out.
+
+        Returns
+        -------
+        `list` of `dict`
+        """
+        with self._marking_lock:
+            marking = set(self._marking)
+        messages = self._read(
+            self._unsent_outbound_messages,
+            int(time.time()),
+            limit + len(marking),
+            max_retries,
+        )
+        return [m for m in messages if m["id"] not in marking][:limit]
+
+    def maintenance_step(self, step, limit=500):
+        """Run one chunk of a maintenance step.
+
+        Parameters
+        ----------
+        step : `str`
+            One of `MAINTENANCE_STEPS`.
+        limit : `None` or `int`, optional
+            Maximum number of rows to delete or pages to free.
+            `None` - no limit.
+
+        Returns
+        -------
+        `int`
+            Number of rows deleted or pages freed. The step is complete
+            when this is less than `limit`.
+
+        Raises
+        ------
+        ValueError
+            If `step` is unknown.
+        """
+        if step not in self.MAINTENANCE_STEPS:
+            raise ValueError('unknown maintenance step "%s"' % step)
+        if limit is None:
+            # No limit for LIMIT and incremental_vacuum
+            limit = -1 if step != "vacuum" else 0
+        func = getattr(self, "_maintenance_" + step)
+        return self._write(func, limit, wait=True)
+
+    def perform_maintenance(self):
+        """Run every maintenance step to completion.
+
+        Each step is a separate writer operation, so queued writes are
+        applied between steps.
+
+        Returns
+        -------
+        `list` of `str`
+            Maintenance log.
+        """
+        return [
+            self.MAINTENANCE_LOG[step].format(self.maintenance_step(step, None))
+            for step in self.MAINTENANCE_STEPS
+        ]
+
+    def get_high_water_mark(self):
+        """Get the highest chat user count seen.
+
+        Returns
+        -------
+        `int`
+        """
+        return self._read(_read_high_water_mark)
+
+    def get_high_water_mark_connected(self):
+        """Get the highest connected user count seen.
+
+        Returns
+        -------
+        `int`
+        """
+        return self._read(_read_high_water_mark_connected)
+
+    def get_current_status(self):
+        """Get the current status row.
+
+        Returns
+        -------
+        `dict`
+        """
+        return self._read(_read_current_status)
+
+    def get_user_count_history(self, hours=24):
+        """Get user count samples from the last `hours` hours.
+
+        Returns
+        -------
+        `list` of `dict`
+        """
+        since = int(time.time()) - int(hours * 3600)
+        return self._read(_read_user_count_history, since)
+
+    def get_recent_chat(self, limit=50):
+        """Get the most recent chat messages, oldest first.
+
+        Returns
+        -------
+        `list` of `dict`
+        """
+        return self._read(_read_recent_chat, limit)
+
+    def get_user_stats(self, username):
+        """Get statistics for a user.
+
+        Returns
+        -------
+        `dict` or `None`
+        """
+        return self._read(_read_user_stats, username)
+
+
+def _read_high_water_mark(conn):
+    row = conn.execute("SELECT max_users FROM high_water_mark WHERE id = 1").fetchone()
+    return row[0]
+
+
+def _read_high_water_mark_connected(conn):
+    row = conn.execute(
+        "SELECT max_connected FROM high_water_mark WHERE id = 1"
+    ).fetchone()
+    return row[0]
+
+
+def _read_current_status(conn):
+    return dict(conn.execute("SELECT * FROM current_status WHERE id = 1").fetchone())
+
+
+def _read_user_count_history(conn, since):
+    rows = conn.execute(
+        """SELECT timestamp, chat_users, connected_users FROM user_count_history
+            WHERE timestamp >= ? ORDER BY timestamp""",
+        (since,),
+    )
+    return [dict(row) for row in rows]
+
+
+def _read_recent_chat(conn, limit):
+    rows = conn.execute(
+        """SELECT timestamp, username, message FROM recent_chat
+            ORDER BY id DESC LIMIT ?""",
+        (limit,),
+    )
+    return [dict(row) for row in reversed(rows.fetchall())]
+
+
+def _read_user_stats(conn, username):
+    row = conn.execute(
+        "SELECT * FROM user_stats WHERE username = ?", (username,)
+    ).fetchone()
+    return None if row is None else dict(row)
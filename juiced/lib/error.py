@@ -28,6 +28,10 @@ class ChannelPermissionError(ChannelError):
     """Exception raised when there is an error in the channel permissions"""
 
 
+class DuplicateMediaError(ChannelError):
+    """Exception raised when media is already in the playlist"""
+
+
 class SocketIOError(Exception):
     """Base class for all exceptions in the socketio package"""
 
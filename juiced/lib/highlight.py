@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import collections
+import re
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+def _fold(text):
+    """Lower case text, keeping every character at its offset."""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    # Some characters lower to more than one (e.g. "İ" -> "i̇")
+    return "".join(ch.lower()[0] for ch in text)
+
+
+class Highlighter:
+    """Finds highlight keywords and patterns in messages.
+
+    Keywords are compiled into an Aho-Corasick automaton, so a message is
+    scanned once whatever the number of keywords. Up to `LINEAR_KEYWORDS`
+    keywords are searched one by one instead, which is faster for a few.
+    Patterns are regular expressions searched one by one.
+
+    Attributes
+    ----------
+    keywords : `tuple` of `str`
+    patterns : `tuple` of `str`
+    ignore_case : `bool`
+    whole_words : `bool`
+        Only match keywords that are not part of a longer word.
+    """
+
+    LINEAR_KEYWORDS = 16
+
+    def __init__(self, keywords=(), patterns=(), ignore_case=True, whole_words=False):
+        """
+        Parameters
+        ----------
+        keywords : `iterable` of `str`, optional
+            Words to find. Empty keywords are ignored.
+        patterns : `iterable` of `str`, optional
+            Regular expressions to find.
+        ignore_case : `bool`, optional
+        whole_words : `bool`, optional
+
+        Raises
+        ------
+        ValueError
+            If a pattern is not a valid regular expression.
+        """
+        self.keywords = tuple(dict.fromkeys(word for word in keywords if word))
+        self.patterns = tuple(dict.fromkeys(patterns))
+        self.ignore_case = ignore_case
+        self.whole_words = whole_words
+        flags = re.IGNORECASE if ignore_case else 0
+        self._regexes = []
+        for pattern in self.patterns:
+            try:
+                self._regexes.append((re.compile(pattern, flags), pattern))
+            except re.error as ex:
+                raise ValueError(
+                    'invalid highlight pattern "%s": %s' % (pattern, ex)
+                ) from ex
+        self._build()
+
+    def __str__(self):
+        return "<highlighter (%d keywords, %d patterns)>" % (
+            len(self.keywords),
+            len(self.patterns),
+        )
+
+    __repr__ = __str__
+
+    def __len__(self):
+        return len(self.keywords) + len(self.patterns)
+
+    def _build(self):
+        self._keys = [
+            _fold(word) if self.ignore_case else word for word in self.keywords
+        ]
+        self._lengths = [len(key) for key in self._keys]
+        if len(self._keys) <= self.LINEAR_KEYWORDS:
+            return
+
+        # Trie transitions, failure links and keyword indices per state
+        goto = [{}]
+        out = [()]
+        for i, word in enumerate(self._keys):
+            state = 0
+            for ch in word:
+                next_state = goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][ch] = next_state
+                    goto.append({})
+                    out.append(())
+                state = next_state
+            out[state] += (i,)
+
+        fail = [0] * len(goto)
+        queue = collections.deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            # The failure state is shallower, its output is complete
+            out[state] += out[fail[state]]
+            for ch, next_state in goto[state].items():
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(ch, 0)
+                queue.append(next_state)
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def search(self, text):
+        """Find the keywords and patterns in a text.
+
+        Parameters
+        ----------
+        text : `str`
+
+        Returns
+        -------
+        `tuple` of `str`
+            Keywords and patterns found, in order of their first match.
+        """
+        found = {}
+        if len(self.keywords) > self.LINEAR_KEYWORDS:
+            self._search_keywords(text, found)
+        elif self.keywords:
+            self._search_linear(text, found)
+        for regex, pattern in self._regexes:
+            match = regex.search(text)
+            if match is not None:
+                found[pattern] = match.start()
+        if not found:
+            return ()
+        return tuple(sorted(found, key=found.get))
+
+    def _is_whole_word(self, text, start, end):
+        return not (
+            (start > 0 and _is_word_char(text[start - 1]))
+            or (end < len(text) and _is_word_char(text[end]))
+        )
+
+    def _search_linear(self, text, found):
+        if self.ignore_case:
+            text = _fold(text)
+        for word, key in zip(self.keywords, self._keys):
+            start = text.find(key)
+            if self.whole_words:
+                while start >= 0 and not self._is_whole_word(
+                    text, start, start + len(key)
+                ):
+                    start = text.find(key, start + 1)
+            if start >= 0:
+                found[word] = start
+
+    def _search_keywords(self, text, found):
+        if self.ignore_case:
+            text = _fold(text)
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        lengths = self._lengths
+        keywords = self.keywords
+        whole_words = self.whole_words
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while True:
+                next_state = goto[state].get(ch)
+                if next_state is not None:
+                    state = next_state
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            if not out[state]:
+                continue
+            for i in out[state]:
+                word = keywords[i]
+                if word in found:
+                    continue
+                start = end - lengths[i]
+                if whole_words and not self._is_whole_word(text, start, end):
+                    continue
+                found[word] = start
@@ -1,14 +1,24 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import functools
 import logging
 import os
 import re
+import string
+import sys
+import weakref
 from urllib.parse import parse_qsl, urlparse
 
+# Host of a URL, with or without a scheme
+_HOST = re.compile(r"(?:[a-zA-Z][\w+.-]*://)?(?:[^/?#@]*@)?([^/?#:]*)")
+
 
 class MediaLink:
     """Media link.
 
+    Links are immutable, hashable and shared: creating a link equal to an
+    existing one returns the existing object.
+
     Attributes
     ----------
     type : `str`
@@ -19,8 +29,16 @@ class MediaLink:
         Supported raw file extensions.
     URL_TO_LINK : `list` of (`str`, `str`, `str`)
         (url regexp, type format string, id format string)
+    URL_HOSTS : `dict` of (`str`, `tuple` of `str`)
+        (url regexp, hosts it matches). Patterns not listed match any host.
     LINK_TO_URL : `dict` of (`str`, `str`)
         (type, url format string)
+
+    Notes
+    -----
+    `from_url` caches its results. `URL_TO_LINK` is compiled on first use
+    and grouped by `URL_HOSTS`: the patterns for the URL host and those
+    for any host are tried first, in table order, then all of them.
     """
 
     logger = logging.getLogger(__name__)
@@ -52,6 +70,31 @@ class MediaLink:
         (r"^([a-z]{2}):([^\?&#]+)", "{0}", "{1}"),
     ]
 
+    URL_HOSTS = {
+        r"youtube\.com/watch\?([^#]+)": ("youtube.com",),
+        r"youtu\.be/([^\?&#]+)": ("youtu.be",),
+        r"youtube\.com/playlist\?([^#]+)": ("youtube.com",),
+        r"clips\.twitch\.tv/([A-Za-z]+)": ("clips.twitch.tv",),
+        r"twitch\.tv/(?:.*?)/([cv])/(\d+)": ("twitch.tv",),
+        r"twitch\.tv/videos/(\d+)": ("twitch.tv",),
+        r"twitch\.tv/([\w-]+)": ("twitch.tv",),
+        r"livestream\.com/([^\?&#]+)": ("livestream.com",),
+        r"ustream\.tv/([^\?&#]+)": ("ustream.tv",),
+        r"(?:hitbox|smashcast)\.tv/([^\?&#]+)": ("hitbox.tv", "smashcast.tv"),
+        r"vimeo\.com/([^\?&#]+)": ("vimeo.com",),
+        r"dailymotion\.com/video/([^\?&#_]+)": ("dailymotion.com",),
+        r"imgur\.com/a/([^\?&#]+)": ("imgur.com",),
+        r"soundcloud\.com/([^\?&#]+)": ("soundcloud.com",),
+        r"(?:docs|drive)\.google\.com/file/d/([a-zA-Z0-9_-]+)": (
+            "docs.google.com",
+            "drive.google.com",
+        ),
+        r"drive\.google\.com/open\?id=([a-zA-Z0-9_-]+)": ("drive.google.com",),
+        r"vid\.me/embedded/([\w-]+)": ("vid.me",),
+        r"vid\.me/([\w-]+)": ("vid.me",),
+        r"streamable\.com/([\w-]+)": ("streamable.com",),
+    }
+
     FILE_TYPES = [".mp4", ".flv", ".webm", ".ogg", ".ogv", ".mp3", ".mov", ".m4a"]
 
     LINK_TO_URL = {
@@ -76,9 +119,33 @@ class MediaLink:
         "rt": "{0}",
     }
 
-    def __init__(self, type_, id_):
-        self.type = type_
-        self.id = id_
+    __slots__ = ("type", "id", "__weakref__")
+
+    _links = weakref.WeakValueDictionary()
+
+    def __new__(cls, type_, id_):
+        key = (cls, type_, id_)
+        link = cls._links.get(key)
+        if link is None:
+            link = super().__new__(cls)
+            object.__setattr__(link, "type", sys.intern(type_))
+            object.__setattr__(link, "id", id_)
+            cls._links[key] = link
+        return link
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MediaLink is immutable")
+
+    __delattr__ = __setattr__
+
+    def __reduce__(self):
+        return self.__class__, (self.type, self.id)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     def __str__(self):
         return "%s:%s" % (self.type, self.id)
@@ -93,6 +160,9 @@ class MediaLink:
             and self.id == link.id
         )
 
+    def __hash__(self):
+        return hash((self.type, self.id))
+
     @property
     def url(self):
         """Media URL."""
@@ -104,39 +174,63 @@ class MediaLink:
         return url.format(self.id)
 
     @classmethod
-    def from_url(cls, url):
-        """Create a media link from URL.
-
-        Parameters
-        ----------
-        url : `str`
-            Media URL.
-
-        Returns
-        -------
-        MediaLink
-
-        Raises
-        ------
-        ValueError
-            If media URL is not supported.
+    def _url_patterns(cls):
+        """Compiled `URL_TO_LINK` by host: {host: (patterns for the host
+        or any host, other patterns)}, the `None` host for URLs with other
+        hosts. Patterns are [(regexp, type format, id format, uses query)]
+        in table order.
         """
-        url = url.strip().replace("feature=player_embedded&", "")
-        parsed_url = urlparse(url)
+        patterns = cls.__dict__.get("_compiled_url_patterns")
+        if patterns is None:
+            formatter = string.Formatter()
+            entries = []
+            for expr, type_, id_ in cls.URL_TO_LINK:
+                fields = {
+                    field
+                    for fmt in (type_, id_)
+                    for _, field, _, _ in formatter.parse(fmt)
+                    if field and not field.isdigit()
+                }
+                pattern = (re.compile(expr), type_, id_, bool(fields - {"url"}))
+                entries.append((pattern, cls.URL_HOSTS.get(expr)))
+            patterns = {}
+            for host in (None, *set().union(*cls.URL_HOSTS.values())):
+                patterns[host] = ([], [])
+                for pattern, pattern_hosts in entries:
+                    first = pattern_hosts is None or host in pattern_hosts
+                    patterns[host][not first].append(pattern)
+            cls._compiled_url_patterns = patterns
+        return patterns
 
-        if parsed_url.scheme == "rtmp":
+    @classmethod
+    @functools.lru_cache(maxsize=4096)
+    def _resolve_url(cls, url):
+        """Media link of a stripped URL."""
+        # The URL is only parsed when the query or path is needed
+        scheme = url.partition(":")[0].lower()
+
+        if scheme == "rtmp":
             return cls("rt", url)
 
-        for expr, type_, id_ in cls.URL_TO_LINK:
-            match = re.search(expr, url)
-            if match is not None:
-                args = match.groups()
-                kwargs = dict(parse_qsl(parsed_url.query))
-                kwargs["url"] = url
-                return cls(type_.format(*args, **kwargs), id_.format(*args, **kwargs))
+        hosts = cls._url_patterns()
+        host = _HOST.match(url).group(1).lower()
+        # www.youtube.com -> youtube.com -> com
+        while host and host not in hosts:
+            host = host.partition(".")[2]
+
+        for patterns in hosts[host or None]:
+            for expr, type_, id_, query in patterns:
+                match = expr.search(url)
+                if match is not None:
+                    args = match.groups()
+                    kwargs = dict(parse_qsl(urlparse(url).query)) if query else {}
+                    kwargs["url"] = url
+                    return cls(
+                        type_.format(*args, **kwargs), id_.format(*args, **kwargs)
+                    )
 
-        if parsed_url.scheme == "https":
-            _, ext = os.path.splitext(parsed_url.path)
+        if scheme == "https":
+            _, ext = os.path.splitext(urlparse(url).path)
             if ext == ".json":
                 return cls("cm", url)
             if ext in cls.FILE_TYPES:
@@ -152,3 +246,24 @@ class MediaLink:
         raise ValueError(
             'Raw files must begin with "https".' " Plain http is not supported."
         )
+
+    @classmethod
+    def from_url(cls, url):
+        """Create a media link from URL.
+
+        Parameters
+        ----------
+        url : `str`
+            Media URL.
+
+        Returns
+        -------
+        MediaLink
+
+        Raises
+        ------
+        ValueError
+            If media URL is not supported.
+        """
+        url = url.strip().replace("feature=player_embedded&", "")
+        return cls._resolve_url(url)
@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import bisect
+import sys
+
 from .media_link import MediaLink
 
 
+def _intern(string):
+    return sys.intern(string) if isinstance(string, str) else string
+
+
 class PlaylistItem:
     """CyTube playlist item.
 
@@ -10,6 +17,10 @@ class PlaylistItem:
     ----------
     link : `cytube_bot.media_link.MediaLink`
         Media link.
+    type : `str`
+        Media link type.
+    id : `str`
+        Media link ID.
     uid : `int`
         Playlist item ID.
     temp : `bool`
@@ -20,18 +31,31 @@ class PlaylistItem:
     username : `str`
     """
 
+    __slots__ = ("uid", "temp", "username", "type", "id", "title", "duration")
+
     def __init__(self, data):
         self.uid = data["uid"]
         self.temp = data["temp"]
-        self.username = data["queueby"]
+        self.username = _intern(data["queueby"])
         data = data["media"]
-        self.link = MediaLink(data["type"], data["id"])
+        self.type = _intern(data["type"])
+        self.id = data["id"]
         self.title = data["title"]
         self.duration = data["seconds"]
 
     def __str__(self):
         return '<playlist item #%s "%s">' % (self.uid, self.title)
 
+    @property
+    def link(self):
+        # Links are shared, an item only keeps the fields of its link
+        return MediaLink(self.type, self.id)
+
+    @link.setter
+    def link(self, link):
+        self.type = link.type
+        self.id = link.id
+
     __repr__ = __str__
 
     def __eq__(self, item):
@@ -40,9 +64,125 @@ class PlaylistItem:
         return self.uid == item.uid
 
 
+class _Node:
+    """Playlist node. Holds a `PlaylistItem`, or until it is first
+    accessed, the fields needed to build one.
+    """
+
+    __slots__ = ("uid", "row", "_item", "prev", "next")
+
+    def __init__(self, uid, item=None, row=None):
+        self.uid = uid
+        self.row = row  # (temp, queueby, type, id, title, seconds)
+        self._item = item
+        self.prev = None
+        self.next = None
+
+    @property
+    def item(self):
+        if self._item is None:
+            temp, queueby, type_, id_, title, seconds = self.row
+            self._item = PlaylistItem(
+                {
+                    "uid": self.uid,
+                    "temp": temp,
+                    "queueby": queueby,
+                    "media": {
+                        "type": type_,
+                        "id": id_,
+                        "title": title,
+                        "seconds": seconds,
+                    },
+                }
+            )
+            self.row = None
+        return self._item
+
+    def values(self):
+        """(temp, queueby, type, id, title, seconds)"""
+        if self._item is None:
+            return self.row
+        item = self._item
+        return (
+            item.temp,
+            item.username,
+            item.type,
+            item.id,
+            item.title,
+            item.duration,
+        )
+
+    def fields(self):
+        """(duration, temp, username, media id) without building the item."""
+        if self._item is None:
+            row = self.row
+            return row[5], row[0], row[1], row[3]
+        item = self._item
+        return (
+            getattr(item, "duration", 0),
+            getattr(item, "temp", False),
+            getattr(item, "username", None),
+            getattr(item, "id", None),
+        )
+
+    @classmethod
+    def from_data(cls, data):
+        media = data["media"]
+        row = (
+            data["temp"],
+            _intern(data["queueby"]),
+            _intern(media["type"]),
+            media["id"],
+            media["title"],
+            media["seconds"],
+        )
+        return cls(data["uid"], row=row)
+
+
+def _uid(item):
+    return getattr(item, "uid", item)
+
+
+def _increasing(positions):
+    """Indexes of a longest increasing subsequence of `positions`."""
+    tails = []  # Smallest tail of an increasing subsequence of each length
+    indexes = []  # Index of each tail
+    previous = [None] * len(positions)
+    for index, position in enumerate(positions):
+        length = bisect.bisect_left(tails, position)
+        if length:
+            previous[index] = indexes[length - 1]
+        if length == len(tails):
+            tails.append(position)
+            indexes.append(index)
+        else:
+            tails[length] = position
+            indexes[length] = index
+    ret = set()
+    index = indexes[-1] if indexes else None
+    while index is not None:
+        ret.add(index)
+        index = previous[index]
+    return ret
+
+
 class Playlist:
     """CyTube playlist.
 
+    Items are kept in a doubly linked list indexed by ID, so looking up,
+    adding, removing and moving an item by ID take constant time however
+    long the playlist is.
+
+    Totals (`total_duration`, `temp_count`, `user_counts`) are updated by
+    every change. Positions (`index`, `current_index`, `time_until`,
+    `remaining_time`) come from an index that is rebuilt on the first
+    position query after a change and is then constant time.
+
+    In lazy mode, items added as data are stored as a tuple of the fields
+    a `PlaylistItem` needs, and the item is built the first time it is
+    accessed. Lookups by ID, totals and positions do not build items, so
+    a large `playlist` snapshot costs little until it is used.
+
     Attributes
     ----------
     time : `int`
@@ -55,22 +195,62 @@ class Playlist:
         `True` if playlist is locked.
     paused : `bool`
         `True` if playlist is paused.
+    lazy : `bool`
+        `True` to build items from data only when they are accessed.
     queue : `list` of `cytube_bot.playlist.PlaylistItem`
+        Items in playlist order. The list is built on first access after
+        a change and must not be modified; assign a new list to replace
+        the playlist contents.
+    total_duration : `int`
+        Sum of item durations in seconds.
+    temp_count : `int`
+        Number of temporary items.
+    user_counts : `dict` of (`str`, `int`)
+        Number of items added by each user. Must not be modified.
     """
 
-    def __init__(self):
+    def __init__(self, lazy=True):
         self.time = 0
         self.locked = False
         self.paused = True
         self.current_time = 0
+        self.lazy = lazy
         self._current = None
-        self.queue = []
+        self._reset()
 
     def __str__(self):
         return "<playlist %s>" % self.queue
 
     __repr__ = __str__
 
+    def __len__(self):
+        return len(self._nodes)
+
+    def __bool__(self):
+        # An empty playlist is still a playlist
+        return True
+
+    def __iter__(self):
+        node = self._head
+        while node is not None:
+            yield node.item
+            node = node.next
+
+    def __contains__(self, item):
+        return _uid(item) in self._nodes
+
+    @property
+    def queue(self):
+        if self._queue is None:
+            self._queue = list(self)
+        return self._queue
+
+    @queue.setter
+    def queue(self, items):
+        self._reset()
+        for item in items:
+            self._link(_Node(item.uid, item=item), self._tail)
+
     @property
     def current(self):
         return self._current
@@ -81,6 +261,162 @@ class Playlist:
             current = self.get(current)
         self._current = current
 
+    @property
+    def permanent_count(self):
+        """Number of permanent items."""
+        return len(self._nodes) - self.temp_count
+
+    @property
+    def current_index(self):
+        """Index of the current item, `None` if there is none."""
+        if self._current is None or _uid(self._current) not in self._nodes:
+            return None
+        return self.index(self._current)
+
+    @property
+    def remaining_time(self):
+        """Seconds until the end of the playlist, counting from
+        `current_time` in the current item.
+        """
+        start = self._current_start()
+        if start is None:
+            return self.total_duration
+        return max(self.total_duration - start, 0)
+
+    def time_until(self, item):
+        """Seconds until an item starts playing.
+
+        Counts from `current_time` in the current item, through the end of
+        the playlist and around from the beginning if the item is before
+        the current one.
+
+        Parameters
+        ----------
+        item : `int` or `cytube_bot.playlist.PlaylistItem`
+            Playlist item or ID.
+
+        Returns
+        -------
+        `float`
+
+        Raises
+        ------
+        ValueError
+            If item does not exist.
+        """
+        start = self._start(item)
+        now = self._current_start()
+        if now is None:
+            return start
+        if start < now - self.current_time:
+            return self.total_duration - now + start
+        return max(start - now, 0)
+
+    def _reset(self):
+        self._nodes = {}
+        self._head = self._tail = None
+        self._queue = []
+        self._positions = {}  # uid -> (index, start time), None if stale
+        self.total_duration = 0
+        self.temp_count = 0
+        self.user_counts = {}
+        self._links = {}  # media id -> uid, or list of uids if several
+
+    def _count(self, node, sign):
+        duration, temp, username, media_id = node.fields()
+        self.total_duration += sign * (duration or 0)
+        uids = self._links.get(media_id)
+        if sign > 0:
+            if uids is None:
+                self._links[media_id] = node.uid
+            elif isinstance(uids, list):
+                uids.append(node.uid)
+            else:
+                self._links[media_id] = [uids, node.uid]
+        elif not isinstance(uids, list):
+            del self._links[media_id]
+        else:
+            uids.remove(node.uid)
+            if len(uids) == 1:
+                self._links[media_id] = uids[0]
+        if temp:
+            self.temp_count += sign
+        count = self.user_counts.get(username, 0) + sign
+        if count:
+            self.user_counts[username] = count
+        else:
+            self.user_counts.pop(username, None)
+
+    def _position(self, item):
+        node = self._node(item)
+        if self._positions is None:
+            positions = {}
+            start = 0
+            index = 0
+            other = self._head
+            while other is not None:
+                positions[other.uid] = (index, start)
+                start += other.fields()[0] or 0
+                index += 1
+                other = other.next
+            self._positions = positions
+        return self._positions[node.uid]
+
+    def _start(self, item):
+        return self._position(item)[1]
+
+    def _current_start(self):
+        """Playback position in the playlist in seconds."""
+        if self._current is None or _uid(self._current) not in self._nodes:
+            return None
+        return self._start(self._current) + self.current_time
+
+    def _node(self, item):
+        try:
+            return self._nodes[_uid(item)]
+        except (KeyError, TypeError):
+            raise ValueError("%r is not in playlist" % (item,)) from None
+
+    def _new_node(self, item):
+        if isinstance(item, PlaylistItem):
+            return _Node(item.uid, item=item)
+        if self.lazy:
+            return _Node.from_data(item)
+        item = PlaylistItem(item)
+        return _Node(item.uid, item=item)
+
+    def _link(self, node, after):
+        """Link `node` after node `after` (`None` - first)."""
+        node.prev = after
+        if after is None:
+            node.next = self._head
+            self._head = node
+        else:
+            node.next = after.next
+            after.next = node
+        if node.next is None:
+            self._tail = node
+        else:
+            node.next.prev = node
+        self._nodes[node.uid] = node
+        self._count(node, 1)
+        self._queue = None
+        self._positions = None
+
+    def _unlink(self, node):
+        if node.prev is None:
+            self._head = node.next
+        else:
+            node.prev.next = node.next
+        if node.next is None:
+            self._tail = node.prev
+        else:
+            node.next.prev = node.prev
+        del self._nodes[node.uid]
+        self._count(node, -1)
+        self._queue = None
+        self._positions = None
+
     def index(self, item):
         """Get playlist item index by ID.
 
@@ -98,7 +434,31 @@ class Playlist:
         ValueError
             If item does not exist.
         """
-        return self.queue.index(item)
+        return self._position(item)[0]
+
+    def find(self, link):
+        """Get playlist items with a media link.
+
+        Parameters
+        ----------
+        link : `cytube_bot.media_link.MediaLink`
+            Media link.
+
+        Returns
+        -------
+        `list` of `cytube_bot.playlist.PlaylistItem`
+            Items in the order they were added.
+        """
+        uids = self._links.get(link.id)
+        if uids is None:
+            return []
+        if not isinstance(uids, list):
+            uids = [uids]
+        return [
+            self._nodes[uid].item
+            for uid in uids
+            if self._nodes[uid].values()[2] == link.type
+        ]
 
     def get(self, uid):
         """Get playlist item by ID.
@@ -117,7 +477,7 @@ class Playlist:
         ValueError
             If item does not exist.
         """
-        return self.queue[self.index(uid)]
+        return self._node(uid).item
 
     def remove(self, item):
         """Remove playlist item.
@@ -132,40 +492,153 @@ class Playlist:
         ValueError
             If item does not exist.
         """
-        if self.current == item:
+        node = self._node(item)
+        if self._current is not None and _uid(self._current) == node.uid:
             self.current = None
             self.current_time = 0
             self.paused = True
-        self.queue.remove(item)
+        self._unlink(node)
 
     def add(self, after, item):
         """Add playlist item.
 
+        An existing item with the same ID is replaced.
+
         Parameters
         ----------
-        after : `int` or `None`
-            `int` - insert after item with ID, `None` - append.
+        after : `int` or `str` or `None`
+            `int` - insert after item with ID, 'prepend' - insert at the
+            beginning, `None` - append.
         item : `dict` or `cytube_bot.playlist.PlaylistItem`
             Playlist item or data.
+
+        Raises
+        ------
+        ValueError
+            If `after` does not exist.
         """
-        if not isinstance(item, PlaylistItem):
-            item = PlaylistItem(item)
-        if not isinstance(after, int):
-            self.queue.append(item)
+        node = self._new_node(item)
+        if after == "prepend":
+            after = None
+        elif not isinstance(after, int):
+            after = self._tail
         else:
-            self.queue.insert(self.index(after) + 1, item)
+            after = self._node(after)
+        old = self._nodes.get(node.uid)
+        if old is not None:
+            if old is after:
+                after = old.prev
+            self._unlink(old)
+        self._link(node, after)
 
     def move(self, item, after):
         """Move playlist item.
 
         Parameters
         ----------
-        after : `int`
+        after : `int` or 'prepend'
         item : `int`
+
+        Raises
+        ------
+        ValueError
+            If an item does not exist.
+        """
+        node = self._node(item)
+        if after == "prepend":
+            target = None
+        else:
+            target = self._node(after)
+            if target is node:
+                raise ValueError("cannot move %r after itself" % (item,))
+        self._unlink(node)
+        self._link(node, target)
+
+    def set_temp(self, item, temp):
+        """Make a playlist item temporary or permanent.
+
+        Parameters
+        ----------
+        item : `int` or `cytube_bot.playlist.PlaylistItem`
+            Playlist item or ID.
+        temp : `bool`
+
+        Raises
+        ------
+        ValueError
+            If item does not exist.
+        """
+        item = self._node(item).item
+        if bool(item.temp) != bool(temp):
+            self.temp_count += 1 if temp else -1
+        item.temp = temp
+
+    def reconcile(self, items):
+        """Update the playlist to match a full playlist.
+
+        Items that did not change are kept as they are, including the
+        current item. The playlist is brought in order with as few moves
+        as possible.
+
+        Parameters
+        ----------
+        items : `list` of `dict`
+            Playlist item data in playlist order.
+
+        Returns
+        -------
+        `list` of (`str`, `dict`)
+            Changes as (event, data) in the format of the server events
+            `delete`, `setTemp`, `queue` and `moveVideo`, in the order
+            they were applied.
         """
-        item = self.get(item)
-        self.remove(item)
-        self.add(after, item)
+        changes = []
+        new = [self._new_node(data) for data in items]
+        uids = {node.uid for node in new}
+        for uid in [uid for uid in self._nodes if uid not in uids]:
+            self.remove(uid)
+            changes.append(("delete", {"uid": uid}))
+
+        # Replace items whose media changed, keep the others
+        keep = []
+        for index, node in enumerate(new):
+            old = self._nodes.get(node.uid)
+            if old is None:
+                continue
+            values = old.values()
+            temp, *media = node.values()
+            if values[1:] != tuple(media):
+                self.remove(old)
+                changes.append(("delete", {"uid": node.uid}))
+                continue
+            if bool(values[0]) != bool(temp):
+                self.set_temp(node.uid, temp)
+                changes.append(("setTemp", {"uid": node.uid, "temp": temp}))
+            new[index] = old
+            keep.append(index)
+
+        positions = {}
+        index = 0
+        node = self._head
+        while node is not None:
+            positions[node.uid] = index
+            index += 1
+            node = node.next
+        stay = _increasing([positions[new[i].uid] for i in keep])
+        stay = {keep[i] for i in stay}
+
+        after = None
+        for index, node in enumerate(new):
+            target = "prepend" if after is None else after.uid
+            if node.uid not in self._nodes:
+                self._link(node, after)
+                changes.append(("queue", {"item": items[index], "after": target}))
+            elif index not in stay:
+                self._unlink(node)
+                self._link(node, after)
+                changes.append(("moveVideo", {"from": node.uid, "after": target}))
+            after = node
+        return changes
 
     def clear(self):
         """Clear playlist."""
@@ -173,4 +646,4 @@ class Playlist:
         self.paused = True
         self.current = None
         self.current_time = 0
-        self.queue.clear()
+        self._reset()
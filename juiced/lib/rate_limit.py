@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+
+
+class TokenBucket:
+    """Token bucket rate limiter for outgoing messages.
+
+    Holds up to `burst` tokens and refills at `rate` tokens per second.
+    `acquire` takes one token, waiting for it if the bucket is empty.
+    Waiters are served in FIFO order, so a burst of messages is queued
+    and sent at the sustained rate instead of failing.
+
+    Attributes
+    ----------
+    rate : `None` or `float`
+        Tokens per second. `None` - no limit.
+    burst : `int`
+        Bucket size.
+    queued : `int`
+        Number of callers currently waiting.
+    max_queued : `int`
+        Largest number of waiting callers seen.
+    acquired : `int`
+        Number of tokens taken.
+    total_wait : `float`
+        Total time in seconds callers waited.
+    max_wait : `float`
+        Longest wait in seconds.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, rate=None, burst=1):
+        """
+        Parameters
+        ----------
+        rate : `None` or `float`, optional
+            Tokens per second. `None` - no limit.
+        burst : `int`, optional
+            Bucket size.
+        """
+        self.rate = None
+        self.burst = 1
+        self.queued = 0
+        self.max_queued = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._tokens = 0.0
+        self._updated = None
+        self._lock = None
+        self.configure(rate, burst)
+
+    def __str__(self):
+        if self.rate is None:
+            return "<token bucket (unlimited)>"
+        return "<token bucket %g/s burst %d (%d queued)>" % (
+            self.rate,
+            self.burst,
+            self.queued,
+        )
+
+    __repr__ = __str__
+
+    @property
+    def average_wait(self):
+        """Average wait in seconds."""
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+    @property
+    def tokens(self):
+        """Tokens currently available."""
+        self._refill()
+        return self._tokens
+
+    def configure(self, rate, burst=1):
+        """Change the rate and bucket size.
+
+        Available tokens are kept, up to the new bucket size, so a
+        `drain` is not undone. The bucket starts full when it had no limit.
+
+        Parameters
+        ----------
+        rate : `None` or `float`
+            Tokens per second. `None` or <= 0 - no limit.
+        burst : `int`, optional
+            Bucket size.
+        """
+        if rate is not None and rate <= 0:
+            rate = None
+        burst = max(int(burst), 1)
+        if self.rate is None:
+            self._tokens = float(burst)
+            self._updated = None
+        else:
+            # Tokens earned at the old rate
+            self._refill()
+            self._tokens = min(self._tokens, burst)
+        self.rate = rate
+        self.burst = burst
+
+    def drain(self):
+        """Empty the bucket, e.g. after the server reported flooding."""
+        self._refill()
+        self._tokens = 0.0
+
+    def _time(self):
+        return asyncio.get_running_loop().time()
+
+    def _refill(self):
+        if self.rate is None:
+            return
+        try:
+            now = self._time()
+        except RuntimeError:
+            return
+        if self._updated is not None:
+            self._tokens = min(
+                self._tokens + (now - self._updated) * self.rate, self.burst
+            )
+        self._updated = now
+
+    async def acquire(self):
+        """Take a token, waiting until one is available.
+
+        Returns
+        -------
+        `float`
+            Time waited in seconds.
+        """
+        if self.rate is None and not self.queued:
+            self.acquired += 1
+            return 0.0
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        start = self._time()
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            async with self._lock:
+                while True:
+                    self._refill()
+                    if self.rate is None or self._tokens >= 1:
+                        break
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+                if self.rate is not None:
+                    self._tokens -= 1
+        finally:
+            self.queued -= 1
+        wait = self._time() - start
+        self.acquired += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        if wait > 0.5:
+            self.logger.debug("waited %.3fs for a token", wait)
+        return wait
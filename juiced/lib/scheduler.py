@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+
+
+class Job:
+    """Periodic job.
+
+    Attributes
+    ----------
+    name : `str`
+        Job name.
+    func : `function` ()
+        Function or coroutine function to run.
+    interval : `float`
+        Delay in seconds between the start of two runs.
+    jitter : `float`
+        Maximum random delay in seconds added to every interval.
+    next_run : `float`
+        Loop time of the next run.
+    task : `None` or `asyncio.Task`
+        Current or last run.
+    runs : `int`
+        Number of completed runs.
+    failures : `int`
+        Number of runs that raised an exception.
+    skipped : `int`
+        Number of runs skipped because the previous run was still running.
+    last_duration : `float`
+        Duration of the last run in seconds.
+    max_duration : `float`
+        Longest run in seconds.
+    total_duration : `float`
+        Total run time in seconds.
+    last_error : `None` or `Exception`
+        Exception raised by the last failed run.
+    """
+
+    def __init__(self, name, func, interval, jitter=0):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.next_run = 0
+        self.task = None
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.last_error = None
+
+    def __str__(self):
+        return "<job %s every %gs>" % (self.name, self.interval)
+
+    __repr__ = __str__
+
+    @property
+    def running(self):
+        """`True` if a run is in progress."""
+        return self.task is not None and not self.task.done()
+
+    @property
+    def average_duration(self):
+        """Average run time in seconds."""
+        return self.total_duration / self.runs if self.runs else 0.0
+
+    def next_delay(self):
+        """Delay in seconds until the next run."""
+        if self.jitter > 0:
+            return self.interval + random.uniform(0, self.jitter)
+        return self.interval
+
+
+class Scheduler:
+    """Runs periodic jobs from a single task.
+
+    Jobs are kept in a heap ordered by their next run time. The scheduler
+    task sleeps until the earliest one is due, starts every due job in its
+    own task, and reschedules it. A job is never run twice at the same
+    time: if its previous run is still in progress, the run is skipped.
+
+    Attributes
+    ----------
+    jobs : `dict` of (`str`, `cytube_bot.scheduler.Job`)
+        Jobs by name.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self):
+        self.jobs = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._task = None
+        self._wakeup = None
+
+    def __str__(self):
+        return "<scheduler (%d jobs)>" % len(self.jobs)
+
+    __repr__ = __str__
+
+    @property
+    def running(self):
+        """`True` if the scheduler task is running."""
+        return self._task is not None and not self._task.done()
+
+    def add(self, name, func, interval, delay=None, jitter=0):
+        """Add a periodic job.
+
+        Jobs can be added before or after `start`.
+
+        Parameters
+        ----------
+        name : `str`
+            Unique job name.
+        func : `function` ()
+            Function or coroutine function to run.
+        interval : `float`
+            Delay in seconds between the start of two runs.
+        delay : `None` or `float`, optional
+            Delay in seconds before the first run.
+            `None` - one interval (plus jitter).
+        jitter : `float`, optional
+            Maximum random delay in seconds added to every interval.
+
+        Returns
+        -------
+        `cytube_bot.scheduler.Job`
+
+        Raises
+        ------
+        ValueError
+            If a job with this name exists or `interval` is not positive.
+        """
+        if name in self.jobs:
+            raise ValueError('job "%s" already exists' % name)
+        if interval <= 0:
+            raise ValueError("job interval must be positive")
+        job = Job(name, func, interval, jitter)
+        self.jobs[name] = job
+        if delay is None:
+            delay = job.next_delay()
+        if self._wakeup is not None:
+            self._schedule(job, self._time() + delay)
+            self._wakeup.set()
+        else:
+            # Scheduled relative to the start of the scheduler
+            job.next_run = delay
+        return job
+
+    def remove(self, name):
+        """Remove a job. A run in progress is not cancelled.
+
+        Returns
+        -------
+        `cytube_bot.scheduler.Job`
+
+        Raises
+        ------
+        KeyError
+            If there is no such job.
+        """
+        return self.jobs.pop(name)
+
+    def start(self):
+        """Start the scheduler task. Does nothing if it is running."""
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._heap = []
+        now = self._time()
+        for job in self.jobs.values():
+            self._schedule(job, now + job.next_run)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the scheduler and cancel running jobs.
+
+        Running jobs are cancelled together and awaited in parallel.
+        """
+        tasks = [job.task for job in self.jobs.values() if job.running]
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._wakeup = None
+        # Restarting runs every job one interval after the new start
+        for job in self.jobs.values():
+            job.next_run = job.next_delay()
+
+    def _time(self):
+        return asyncio.get_running_loop().time()
+
+    def _schedule(self, job, when):
+        job.next_run = when
+        heapq.heappush(self._heap, (when, next(self._counter), job))
+
+    async def _run(self):
+        while True:
+            now = self._time()
+            while self._heap and self._heap[0][0] <= now:
+                when, _, job = heapq.heappop(self._heap)
+                if self.jobs.get(job.name) is not job or job.next_run != when:
+                    continue  # Removed
+                if job.running:
+                    job.skipped += 1
+                    self.logger.warning("%s: previous run still running", job.name)
+                else:
+                    job.task = asyncio.create_task(self._call(job))
+                when += job.next_delay()
+                if when <= now:
+                    # Fell behind, do not try to catch up
+                    when = now + job.next_delay()
+                self._schedule(job, when)
+            timeout = self._heap[0][0] - now if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _call(self, job):
+        start = self._time()
+        try:
+            result = job.func()
+            if asyncio.iscoroutine(result):
+                await result
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:  # pylint: disable=broad-except
+            job.failures += 1
+            job.last_error = ex
+            self.logger.error("job %s: %r", job.name, ex)
+        finally:
+            duration = self._time() - start
+            job.runs += 1
+            job.last_duration = duration
+            job.total_duration += duration
+            job.max_duration = max(job.max_duration, duration)
+        self.logger.debug("job %s: %.3fs", job.name, duration)
@@ -18,10 +18,15 @@ from .util import get as default_get
 class SocketIOResponse:
     """socket.io event response.
 
+    Every response waiting for an event matching it is set to the event,
+    but only one `exclusive` response is: concurrent requests that expect
+    one response each, in order, set `exclusive` on their match function.
+
     Attributes
     ----------
     id : `int`
     match : `function`(`str`, `object`)
+    exclusive : `bool`
     future : `asyncio.Future`
     """
 
@@ -32,6 +37,7 @@ class SocketIOResponse:
         self.id = (self.last_id + 1) % self.MAX_ID
         self.__class__.last_id = self.id
         self.match = match
+        self.exclusive = getattr(match, "exclusive", False)
         self.future = asyncio.Future()
 
     def __eq__(self, res):
@@ -240,7 +246,7 @@ class SocketIO:
         data : `object`
             Event data.
         match_response : `function` or `None`, optional
-            Response match function.
+            Response match function. See `SocketIOResponse.exclusive`.
         response_timeout : `float` or `None`, optional
             Response timeout in seconds.
 
@@ -379,11 +385,17 @@ class SocketIO:
                     else:
                         self.logger.debug("event %s %s", event, data)
                         await self.events.put((event, data))
+                        claimed = False
                         for response in self.response:
+                            # Skip responses that are set but not removed yet
+                            if response.future.done():
+                                continue
+                            if response.exclusive and claimed:
+                                continue
                             if response.match(event, data):
                                 self.logger.debug("response %s %s", event, data)
                                 response.set((event, data))
-                                break
+                                claimed = claimed or response.exclusive
                 else:
                     self.logger.warning('unknown event: "%s"', data)
         except asyncio.CancelledError:
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-from .util import uncloak_ip
+import bisect
+import sys
+
+from .util import PrefixIndex, uncloak_ip
 
 
 class User:
@@ -13,7 +16,9 @@ class User:
     password : `None` or `str`
         Password.
     uncloaked_ip : `None` or `list` of `str`
-        Uncloaked IP.
+        Uncloaked IP, computed on first access.
+    uncloaked : `bool`
+        `True` if `uncloaked_ip` is known without computing it.
     rank : `float`
         Rank.
     image : `str`
@@ -28,8 +33,23 @@ class User:
         `True` if user is shadow muted.
     """
 
+    __slots__ = (
+        "name",
+        "password",
+        "rank",
+        "image",
+        "text",
+        "afk",
+        "muted",
+        "smuted",
+        "aliases",
+        "uncloaked",
+        "_ip",
+        "_uncloaked_ip",
+    )
+
     def __init__(self, name="", password=None, rank=-1, profile=None, meta=None):
-        self.name = name
+        self.name = sys.intern(name)
         self.password = password
         self.rank = rank
         self.image = ""
@@ -38,17 +58,20 @@ class User:
         self.muted = False
         self.smuted = False
         self._ip = None
-        self.uncloaked_ip = None
+        self._uncloaked_ip = None
+        self.uncloaked = True
         self.aliases = []
         self.update(profile=profile, meta=meta)
 
     def __str__(self):
         if self.ip is None:
             return '<user "%s" (rank %.2f)>' % (self.name, self.rank)
+        if not self.uncloaked:
+            return '<user "%s" [%s] (rank %.2f)>' % (self.name, self.ip, self.rank)
         return '<user "%s" [%s %s] (rank %.2f)>' % (
             self.name,
             self.ip,
-            self.uncloaked_ip,
+            self._uncloaked_ip,
             self.rank,
         )
 
@@ -68,11 +91,22 @@ class User:
 
     @ip.setter
     def ip(self, ip):
+        if ip == self._ip:
+            return
         self._ip = ip
-        if ip is None:
-            self.uncloaked_ip = None
-        else:
-            self.uncloaked_ip = uncloak_ip(ip)
+        self._uncloaked_ip = None
+        self.uncloaked = ip is None
+
+    @property
+    def uncloaked_ip(self):
+        if not self.uncloaked:
+            self.uncloaked_ip = uncloak_ip(self._ip)
+        return self._uncloaked_ip
+
+    @uncloaked_ip.setter
+    def uncloaked_ip(self, uncloaked_ip):
+        self._uncloaked_ip = uncloaked_ip
+        self.uncloaked = True
 
     @property
     def profile(self):
@@ -114,30 +148,60 @@ class User:
         rank: `float` or `None`
         profile : `dict` or `None`
         meta : `dict` or `None`
+
+        Returns
+        -------
+        `bool`
+            `True` if anything changed.
         """
+        old = (self.name, self.rank, self.profile, self.meta)
         if name is not None:
-            self.name = name
+            self.name = sys.intern(name)
         if rank is not None:
             self.rank = rank
         if profile is not None:
             self.profile = profile
         if meta is not None:
             self.meta = meta
+        return (self.name, self.rank, self.profile, self.meta) != old
 
 
 class UserList(dict):
     """CyTube user list.
 
+    Keeps indexes of its users up to date as they are added, removed, or
+    changed through `set_rank`, `set_afk`, `set_meta` and `update_user`.
+    Users changed directly must be re-indexed with `refresh`.
+
     Attributes
     ----------
     count : `int`
     leader : `cytube_bot.user.User` or `None`
+    ranks : `dict` of (`float`, `set` of `str`)
+        User names by rank. Read-only.
+    afk : `set` of `str`
+        Names of AFK users. Read-only.
+    muted : `set` of `str`
+        Names of muted users. Read-only.
+    smuted : `set` of `str`
+        Names of shadow muted users. Read-only.
+    names : `cytube_bot.util.PrefixIndex`
+        User names, for completion. Read-only.
     """
 
+    MOD_RANK = 2  # Moderators and above are listed first in `ordered`
+
     def __init__(self):
         super().__init__(self)
         self.count = 0
         self._leader = None
+        self.ranks = {}
+        self.afk = set()
+        self.muted = set()
+        self.smuted = set()
+        self._keys = {}  # Name: (display order key, rank)
+        self._order = []  # Sorted display order keys
+        self.names = PrefixIndex()
 
     @property
     def leader(self):
@@ -150,6 +214,171 @@ class UserList(dict):
         else:
             self._leader = self[user]
 
+    def __setitem__(self, name, user):
+        if name in self:
+            self._unindex(name)
+        super().__setitem__(name, user)
+        self._index(name, user)
+
+    def __delitem__(self, name):
+        super().__delitem__(name)
+        self._unindex(name)
+
+    def pop(self, name, *default):
+        if name not in self:
+            return super().pop(name, *default)
+        user = super().pop(name)
+        self._unindex(name)
+        return user
+
+    def clear(self):
+        super().clear()
+        self.ranks.clear()
+        self.afk.clear()
+        self.muted.clear()
+        self.smuted.clear()
+        self._keys.clear()
+        self._order.clear()
+        self.names.clear()
+
+    def _order_key(self, name, user):
+        if user.rank >= self.MOD_RANK:
+            return (0, -user.rank, name.lower(), name)
+        return (2 if user.afk else 1, 0, name.lower(), name)
+
+    def _index(self, name, user, names=True):
+        self.ranks.setdefault(user.rank, set()).add(name)
+        for flagged, flag in (
+            (self.afk, user.afk),
+            (self.muted, user.muted),
+            (self.smuted, user.smuted),
+        ):
+            if flag:
+                flagged.add(name)
+        key = self._order_key(name, user)
+        self._keys[name] = (key, user.rank)
+        bisect.insort(self._order, key)
+        if names:
+            self.names.add(name)
+
+    def _unindex(self, name, names=True):
+        key, rank = self._keys.pop(name)
+        del self._order[bisect.bisect_left(self._order, key)]
+        rank_names = self.ranks[rank]
+        rank_names.discard(name)
+        if not rank_names:
+            del self.ranks[rank]
+        self.afk.discard(name)
+        self.muted.discard(name)
+        self.smuted.discard(name)
+        if names:
+            self.names.discard(name)
+
+    def refresh(self, name):
+        """Re-index a user after changing it directly.
+
+        Parameters
+        ----------
+        name : `str`
+            User name.
+
+        Raises
+        ------
+        KeyError
+            If user does not exist.
+        """
+        user = self[name]
+        self._unindex(name, names=False)
+        self._index(name, user, names=False)
+
+    def set_rank(self, name, rank):
+        """Set the rank of a user.
+
+        Raises
+        ------
+        KeyError
+            If user does not exist.
+        """
+        self[name].rank = rank
+        self.refresh(name)
+
+    def set_afk(self, name, afk):
+        """Set the AFK status of a user.
+
+        Raises
+        ------
+        KeyError
+            If user does not exist.
+        """
+        self[name].afk = afk
+        self.refresh(name)
+
+    def set_meta(self, name, meta):
+        """Set the metadata of a user.
+
+        Raises
+        ------
+        KeyError
+            If user does not exist.
+        """
+        self[name].meta = meta
+        self.refresh(name)
+
+    def update_user(self, data):
+        """Update a user, see `cytube_bot.user.User.update`.
+
+        Parameters
+        ----------
+        data : `dict`
+            User data with "name", as in `userlist` events.
+
+        Returns
+        -------
+        `bool`
+            `True` if anything changed.
+
+        Raises
+        ------
+        KeyError
+            If user does not exist.
+        """
+        name = data["name"]
+        changed = self[name].update(**data)
+        if changed:
+            self.refresh(name)
+        return changed
+
+    def ordered(self, hide_afk=False, limit=None):
+        """Users in display order.
+
+        Moderators and above by rank (descending), then other active users,
+        then other AFK users, by name (case-insensitive) within each group.
+
+        Parameters
+        ----------
+        hide_afk : `bool`, optional
+            Leave out AFK users below `MOD_RANK`.
+        limit : `None` or `int`, optional
+            Maximum number of users.
+
+        Returns
+        -------
+        `list` of `cytube_bot.user.User`
+        """
+        end = bisect.bisect_left(self._order, (2,)) if hide_afk else len(self._order)
+        if limit is not None:
+            end = min(end, limit)
+        return [self[key[3]] for key in self._order[:end]]
+
+    def sorted_names(self):
+        """User names sorted case-insensitively.
+
+        Returns
+        -------
+        `list` of `str`
+        """
+        return list(self.names)
+
     def add(self, user):
         """Add a user.
 
@@ -2,6 +2,9 @@
 # -*- coding: utf-8 -*-
 
 import asyncio
+import bisect
+import collections
+import functools
 import logging
 from base64 import b64encode
 from collections.abc import Sequence
@@ -34,14 +37,63 @@ except AttributeError:
     current_task = asyncio.Task.current_task
 
 
+Span = collections.namedtuple("Span", "start end style value")
+Span.__doc__ = """Styled part of a parsed message: text[start:end]."""
+
+
+def _tag_table(entries):
+    """Lookup table for (tag, attributes, *value) entries.
+
+    Returns entries for any tag, and entries for each named tag including
+    those for any tag, as (attributes, value) in definition order.
+    """
+    any_tag = []
+    by_tag = {}
+    for tag, attr, *value in entries or ():
+        value = value[0] if len(value) == 1 else tuple(value)
+        if tag is None:
+            any_tag.append((attr, value))
+            for tag_entries in by_tag.values():
+                tag_entries.append((attr, value))
+        else:
+            by_tag.setdefault(tag, list(any_tag)).append((attr, value))
+    return any_tag, by_tag
+
+
+def _tag_lookup(table, tag, attr):
+    """Value of the first entry of a `_tag_table` matching a tag."""
+    any_tag, by_tag = table
+    attrs = None
+    for attr_, value in by_tag.get(tag, any_tag):
+        # Check if attributes match (None means any attributes)
+        if attr_ is not None:
+            if attrs is None:
+                attrs = dict(attr)
+            if any(attrs.get(name) != value_ for name, value_ in attr_.items()):
+                continue
+        return value
+    return None
+
+
 class MessageParser(HTMLParser):
     """Chat message parser.
 
+    `parse` converts a message to text with markup delimiters,
+    `parse_spans` to plain text and a list of styled spans.
+
+    Messages without tags or character references are returned as they
+    are. Markup is looked up in tables built from `markup` and `styles`,
+    and the output is collected in a list.
+
     Attributes
     ----------
     markup : `None` or `list` of (`str`, `None` or `dict` of (`str`, `str`), `None` or `str`, `None` or `str`)
+    styles : `None` or `list` of (`str`, `None` or `dict` of (`str`, `str`), `str`)
+        (tag, attributes, style) for `parse_spans`.
     message : `str`
     tags : `list` of (`str`, `str`)
+    cache_size : `int`
+        Number of parsed messages to remember (0 - none).
     """
 
     DEFAULT_MARKUP = [
@@ -52,11 +104,56 @@ class MessageParser(HTMLParser):
         (None, {"class": "spoiler"}, "[sp]", "[/sp]"),
     ]
 
-    def __init__(self, markup=DEFAULT_MARKUP):
+    DEFAULT_STYLES = [
+        ("code", None, "code"),
+        ("strong", None, "bold"),
+        ("em", None, "italic"),
+        ("s", None, "strike"),
+        (None, {"class": "spoiler"}, "spoiler"),
+    ]
+
+    def __init__(self, markup=DEFAULT_MARKUP, cache_size=0, styles=DEFAULT_STYLES):
         super().__init__()
+        self._parse_cached = None
         self.markup = markup
-        self.message = ""
+        self.styles = styles
+        self._parts = []
+        self._spans = None  # Spans while in parse_spans
+        self._length = 0  # Text length while in parse_spans
         self.tags = []
+        self.cache_size = cache_size
+        if cache_size:
+            self._parse_cached = functools.lru_cache(maxsize=cache_size)(self._parse)
+
+    @property
+    def markup(self):
+        return self._markup
+
+    @markup.setter
+    def markup(self, markup):
+        self._markup = markup
+        self._markup_table = _tag_table(markup)
+        if self._parse_cached is not None:
+            self._parse_cached.cache_clear()
+
+    @property
+    def styles(self):
+        return self._styles
+
+    @styles.setter
+    def styles(self, styles):
+        self._styles = styles
+        self._styles_table = _tag_table(styles)
+        if self._parse_cached is not None:
+            self._parse_cached.cache_clear()
+
+    @property
+    def message(self):
+        return "".join(self._parts)
+
+    @message.setter
+    def message(self, message):
+        self._parts = [message]
 
     def get_tag_markup(self, tag, attr):
         """Get markup delimiters for a given HTML tag and attributes
@@ -68,30 +165,11 @@ class MessageParser(HTMLParser):
         Returns:
             Tuple of (start_markup, end_markup) or None if no match
         """
-        if self.markup is None:
-            return None
+        return _tag_lookup(self._markup_table, tag, attr)
 
-        # Convert attribute list to dict for easier lookup
-        attr = dict(attr)
-
-        # Search for matching markup definition
-        for tag_, attr_, start, end in self.markup:
-            # Check if tag matches (None means any tag)
-            if tag_ is not None and tag_ != tag:
-                continue
-
-            # Check if attributes match (None means any attributes)
-            if attr_ is not None:
-                match = True
-                for name, value in attr_.items():
-                    if attr.get(name, None) != value:
-                        match = False
-                        break
-                if not match:
-                    continue
-
-            # Found a match
-            return start, end
+    def _append(self, text):
+        self._parts.append(text)
+        self._length += len(text)
 
     def handle_starttag(self, tag, attr):
         """Handle opening HTML tags by converting to markup syntax
@@ -100,20 +178,37 @@ class MessageParser(HTMLParser):
             tag: HTML tag name
             attr: List of (name, value) tuples for attributes
         """
-        markup = self.get_tag_markup(tag, attr)
-        if markup is not None:
-            start, end = markup
-            # Add opening delimiter if specified
-            if start is not None:
-                self.message += start
-            # Push closing delimiter onto stack if specified
-            if end is not None:
-                self.tags.append((tag, end))
+        if self._spans is not None:
+            style = _tag_lookup(self._styles_table, tag, attr)
+            if style is not None:
+                self.tags.append((tag, (style, self._length)))
+                return
         else:
-            # For unrecognized tags, extract URLs from src/href attributes
-            for name, value in attr:
-                if name in ("src", "href"):
-                    self.message += " %s " % value
+            markup = self.get_tag_markup(tag, attr)
+            if markup is not None:
+                start, end = markup
+                # Add opening delimiter if specified
+                if start is not None:
+                    self._parts.append(start)
+                # Push closing delimiter onto stack if specified
+                if end is not None:
+                    self.tags.append((tag, end))
+                return
+        # For unrecognized tags, extract URLs from src/href attributes
+        for name, value in attr:
+            if name in ("src", "href"):
+                if self._spans is not None and value:
+                    start = self._length + 1
+                    self._spans.append(Span(start, start + len(value), "link", value))
+                self._append(" %s " % value)
+
+    def _close(self, end):
+        if self._spans is None:
+            self._parts.append(end)
+            return
+        style, start = end
+        if start < self._length:
+            self._spans.append(Span(start, self._length, style, None))
 
     def handle_endtag(self, tag):
         """Handle closing HTML tags by adding closing markup
@@ -124,7 +219,7 @@ class MessageParser(HTMLParser):
         # Pop tags from stack until we find the matching opening tag
         while self.tags:
             tag_, end = self.tags.pop()
-            self.message += end
+            self._close(end)
             if tag_ == tag:
                 return
 
@@ -135,7 +230,7 @@ class MessageParser(HTMLParser):
             data: Text content
         """
         # Unescape HTML entities (e.g., &lt; -> <)
-        self.message += unescape(data)
+        self._append(unescape(data))
 
     def parse(self, msg):
         """Parse a message.
@@ -150,20 +245,137 @@ class MessageParser(HTMLParser):
         `str`
             Parsed message.
         """
+        if "<" not in msg and "&" not in msg:
+            # Plain text, nothing to convert
+            self.message = msg
+            self.tags = []
+            return msg
+        if self._parse_cached is not None:
+            message = self._parse_cached(msg, False)
+            self.message = message
+            return message
+        return self._parse(msg, False)
+
+    def parse_spans(self, msg):
+        """Parse a message to plain text and styles.
+
+        Styled tags add no delimiters; URLs of other tags are added to the
+        text as in `parse`, with a "link" span.
+
+        Parameters
+        ----------
+        msg : `str`
+            Message to parse.
+
+        Returns
+        -------
+        (`str`, `tuple` of `cytube_bot.util.Span`)
+            Text, and spans ordered by start. Spans can nest.
+        """
+        if "<" not in msg and "&" not in msg:
+            self.message = msg
+            self.tags = []
+            return msg, ()
+        if self._parse_cached is not None:
+            ret = self._parse_cached(msg, True)
+            self.message = ret[0]
+            return ret
+        return self._parse(msg, True)
+
+    def _parse(self, msg, spans):
         # Reset parser state
-        self.message = ""
+        self._parts = []
+        self._spans = [] if spans else None
+        self._length = 0
         self.tags = []
 
-        # Parse the HTML
-        self.feed(msg)
-        self.close()
-        self.reset()
+        try:
+            # Parse the HTML
+            self.feed(msg)
+            self.close()
+            self.reset()
+
+            # Close any unclosed tags
+            for _, end in reversed(self.tags):
+                self._close(end)
+
+            if not spans:
+                return self.message
+            self._spans.sort(key=lambda span: (span.start, -span.end))
+            return self.message, tuple(self._spans)
+        finally:
+            self._spans = None
+
+
+class PrefixIndex:
+    """Sorted set of strings searchable by case-insensitive prefix.
+
+    Strings are kept sorted by (lowercase string, string), so a prefix
+    search is a binary search followed by a scan of the matches.
+    """
+
+    __slots__ = ("_keys",)
+
+    def __init__(self, items=()):
+        self._keys = sorted({(item.lower(), item) for item in items})
 
-        # Close any unclosed tags
-        for _, end in reversed(self.tags):
-            self.message += end
+    def __str__(self):
+        return "<prefix index (%d)>" % len(self._keys)
 
-        return self.message
+    __repr__ = __str__
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return (item for _, item in self._keys)
+
+    def __contains__(self, item):
+        key = (item.lower(), item)
+        i = bisect.bisect_left(self._keys, key)
+        return i < len(self._keys) and self._keys[i] == key
+
+    def add(self, item):
+        """Add a string. Does nothing if it exists."""
+        key = (item.lower(), item)
+        i = bisect.bisect_left(self._keys, key)
+        if i == len(self._keys) or self._keys[i] != key:
+            self._keys.insert(i, key)
+
+    def discard(self, item):
+        """Remove a string. Does nothing if it does not exist."""
+        key = (item.lower(), item)
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+
+    def clear(self):
+        self._keys.clear()
+
+    def search(self, prefix, limit=None):
+        """Find strings by prefix.
+
+        Parameters
+        ----------
+        prefix : `str`
+            Prefix (case-insensitive).
+        limit : `None` or `int`, optional
+            Maximum number of results.
+
+        Returns
+        -------
+        `list` of `str`
+            Matching strings, sorted case-insensitively.
+        """
+        prefix = prefix.lower()
+        keys = self._keys
+        ret = []
+        for i in range(bisect.bisect_left(keys, (prefix,)), len(keys)):
+            lower, item = keys[i]
+            if not lower.startswith(prefix) or len(ret) == limit:
+                break
+            ret.append(item)
+        return ret
 
 
 def to_sequence(obj):
@@ -265,8 +477,25 @@ def cloak_ip(ip, start=0):
     return ".".join(parts)
 
 
+@functools.lru_cache(maxsize=256)
+def _uncloak_table(acc, i):
+    """Reverse lookup table for one cloaked IP part.
+
+    Args:
+        acc: Accumulator string of previous parts for hash calculation
+        i: Index of the part (0-3)
+
+    Returns:
+        Dict of part hash to the list of parts with that hash
+    """
+    table = {}
+    for part in range(256):
+        table.setdefault(ip_hash("%s%s%s" % (acc, part, i), 3), []).append(part)
+    return table
+
+
 def _uncloak_ip(cloaked_parts, uncloaked_parts, acc, i, ret):
-    """Recursive helper to brute-force uncloak IP addresses
+    """Recursive helper to uncloak IP addresses
 
     Args:
         cloaked_parts: List of cloaked IP parts (hashes or plain)
@@ -280,21 +509,28 @@ def _uncloak_ip(cloaked_parts, uncloaked_parts, acc, i, ret):
         ret.append(".".join(uncloaked_parts))
         return
 
-    # Try all possible values (0-255) for this octet
-    for part in range(256):
-        part_hash = ip_hash("%s%s%s" % (acc, part, i), 3)
-        # If hash matches, this is a valid candidate
-        if part_hash == cloaked_parts[i]:
-            uncloaked_parts[i] = str(part)
-            # Recursively process next part
-            _uncloak_ip(
-                cloaked_parts, uncloaked_parts, "%s%d" % (acc, part), i + 1, ret
-            )
+    # Every value (0-255) of this octet whose hash matches is a candidate
+    for part in _uncloak_table(acc, i).get(cloaked_parts[i], ()):
+        uncloaked_parts[i] = str(part)
+        # Recursively process next part
+        _uncloak_ip(cloaked_parts, uncloaked_parts, "%s%d" % (acc, part), i + 1, ret)
+
+
+@functools.lru_cache(maxsize=4096)
+def _uncloak_cached(ip, start):
+    parts = ip.split(".")
+    ret = []
+    _uncloak_ip(parts, list(parts), "", start, ret)
+    return tuple(ret)
 
 
 def uncloak_ip(ip, start=0):
     """Uncloak IP.
 
+    Results are cached, and the hashes of each part are looked up in
+    tables shared by all IPs with the same uncloaked prefix, so an IP is
+    only brute-forced once per process.
+
     Parameters
     ----------
     ip : `str`
@@ -317,11 +553,9 @@ def uncloak_ip(ip, start=0):
     >>> uncloak_ip('127.0.ou9.RBl', None)
     ['127.0.0.1']
     """
-    parts = ip.split(".")
-
     # Auto-detect start index if None
     if start is None:
-        for start, part in enumerate(parts):
+        for start, part in enumerate(ip.split(".")):
             try:
                 val = int(part)
                 # If not a valid IP octet, this is where cloaking starts
@@ -331,7 +565,4 @@ def uncloak_ip(ip, start=0):
                 # Not an integer, cloaking starts here
                 break
 
-    # Brute-force uncloak by trying all possible values
-    ret = []
-    _uncloak_ip(parts, list(parts), "", start, ret)
-    return ret
+    return list(_uncloak_cached(ip, start))
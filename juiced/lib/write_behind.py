@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import collections
+import logging
+import threading
+
+
+class WriteBehindDatabase:
+    """Write-behind buffer for a bot database.
+
+    Event handlers call `user_joined`, `user_left`, `user_chat_message` and
+    `update_high_water_mark` for every event. This wrapper records those calls
+    in memory and applies them in batches on a background thread, so the
+    event loop never waits for SQLite. Repeated high water mark updates
+    between two flushes are merged into one call.
+
+    Every other attribute is delegated to the wrapped database. Unless the
+    database sets `THREAD_SAFE`, delegated calls and flushes are
+    serialized by a lock, so it is never used from two threads at once.
+    Calls made after `close` are written through to the database.
+
+    Attributes
+    ----------
+    db : `object`
+        Wrapped database.
+    max_pending : `int`
+        Maximum number of buffered calls. When the buffer is full the
+        oldest call is dropped.
+    flush_interval : `float`
+        Maximum delay in seconds before buffered calls are written.
+    batch_size : `int`
+        Buffered calls are flushed early once this many are pending.
+    dropped : `int`
+        Number of calls dropped because the buffer was full.
+    flushed : `int`
+        Number of calls written to the database.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, db, max_pending=10000, flush_interval=1.0, batch_size=500):
+        """
+        Parameters
+        ----------
+        db : `object`
+            Database to wrap.
+        max_pending : `int`, optional
+            Maximum number of buffered calls.
+        flush_interval : `float`, optional
+            Maximum delay in seconds before buffered calls are written.
+        batch_size : `int`, optional
+            Number of pending calls that triggers an early flush.
+        """
+        self.db = db
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.flushed = 0
+        self._pending = collections.deque()
+        self._high_water_mark = None
+        self._cond = threading.Condition()
+        self._db_lock = threading.RLock()
+        self._thread_safe = getattr(db, "THREAD_SAFE", False)
+        self._thread = None
+        self._closed = False
+
+    def __str__(self):
+        return "<write-behind %s (%d pending)>" % (self.db, self.pending)
+
+    __repr__ = __str__
+
+    def __getattr__(self, name):
+        if name == "db":
+            raise AttributeError(name)
+        attr = getattr(self.db, name)
+        if not callable(attr) or self._thread_safe:
+            return attr
+
+        def locked(*args, **kwargs):
+            with self._db_lock:
+                return attr(*args, **kwargs)
+
+        return locked
+
+    @property
+    def pending(self):
+        """Number of buffered calls."""
+        return len(self._pending) + (self._high_water_mark is not None)
+
+    def user_joined(self, username):
+        self._buffer("user_joined", username)
+
+    def user_left(self, username):
+        self._buffer("user_left", username)
+
+    def user_chat_message(self, username, message):
+        self._buffer("user_chat_message", username, message)
+
+    def update_high_water_mark(self, chat_users, connected_users):
+        """Buffer a high water mark update.
+
+        Updates are merged by keeping the largest counts seen since the
+        last flush, which is all a high water mark needs.
+        """
+        with self._cond:
+            closed = self._closed
+            if not closed:
+                if self._high_water_mark is None:
+                    self._high_water_mark = (chat_users, connected_users)
+                else:
+                    chat, connected = self._high_water_mark
+                    self._high_water_mark = (
+                        max(chat, chat_users),
+                        max(connected, connected_users),
+                    )
+                self._start()
+        if closed:
+            self._write("update_high_water_mark", chat_users, connected_users)
+
+    def _buffer(self, name, *args):
+        with self._cond:
+            closed = self._closed
+            if not closed:
+                if len(self._pending) >= self.max_pending:
+                    self._pending.popleft()
+                    self.dropped += 1
+                    if self.dropped == 1 or self.dropped % 1000 == 0:
+                        self.logger.warning(
+                            "write-behind buffer full, %d call(s) dropped",
+                            self.dropped,
+                        )
+                self._pending.append((name, args))
+                if len(self._pending) >= self.batch_size:
+                    self._cond.notify()
+                self._start()
+        if closed:
+            self._write(name, *args)
+
+    def _write(self, name, *args):
+        """Write a call through to the database after `close`."""
+        if self._thread_safe:
+            getattr(self.db, name)(*args)
+        else:
+            with self._db_lock:
+                getattr(self.db, name)(*args)
+
+    def _start(self):
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(
+                target=self._run, name="juiced-write-behind", daemon=True
+            )
+            self._thread.start()
+
+    def _take(self):
+        with self._cond:
+            batch = list(self._pending)
+            self._pending.clear()
+            if self._high_water_mark is not None:
+                batch.append(("update_high_water_mark", self._high_water_mark))
+                self._high_water_mark = None
+        return batch
+
+    def _flush(self):
+        with self._db_lock:
+            batch = self._take()
+            if not batch:
+                return
+            write_batch = getattr(self.db, "write_batch", None)
+            if write_batch is not None:
+                try:
+                    write_batch(batch)
+                except Exception as ex:
+                    self.logger.error("write_batch (%d calls): %r", len(batch), ex)
+            else:
+                for name, args in batch:
+                    try:
+                        getattr(self.db, name)(*args)
+                    except Exception as ex:
+                        self.logger.error("%s%r: %r", name, args, ex)
+            self.flushed += len(batch)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            self._flush()
+            if closed:
+                break
+
+    def flush(self):
+        """Write all buffered calls now and wait until the wrapped
+        database has written them if it has a `flush` method (blocking).
+        """
+        self._flush()
+        flush = getattr(self.db, "flush", None)
+        if flush is not None:
+            flush()
+
+    def close(self):
+        """Flush buffered calls, stop the background thread and close
+        the wrapped database if it has a `close` method.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        close = getattr(self.db, "close", None)
+        if close is not None:
+            with self._db_lock:
+                close()
@@ -35,12 +35,56 @@ import textwrap
 import time
 from collections import deque
 from datetime import datetime
+from itertools import count, islice
 from pathlib import Path
 
 from blessed import Terminal
 
 from juiced.lib import Bot, MessageParser, get_config
+from juiced.lib.chat_filter import ChatFilter
 from juiced.lib.error import CytubeError, SocketIOError
+from juiced.lib.highlight import Highlighter
+from juiced.lib.util import PrefixIndex
+
+
+class EmoteNames:
+    """Emote names with the # prefix, for tab completion.
+
+    A view of the emote name index of the channel: CyTube emote names
+    already include the # prefix, names without it are shown with it.
+
+    Args:
+        names (PrefixIndex): Emote names
+    """
+
+    def __init__(self, names):
+        self._names = names
+
+    def __len__(self):
+        return len(self._names)
+
+    def __iter__(self):
+        return (name if name.startswith("#") else "#" + name for name in self._names)
+
+    def __contains__(self, name):
+        return name in self._names or (name.startswith("#") and name[1:] in self._names)
+
+    def search(self, prefix, limit=None):
+        """Names starting with prefix (case-insensitive), sorted.
+
+        Args:
+            prefix (str): Prefix, with the # prefix
+            limit (int, optional): Maximum number of names
+
+        Returns:
+            list: Names with the # prefix
+        """
+        matches = self._names.search(prefix, limit)
+        if prefix.startswith("#"):
+            bare = self._names.search(prefix[1:])
+            matches += ["#" + name for name in bare if not name.startswith("#")]
+            matches = sorted(set(matches), key=lambda name: (name.lower(), name))
+        return matches[:limit]
 
 
 class TUIBot(Bot):
@@ -86,6 +130,27 @@ class TUIBot(Bot):
         5: "&",  # Founder
     }
 
+    # Chat lines searched for the original of a collapsed repeat
+    REPEAT_LOOKBACK = 50
+
+    # Delay in seconds before redrawing after coalesced updates
+    RENDER_DELAY = 0.05
+
+    # Names listed per group in a join/quit summary line
+    JOIN_QUIT_NAMES = 5
+
+    # Recent speakers remembered for username completion
+    RECENT_SPEAKERS = 100
+
+    # Terminal styles for message style spans
+    SPAN_STYLES = {
+        "bold": "bold",
+        "italic": "italic",
+        "code": "reverse",
+        "link": "underline",
+        "spoiler": "black_on_black",
+    }
+
     def __init__(self, tui_config=None, config_file="config.yaml", **kwargs):
         """Initialize the TUI bot.
 
@@ -109,6 +174,8 @@ class TUIBot(Bot):
         self.hide_afk_users = self.tui_config.get(
             "hide_afk_users", False
         )  # Hide AFK users from list
+        # Joins and quits within this many seconds share a summary line
+        self.join_quit_window = self.tui_config.get("join_quit_window", 2.0)
 
         # Store config file path for persistence
         self.config_file = config_file
@@ -118,8 +185,23 @@ class TUIBot(Bot):
         self.current_theme_name = theme_name
         self.theme = self._load_theme(theme_name)
 
-        # Message parsing
-        self.msg_parser = MessageParser()
+        # Message parsing (cached, channels repeat emotes, spam and bot output)
+        self.msg_parser = MessageParser(cache_size=512)
+
+        # Highlight words and patterns besides our name, compiled on first use
+        self.highlight_words = list(self.tui_config.get("highlight_words", []))
+        self.highlight_patterns = list(self.tui_config.get("highlight_patterns", []))
+        self.highlight_whole_words = self.tui_config.get("highlight_whole_words", False)
+        self._highlighter = None
+        self._highlighter_key = None
+
+        # Spam filter, run before chat and PMs are parsed or shown
+        self.chat_filter = None
+        ignore_users = self.tui_config.get("ignore_users", [])
+        filter_patterns = self.tui_config.get("filter_patterns", [])
+        repeat_window = self.tui_config.get("repeat_window", 0)
+        if ignore_users or filter_patterns or repeat_window:
+            self.chat_filter = ChatFilter(ignore_users, filter_patterns, repeat_window)
 
         # Chat history buffer (max 1000 messages)
         self.chat_history = deque(maxlen=1000)
@@ -136,12 +218,17 @@ class TUIBot(Bot):
         self.tab_completion_index = 0
         self.tab_completion_start = 0
 
-        # Emote list from channel
-        self.emotes = []  # List of emote names (WITH # prefix for tab completion)
+        # Recent chat speakers (name: order), ranked first in completion
+        self.recent_speakers = {}
+        self._speaker_count = count(1)
 
         # Scrolling
         self.scroll_offset = 0
 
+        # Redraw scheduled for coalesced updates
+        self._render_handle = None
+        self._render_users_pending = False
+
         # State
         self.running = False
         self.status_message = "Connecting..."
@@ -168,8 +255,13 @@ class TUIBot(Bot):
             signal.signal(signal.SIGWINCH, self._handle_resize)
 
         # Register event handlers
+        if self.chat_filter is not None:
+            self.add_filter("chatMsg", self.chat_filter)
+            self.add_filter("pm", self.chat_filter)
         self.on("chatMsg", self.handle_chat)
+        self.on("chatMsgRepeat", self.handle_chat_repeat)
         self.on("pm", self.handle_pm)
+        self.on("pmRepeat", self.handle_chat_repeat)
         self.on("userlist", self.handle_userlist)
         self.on("addUser", self.handle_user_join)
         self.on("userLeave", self.handle_user_leave)
@@ -177,7 +269,6 @@ class TUIBot(Bot):
         self.on("queue", self.handle_queue)
         self.on("playlist", self.handle_playlist)
         self.on("login", self.handle_login)
-        self.on("emoteList", self.handle_emote_list)  # CyTube emote list
 
     def _on_queue(self, _, data):
         """Override base Bot's queue handler to add retry logic.
@@ -199,7 +290,7 @@ class TUIBot(Bot):
                 try:
                     item = self.channel.playlist.get(self.pending_media_uid)
                     if item:
-                        self.channel.playlist._current = item
+                        self._set_current(item)
                         self.current_media_title = str(item.title)
                         self.add_system_message(
                             f"Now playing: {item.title}", color="bright_blue"
@@ -212,6 +303,15 @@ class TUIBot(Bot):
                 except (ValueError, AttributeError) as e:
                     self.logger.warning("_on_queue: failed to set current: %s", e)
 
+    def _set_current(self, item):
+        """Make a playlist item current, as setCurrent does.
+
+        Args:
+            item (PlaylistItem): Item, or None for no current item
+        """
+        self.channel.version += 1
+        self.channel.playlist.current = item
+
     def _on_playlist(self, _, data):
         """Override base Bot's playlist handler to add debugging and retry logic.
 
@@ -225,9 +325,7 @@ class TUIBot(Bot):
         super()._on_playlist(_, data)
 
         # Log the queue state after population
-        queue_len = (
-            len(self.channel.playlist.queue) if self.channel.playlist.queue else 0
-        )
+        queue_len = len(self.channel.playlist)
         self.logger.info("_on_playlist: queue now has %d items", queue_len)
 
         # If we have a pending media UID, try to set it now
@@ -238,7 +336,7 @@ class TUIBot(Bot):
             try:
                 item = self.channel.playlist.get(self.pending_media_uid)
                 if item:
-                    self.channel.playlist._current = item
+                    self._set_current(item)
                     self.current_media_title = str(item.title)
                     self.add_system_message(
                         f"Now playing: {item.title}", color="bright_blue"
@@ -305,7 +403,7 @@ class TUIBot(Bot):
             if isinstance(data, int):
                 self.pending_media_uid = data
             # Set current to None so we don't have stale data
-            self.channel.playlist._current = None
+            self._set_current(None)
 
     def _load_theme(self, theme_name):
         """Load theme configuration from themes directory.
@@ -626,7 +724,197 @@ class TUIBot(Bot):
             pass
         return username
 
-    def add_chat_line(self, username, message, prefix="", color_override=None):
+    def get_highlights(self, message):
+        """Find our name and the highlight words and patterns in a message.
+
+        Args:
+            message (str): Message text
+
+        Returns:
+            tuple: Words and patterns found, empty if none
+        """
+        return self._get_highlighter().search(message)
+
+    def _highlight_key(self):
+        return (
+            getattr(self.user, "name", None),
+            tuple(self.highlight_words),
+            tuple(self.highlight_patterns),
+            self.highlight_whole_words,
+        )
+
+    def _get_highlighter(self):
+        """Get the highlighter for our name and the highlight settings.
+
+        The highlighter is compiled on first use and again when our name or
+        the settings change. The highlights stored on chat lines are then
+        cleared, to be found again when the lines are rendered.
+
+        Returns:
+            Highlighter: Current highlighter
+        """
+        key = self._highlight_key()
+        if self._highlighter is None or key != self._highlighter_key:
+            name = key[0]
+            words = ([name] if name else []) + self.highlight_words
+            try:
+                self._highlighter = Highlighter(
+                    words,
+                    self.highlight_patterns,
+                    whole_words=self.highlight_whole_words,
+                )
+            except ValueError as ex:
+                self.logger.error("highlight patterns ignored: %s", ex)
+                self.highlight_patterns = []
+                self._highlighter = Highlighter(
+                    words, whole_words=self.highlight_whole_words
+                )
+            if self._highlighter_key is not None:
+                for msg_data in self.chat_history:
+                    msg_data["highlights"] = None
+            self._highlighter_key = self._highlight_key()
+        return self._highlighter
+
+    def _time(self):
+        return time.monotonic()
+
+    def _render_soon(self, users=False):
+        """Redraw the chat (and the user list) once for a burst of updates.
+
+        Args:
+            users (bool, optional): Redraw the user list too
+        """
+        self._render_users_pending |= users
+        if self._render_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._render_pending()
+            return
+        self._render_handle = loop.call_later(self.RENDER_DELAY, self._render_pending)
+
+    def _render_pending(self):
+        """Run a redraw scheduled by _render_soon."""
+        self._render_handle = None
+        if self._render_users_pending:
+            self._render_users_pending = False
+            self.render_users()
+        if self.scroll_offset == 0:
+            self.render_chat()
+            self.render_input()
+
+    def _coalesce(self, username, message, prefix):
+        """Count a message repeating the last line on that line.
+
+        Args:
+            username (str): Username of the sender
+            message (str): Message content
+            prefix (str): Prefix for the line
+
+        Returns:
+            bool: True if the message was counted on the last line
+        """
+        if not self.chat_history:
+            return False
+        last = self.chat_history[-1]
+        if (
+            last["message"] != message
+            or last["username"] != username
+            or last["prefix"] != prefix
+            or "join_quit" in last
+        ):
+            return False
+        last["repeats"] = last.get("repeats", 1) + 1
+        self._render_soon()
+        return True
+
+    def add_join_quit(self, username, joined):
+        """Add a join or quit notice to chat history.
+
+        Notices within join_quit_window seconds of the first share one
+        summary line, as long as nothing else was added in between.
+
+        Args:
+            username (str): Username
+            joined (bool): True for a join, False for a quit
+        """
+        self._log_chat(
+            "*", f"{username} has {'joined' if joined else 'left'}", prefix="*"
+        )
+        now = self._time()
+        last = self.chat_history[-1] if self.chat_history else None
+        batch = last.get("join_quit") if last is not None else None
+        if batch is None or now - batch["time"] > self.join_quit_window:
+            batch = {
+                "time": now,
+                "joined": {},
+                "left": {},
+                "visited": {},
+                "rejoined": {},
+            }
+            last = {
+                "timestamp": datetime.now().strftime("%H:%M:%S"),
+                "username": "*",
+                "message": "",
+                "prefix": "",
+                "color": "",
+                "join_quit": batch,
+            }
+            self.chat_history.append(last)
+
+        # Names by net change since the first notice, in order of arrival
+        if joined:
+            if username in batch["left"]:
+                del batch["left"][username]
+                batch["rejoined"][username] = None
+            else:
+                batch["visited"].pop(username, None)
+                batch["joined"][username] = None
+        elif username in batch["joined"]:
+            del batch["joined"][username]
+            batch["visited"][username] = None
+        else:
+            batch["rejoined"].pop(username, None)
+            batch["left"][username] = None
+
+        colors = self.theme["colors"]["messages"]
+        if not batch["left"] and not batch["visited"]:
+            last["color"] = colors["system_join"]
+        elif not batch["joined"] and not batch["rejoined"]:
+            last["color"] = colors["system_leave"]
+        else:
+            last["color"] = colors["system_info"]
+        last["message"] = self._join_quit_summary(batch)
+        last["highlights"] = self.get_highlights(last["message"])
+        self._render_soon(users=True)
+
+    def _join_quit_summary(self, batch):
+        """Text of a join/quit summary line."""
+        parts = []
+        for key, one, many in (
+            ("joined", "has joined", "have joined"),
+            ("left", "has left", "have left"),
+            ("visited", "joined and left", "joined and left"),
+            ("rejoined", "left and rejoined", "left and rejoined"),
+        ):
+            names = list(batch[key])
+            if not names:
+                continue
+            if len(names) == 1:
+                parts.append(f"{names[0]} {one}")
+                continue
+            shown = names[: self.JOIN_QUIT_NAMES]
+            if len(names) > len(shown):
+                text = f"{', '.join(shown)} and {len(names) - len(shown)} others"
+            else:
+                text = f"{', '.join(shown[:-1])} and {shown[-1]}"
+            parts.append(f"{text} {many}")
+        return "; ".join(parts)
+
+    def add_chat_line(
+        self, username, message, prefix="", color_override=None, spans=(), raw=None
+    ):
         """Add a line to the chat history buffer.
 
         Args:
@@ -634,7 +922,13 @@ class TUIBot(Bot):
             message (str): Message content
             prefix (str, optional): Prefix for the line (e.g., '*', '@')
             color_override (str, optional): Override the username color
+            spans (tuple, optional): Style spans of the message from
+                MessageParser.parse_spans
+            raw (str, optional): Message as received, before parsing
         """
+        if self._coalesce(username, message, prefix):
+            return
+
         timestamp = datetime.now().strftime("%H:%M:%S")
         color = color_override or self.get_username_color(username)
 
@@ -645,6 +939,9 @@ class TUIBot(Bot):
                 "message": message,
                 "prefix": prefix,
                 "color": color,
+                "spans": spans,
+                "raw": message if raw is None else raw,
+                "highlights": self.get_highlights(message),
             }
         )
 
@@ -660,6 +957,12 @@ class TUIBot(Bot):
             message (str): System message content
             color (str, optional): Color for the message
         """
+        # Log system messages too
+        self._log_chat("*", message, prefix="*")
+
+        if self._coalesce("*", message, ""):
+            return
+
         timestamp = datetime.now().strftime("%H:%M:%S")
 
         self.chat_history.append(
@@ -669,16 +972,21 @@ class TUIBot(Bot):
                 "message": message,
                 "prefix": "",
                 "color": color,
+                "highlights": self.get_highlights(message),
             }
         )
 
-        # Log system messages too
-        self._log_chat("*", message, prefix="*")
-
         if self.scroll_offset == 0:
             self.render_chat()
             self.render_input()
 
+    def _add_speaker(self, username):
+        """Remember a user as the most recent speaker, for completion."""
+        self.recent_speakers.pop(username, None)
+        self.recent_speakers[username] = next(self._speaker_count)
+        if len(self.recent_speakers) > self.RECENT_SPEAKERS:
+            del self.recent_speakers[next(iter(self.recent_speakers))]
+
     async def handle_chat(self, _, data):
         """Handle incoming chat messages.
 
@@ -687,9 +995,11 @@ class TUIBot(Bot):
             data (dict): Message data from CyTube
         """
         username = data.get("username", "<unknown>")
-        msg = self.msg_parser.parse(data.get("msg", ""))
+        raw = data.get("msg", "")
+        msg, spans = self.msg_parser.parse_spans(raw)
 
-        self.add_chat_line(username, msg)
+        self._add_speaker(username)
+        self.add_chat_line(username, msg, spans=spans, raw=raw)
         self._log_chat(username, msg)
 
     async def handle_pm(self, _, data):
@@ -700,13 +1010,45 @@ class TUIBot(Bot):
             data (dict): PM data from CyTube
         """
         username = data.get("username", "<unknown>")
-        msg = self.msg_parser.parse(data.get("msg", ""))
+        raw = data.get("msg", "")
+        msg, spans = self.msg_parser.parse_spans(raw)
 
         self.add_chat_line(
-            username, msg, prefix="[PM]", color_override="bright_magenta"
+            username,
+            msg,
+            prefix="[PM]",
+            color_override="bright_magenta",
+            spans=spans,
+            raw=raw,
         )
         self._log_chat(username, msg, prefix="[PM]")
 
+    async def handle_chat_repeat(self, event, data):
+        """Handle repeated chat messages and PMs collapsed by the chat filter.
+
+        Args:
+            event (str): Event name (chatMsgRepeat or pmRepeat)
+            data (dict): Message data with the repeat count
+        """
+        username = data.get("username", "<unknown>")
+        prefix = "[PM]" if event == "pmRepeat" else ""
+        # Count the repeat on the user's last line, if it is recent and
+        # says the same. The line may already count repeats coalesced
+        # outside the filter window, so add to it rather than use the
+        # filter's count.
+        for msg_data in islice(reversed(self.chat_history), self.REPEAT_LOOKBACK):
+            if msg_data["username"] == username and msg_data["prefix"] == prefix:
+                if msg_data.get("raw") == data.get("msg", ""):
+                    msg_data["repeats"] = msg_data.get("repeats", 1) + 1
+                    self._render_soon()
+                    return
+                break
+        # Not on screen, show it as a new line
+        if event == "pmRepeat":
+            await self.handle_pm(event, data)
+        else:
+            await self.handle_chat(event, data)
+
     async def handle_userlist(self, _, data):
         """Handle initial userlist event.
 
@@ -727,9 +1069,9 @@ class TUIBot(Bot):
         """
         username = data.get("name", "<unknown>")
         if self.show_join_quit:
-            color = self.theme["colors"]["messages"]["system_join"]
-            self.add_system_message(f"{username} has joined", color=color)
-        self.render_users()
+            self.add_join_quit(username, True)
+        else:
+            self._render_soon(users=True)
 
     async def handle_user_leave(self, _, data):
         """Handle user leave events.
@@ -740,9 +1082,9 @@ class TUIBot(Bot):
         """
         username = data.get("name", "<unknown>")
         if self.show_join_quit:
-            color = self.theme["colors"]["messages"]["system_leave"]
-            self.add_system_message(f"{username} has left", color=color)
-        self.render_users()
+            self.add_join_quit(username, False)
+        else:
+            self._render_soon(users=True)
 
     async def handle_media_change(self, _, data):
         """Handle media change events.
@@ -795,7 +1137,7 @@ class TUIBot(Bot):
             try:
                 item = self.channel.playlist.get(self.pending_media_uid)
                 if item:
-                    self.channel.playlist._current = item
+                    self._set_current(item)
                     self.current_media_title = str(item.title)
                     self.add_system_message(
                         f"Now playing: {item.title}", color="bright_blue"
@@ -816,7 +1158,7 @@ class TUIBot(Bot):
             try:
                 item = self.channel.playlist.get(self.pending_media_uid)
                 if item:
-                    self.channel.playlist._current = item
+                    self._set_current(item)
                     self.current_media_title = str(item.title)
                     self.add_system_message(
                         f"Now playing: {item.title}", color="bright_blue"
@@ -838,41 +1180,36 @@ class TUIBot(Bot):
         self.render_status()
 
     async def handle_emote_list(self, _, data):
-        """Handle emote list from CyTube.
+        """Load an emote list into channel.emotes.
 
         Args:
             _ (str): Event name (unused)
             data (list): List of emote objects from CyTube
 
         CyTube sends emotes as a list of objects with 'name', 'image', etc.
-        We extract just the names for tab completion.
+        Bot keeps them in channel.emotes on emoteList events, so this is only
+        needed for emote lists from elsewhere.
         """
         if not data:
             return
-
-        # Extract emote names from the emote objects
-        # CyTube emotes are objects like: {'name': '#smile', 'image': '...', ...}
-        # Note: CyTube emote names already include the # prefix
-        self.emotes = []
-        for emote in data:
-            if isinstance(emote, dict) and "name" in emote:
-                name = emote["name"]
-                # Ensure name has # prefix (some might not)
-                if not name.startswith("#"):
-                    name = "#" + name
-                self.emotes.append(name)
-            elif isinstance(emote, str):
-                # Sometimes they might just be strings
-                if not emote.startswith("#"):
-                    emote = "#" + emote
-                self.emotes.append(emote)
-
+        # Sometimes they might just be strings
+        self.channel.emotes.reset(
+            {"name": emote} if isinstance(emote, str) else emote
+            for emote in data
+            if isinstance(emote, str) or "name" in emote
+        )
         self.logger.debug(
-            f"Received {len(self.emotes)} emotes from server. Sample: {self.emotes[:5] if self.emotes else []}"
+            f"Loaded {len(self.emotes)} emotes. Sample: {self.emotes.search('#', 5)}"
         )
 
-        # Sort for consistent tab completion
-        self.emotes.sort(key=str.lower)
+    @property
+    def emotes(self):
+        """Emote names of the channel with the # prefix, for tab completion."""
+        return EmoteNames(self.channel.emotes.names)
+
+    @emotes.setter
+    def emotes(self, names):
+        self.channel.emotes.reset({"name": name} for name in names)
 
     def render_screen(self):
         """Render the complete TUI layout.
@@ -1129,6 +1466,54 @@ class TUIBot(Bot):
         else:
             return [message]
 
+    def _display_message(self, msg_data):
+        """Message text of a chat record with its repeat count, if any."""
+        repeats = msg_data.get("repeats")
+        if repeats:
+            return f'{msg_data["message"]} (x{repeats})'
+        return msg_data["message"]
+
+    def _style_lines(self, message, lines, spans):
+        """Apply message style spans to its wrapped lines.
+
+        Args:
+            message (str): The message text
+            lines (list): Wrapped lines of the message
+            spans (tuple): Style spans from MessageParser.parse_spans
+
+        Returns:
+            list: Styled lines, or the lines unchanged if they cannot be
+            located in the message
+        """
+        styled = []
+        pos = 0
+        for line in lines:
+            start = message.find(line, pos)
+            if start < 0:
+                return lines
+            end = start + len(line)
+            pos = end
+            edges = {start, end}
+            for span in spans:
+                if span.start < end and span.end > start:
+                    edges.add(max(span.start, start))
+                    edges.add(min(span.end, end))
+            edges = sorted(edges)
+            parts = []
+            for left, right in zip(edges, edges[1:]):
+                text = message[left:right]
+                for span in spans:
+                    if span.start > left:
+                        break
+                    if span.end >= right:
+                        style = self.SPAN_STYLES.get(span.style)
+                        style_func = getattr(self.term, style, None) if style else None
+                        if callable(style_func):
+                            text = style_func(text)
+                parts.append(text)
+            styled.append("".join(parts))
+        return styled
+
     def render_chat(self):
         """Render the chat history area with scrolling support."""
         # Calculate dimensions - now we have 4 lines used (top status, separator, bottom status, input)
@@ -1136,6 +1521,9 @@ class TUIBot(Bot):
         user_list_width = 22
         chat_width = self.term.width - user_list_width - 1
 
+        # Our name or the highlight settings may have changed
+        self._get_highlighter()
+
         # Calculate which messages fit on screen, accounting for wrapping
         visible_messages = []
         lines_used = 0
@@ -1144,7 +1532,7 @@ class TUIBot(Bot):
         for msg_data in reversed(self.chat_history):
             timestamp = msg_data["timestamp"]
             username = msg_data["username"]
-            message = msg_data["message"]
+            message = self._display_message(msg_data)
             prefix = msg_data["prefix"]
 
             # Determine display username (presentation-only)
@@ -1174,7 +1562,7 @@ class TUIBot(Bot):
         for msg_data in visible_messages:
             timestamp = msg_data["timestamp"]
             username = msg_data["username"]
-            message = msg_data["message"]
+            message = self._display_message(msg_data)
             prefix = msg_data["prefix"]
             color = msg_data["color"]
 
@@ -1204,10 +1592,22 @@ class TUIBot(Bot):
                 prefix_len += len(f"{prefix} ")
             prefix_len += len(f"<{username}> ")
 
-            # Check if my username is mentioned in the message
-            if self.user and self.user.name and self.user.name in message:
-                # Highlight the entire message with reverse video
-                wrapped_lines = [self.term.reverse(line) for line in wrapped_lines]
+            # Highlighted when added, records added directly or highlighted
+            # with old settings on first render
+            highlights = msg_data.get("highlights")
+            if highlights is None:
+                highlights = msg_data["highlights"] = self.get_highlights(message)
+            if highlights:
+                # Highlight the entire message
+                highlight_color = self.theme["colors"]["messages"].get(
+                    "mention_highlight", "reverse"
+                )
+                highlight_func = getattr(self.term, highlight_color, self.term.reverse)
+                wrapped_lines = [highlight_func(line) for line in wrapped_lines]
+            elif msg_data.get("spans"):
+                wrapped_lines = self._style_lines(
+                    message, wrapped_lines, msg_data["spans"]
+                )
 
             # Print first line with full prefix
             with self.term.location(0, current_line):
@@ -1235,6 +1635,41 @@ class TUIBot(Bot):
                 print(" " * chat_width, end="", flush=True)
             current_line += 1
 
+    def _ordered_users(self, userlist, limit):
+        """Users in user list order, at most limit.
+
+        Uses the indexes of UserList; other mappings are sorted on each call.
+
+        Args:
+            userlist: Channel user list
+            limit (int): Maximum number of users
+
+        Returns:
+            list: Users
+        """
+        ordered = getattr(userlist, "ordered", None)
+        if ordered is not None:
+            return ordered(self.hide_afk_users, limit)
+
+        # Rank hierarchy: Owner (4+) > Admin (3) > Mod (2) > Registered (1) > Guest (0)
+        mods = []  # All users with rank >= 2, AFK or not
+        regular_users = []  # Active regular users
+        afk_users = []  # AFK regular users (rank < 2)
+        for user in userlist.values():
+            if user.rank >= 2:
+                mods.append(user)
+            elif user.afk:
+                afk_users.append(user)
+            else:
+                regular_users.append(user)
+        mods.sort(key=lambda u: (-u.rank, u.name.lower()))
+        regular_users.sort(key=lambda u: u.name.lower())
+        afk_users.sort(key=lambda u: u.name.lower())
+        sorted_users = mods + regular_users
+        if not self.hide_afk_users:
+            sorted_users += afk_users
+        return sorted_users[:limit]
+
     def render_users(self):
         """Render the user list on the right side of the screen.
 
@@ -1276,38 +1711,15 @@ class TUIBot(Bot):
             with self.term.location(user_list_x - 1, i):
                 print(border_func("│"), end="", flush=True)
 
-        # Separate users by rank: higher ranks at top, then by activity status
-        # Rank hierarchy: Owner (4+) > Admin (3) > Mod (2) > Registered (1) > Guest (0)
-        mods = []  # All users with rank >= 2, AFK or not
-        regular_users = []  # Active regular users
-        afk_users = []  # AFK regular users (rank < 2)
-
-        for user in self.channel.userlist.values():
-            if user.rank >= 2:  # Moderator or higher - always at top
-                mods.append(user)
-            elif user.afk:  # AFK regular users go to bottom
-                afk_users.append(user)
-            else:  # Active regular users in middle
-                regular_users.append(user)
-
-        # Sort mods by rank (descending), then alphabetically within same rank
-        mods.sort(key=lambda u: (-u.rank, u.name.lower()))
-
-        # Sort other groups alphabetically by name (case-insensitive)
-        regular_users.sort(key=lambda u: u.name.lower())
-        afk_users.sort(key=lambda u: u.name.lower())
-
-        # Combine lists: mods first (by rank, then alpha), then active users, then AFK regular users
-        sorted_users = mods + regular_users
-        if not self.hide_afk_users:
-            sorted_users += afk_users
+        # Mods by rank at top, then active users, then AFK users
+        sorted_users = self._ordered_users(self.channel.userlist, chat_height)
 
         # Get rank colors from theme
         rank_colors = self.theme["colors"]["user_ranks"]
         symbols = self.theme["symbols"]
 
         # Render users
-        for i, user in enumerate(sorted_users[:chat_height]):
+        for i, user in enumerate(sorted_users):
             line_num = 2 + i
 
             # IMPORTANT: Clear the entire line first to prevent artifacts
@@ -1565,6 +1977,8 @@ class TUIBot(Bot):
 
         Unified tab completion matching for both usernames and emotes.
         Since emotes are stored with # prefix, matching is straightforward.
+        Names are searched in sorted prefix indexes; usernames of recent
+        speakers are ranked first.
 
         Args:
             partial: The text to complete (may include # prefix for emotes)
@@ -1573,9 +1987,6 @@ class TUIBot(Bot):
         Returns:
             List of matching strings (emotes include # prefix, usernames don't)
         """
-        partial_lower = partial.lower()
-        matches = []
-
         if is_emote:
             # Emotes stored with # prefix (e.g., ['#smile', '#lol', '#kappa'])
             if self.emotes:
@@ -1626,21 +2037,24 @@ class TUIBot(Bot):
                     "#pog",
                     "#copium",
                 ]
+                emote_list = EmoteNames(PrefixIndex(emote_list))
 
-            for emote in emote_list:
-                if emote.lower().startswith(partial_lower):
-                    matches.append(emote)
-        else:
-            # Username completion
-            if not self.channel or not self.channel.userlist:
-                return []
+            return emote_list.search(partial)
 
-            for username in self.channel.userlist.keys():
-                if username.lower().startswith(partial_lower):
-                    matches.append(username)
+        # Username completion
+        if not self.channel or not self.channel.userlist:
+            return []
 
-        # Sort matches alphabetically (case-insensitive)
-        return sorted(matches, key=str.lower)
+        names = getattr(self.channel.userlist, "names", None)
+        if names is None:
+            # Not a UserList, index it for this search
+            names = PrefixIndex(self.channel.userlist.keys())
+        matches = names.search(partial)
+
+        # Recent speakers first (most recent first), then alphabetically
+        recent = self.recent_speakers
+        matches.sort(key=lambda name: -recent.get(name, 0))
+        return matches
 
     def navigate_history_up(self):
         """Navigate backward in command history (up arrow)."""
@@ -1808,24 +2222,24 @@ class TUIBot(Bot):
             # Show detailed debug information about playlist
             self.add_system_message("━━━ Playlist Debug Info ━━━", color="bright_cyan")
             if self.channel and self.channel.playlist:
-                queue = self.channel.playlist.queue
+                playlist = self.channel.playlist
                 self.add_system_message(
-                    f"Queue length: {len(queue)}", color="bright_white"
+                    f"Queue length: {len(playlist)}", color="bright_white"
                 )
                 self.add_system_message(
                     f'Pending UID: {self.pending_media_uid or "None"}',
                     color="bright_white",
                 )
-                if queue:
+                if len(playlist):
                     self.add_system_message(
                         "First 5 items in queue:", color="bright_cyan"
                     )
-                    for item in queue[:5]:
+                    for item in islice(playlist, 5):
                         self.add_system_message(
                             f"  UID {item.uid}: {item.title[:40]}", color="bright_black"
                         )
                 # Try to manually find what should be current
-                if self.pending_media_uid and queue:
+                if self.pending_media_uid and len(playlist):
                     try:
                         item = self.channel.playlist.get(self.pending_media_uid)
                         self.add_system_message(
@@ -1969,12 +2383,11 @@ class TUIBot(Bot):
                 self.add_system_message(f"Users: {chat_users}", color="bright_white")
 
             if self.channel.playlist:
-                total = len(self.channel.playlist.queue)
+                total = len(self.channel.playlist)
                 self.add_system_message(
                     f"Playlist: {total} items", color="bright_white"
                 )
-                # Calculate total playlist duration
-                total_time = sum(item.duration for item in self.channel.playlist.queue)
+                total_time = self.channel.playlist.total_duration
                 if total_time > 0:
                     duration = self.format_duration(total_time)
                     self.add_system_message(
@@ -2114,22 +2527,22 @@ class TUIBot(Bot):
                 self.add_system_message("Usage: /playlist [number]", color="bright_red")
                 return
 
-        queue = self.channel.playlist.queue
+        playlist = self.channel.playlist
         self.add_system_message(
-            f"━━━ Playlist ({len(queue)} items) ━━━", color="bright_cyan"
+            f"━━━ Playlist ({len(playlist)} items) ━━━", color="bright_cyan"
         )
 
-        for i, item in enumerate(queue[:limit], 1):
-            marker = "► " if item == self.channel.playlist.current else "  "
+        for i, item in enumerate(islice(playlist, limit), 1):
+            marker = "► " if item == playlist.current else "  "
             duration = self.format_duration(item.duration)
             title = item.title[:50] + "..." if len(item.title) > 50 else item.title
             self.add_system_message(
                 f"{marker}{i}. {title} ({duration})", color="bright_white"
             )
 
-        if len(queue) > limit:
+        if len(playlist) > limit:
             self.add_system_message(
-                f"  ... and {len(queue) - limit} more", color="bright_black"
+                f"  ... and {len(playlist) - limit} more", color="bright_black"
             )
 
     async def cmd_add(self, args):
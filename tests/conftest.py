@@ -26,6 +26,8 @@ def test_environment(monkeypatch, tmp_path, request):
 
     - Sets a module-level `_TEST_LOG_DIR` to pytest's `tmp_path` so tests that
       reference that variable don't need their own autouse fixture.
+    - Changes the working directory to `tmp_path` so the default
+      `bot_data.db` database is created there.
     - Monkeypatches the TUI Terminal and disables full-screen rendering to
       avoid side-effects during tests.
     """
@@ -38,6 +40,9 @@ def test_environment(monkeypatch, tmp_path, request):
             # best-effort; continue if we can't set it
             pass
 
+    # Bot opens its SQLite database relative to the working directory.
+    monkeypatch.chdir(tmp_path)
+
     # Try to patch juiced.tui_bot if it's importable in the test environment.
     try:
         import juiced.tui_bot as tui_mod
@@ -1,7 +1,9 @@
+import asyncio
+
 import pytest
 
 from juiced.lib.bot import Bot
-from juiced.lib.error import SocketIOError
+from juiced.lib.error import ChannelPermissionError, SocketIOError
 from juiced.lib.user import User
 
 
@@ -70,7 +72,7 @@ def test_set_user_meta_and_rank_and_afk_and_leader():
 async def test_run_creates_and_cancels_background_tasks_on_socketioerror():
     bot = make_bot()
 
-    # make DB truthy so tasks are created
+    # make DB truthy so jobs are added
     bot.db = object()
 
     # fake login that sets a socket whose recv raises SocketIOError
@@ -89,17 +91,62 @@ async def test_run_creates_and_cancels_background_tasks_on_socketioerror():
 
     await bot.run()
 
-    # background tasks should have been created and canceled
-    assert bot._history_task is not None
-    assert bot._status_task is not None
-    assert bot._outbound_task is not None
-    assert bot._maintenance_task is not None
+    # periodic jobs should have been registered and stopped
+    assert set(bot.scheduler.jobs) == {
+        "user_counts",
+        "status",
+        "outbound",
+        "maintenance",
+    }
+    assert not bot.scheduler.running
+    assert not any(job.running for job in bot.scheduler.jobs.values())
+
+
+RUN_AND_EXIT = """
+import asyncio, sys
+from juiced.lib.bot import Bot
+from juiced.lib.error import SocketIOError
+
+bot = Bot("example.com", "chan", user="bot", db_path=sys.argv[1])
+bot.db.flush_interval = 60
+bot.restart_delay = None
+
+
+class Socket:
+    async def recv(self):
+        raise SocketIOError("boom")
+
+    async def close(self):
+        pass
+
+
+async def login():
+    bot.socket = Socket()
+
+
+bot.login = login
+for i in range(20000):
+    bot._on_chatMsg(None, {"username": "alice", "msg": str(i)})
+asyncio.run(bot.run())
+"""
 
-    # Tasks should be done (cancelled or finished)
-    assert bot._history_task.done()
-    assert bot._status_task.done()
-    assert bot._outbound_task.done()
-    assert bot._maintenance_task.done()
+
+def test_run_commits_buffered_writes_before_exit(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    from juiced.lib.database import BotDatabase
+
+    path = str(tmp_path / "bot.db")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    subprocess.run(
+        [sys.executable, "-c", RUN_AND_EXIT, path], env=env, check=True, timeout=60
+    )
+    reopened = BotDatabase(path)
+    assert reopened.get_user_stats("alice")["total_chat_lines"] == 20000
+    reopened.close()
 
 
 @pytest.mark.asyncio
@@ -151,6 +198,30 @@ async def test_bot_db_module_not_available(monkeypatch):
     monkeypatch.setattr(bot_module, "BotDatabase", original_db)
 
 
+def test_bot_db_is_wrapped_in_write_behind_buffer(monkeypatch):
+    from juiced.lib import bot as bot_module
+    from juiced.lib.write_behind import WriteBehindDatabase
+
+    calls = []
+
+    class FakeDB:
+        def __init__(self, path):
+            self.path = path
+
+        def user_joined(self, username):
+            calls.append(username)
+
+    monkeypatch.setattr(bot_module, "BotDatabase", FakeDB)
+    bot = bot_module.Bot("test.com", "test", user="testuser", db_path="x.db")
+    assert isinstance(bot.db, WriteBehindDatabase)
+    assert bot.db.path == "x.db"
+
+    bot._on_addUser(None, {"name": "alice"})
+    bot.db.flush()
+    assert calls == ["alice"]
+    bot.db.close()
+
+
 def test_on_rank_updates_user_rank():
     bot = make_bot()
     bot._on_rank(None, 3)
@@ -195,7 +266,7 @@ def test_on_emoteList_updates_channel_emotes():
     bot = make_bot()
     emotes = [{"name": "Kappa", "image": "kappa.png"}]
     bot._on_emoteList(None, emotes)
-    assert bot.channel.emotes == emotes
+    assert list(bot.channel.emotes) == emotes
 
 
 def test_on_drinkCount_updates_channel_drink_count():
@@ -386,3 +457,129 @@ def test_on_delete_removes_item_from_playlist():
     # Delete it
     bot._on_delete(None, {"uid": 1})
     assert len(bot.channel.playlist.queue) == 0
+
+
+@pytest.mark.asyncio
+async def test_snapshots_are_reconciled_into_sync_events():
+    bot = make_bot()
+    events = []
+    for event in ("syncAddUser", "syncUserLeave", "syncUpdateUser", "syncQueue"):
+        bot.on(event, lambda ev, data: events.append((ev, data)))
+
+    await bot.trigger("userlist", [{"name": "alice", "rank": 1}, {"name": "bob"}])
+    alice = bot.channel.userlist["alice"]
+    events.clear()
+
+    users = [{"name": "alice", "rank": 2}, {"name": "carol", "rank": 0}]
+    await bot.trigger("userlist", users)
+    assert bot.channel.userlist["alice"] is alice
+    assert alice.rank == 2
+    assert sorted(bot.channel.userlist) == ["alice", "carol"]
+    assert events == [
+        ("syncUserLeave", {"name": "bob"}),
+        ("syncUpdateUser", users[0]),
+        ("syncAddUser", users[1]),
+    ]
+
+    item = {
+        "uid": 1,
+        "temp": False,
+        "queueby": "alice",
+        "media": {"type": "yt", "id": "abc", "title": "Video", "seconds": 60},
+    }
+    events.clear()
+    await bot.trigger("playlist", [item])
+    await bot.trigger("playlist", [item])
+    assert events == [("syncQueue", {"item": item, "after": "prepend"})]
+
+
+@pytest.mark.asyncio
+async def test_userlist_ips_are_uncloaked_in_background(monkeypatch):
+    monkeypatch.setattr("juiced.lib.bot.uncloak_ip", lambda ip: ["ip:" + ip])
+    bot = make_bot()
+    users = [{"name": "alice", "meta": {"ip": "x.y.z.w"}}, {"name": "bob"}]
+    await bot.trigger("userlist", users)
+    assert not bot.channel.userlist["alice"].uncloaked
+
+    await bot._uncloak_task
+    assert bot.channel.userlist["alice"].uncloaked
+    assert await bot.uncloak_ips() == {"alice": ["ip:x.y.z.w"], "bob": None}
+
+
+@pytest.mark.asyncio
+async def test_background_uncloak_errors_are_logged(monkeypatch, caplog):
+    def fail(ip):
+        raise OSError("no resolver")
+
+    monkeypatch.setattr("juiced.lib.bot.uncloak_ip", fail)
+    bot = make_bot()
+    await bot.trigger("userlist", [{"name": "alice", "meta": {"ip": "x.y.z.w"}}])
+    with pytest.raises(OSError):
+        await bot._uncloak_task
+    await asyncio.sleep(0)
+    assert "uncloak_ips: OSError('no resolver')" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_capabilities_follow_permissions_and_rank():
+    bot = make_bot()
+    events = []
+    bot.on("capabilities", lambda ev, data: events.append(data))
+
+    await bot.trigger("setPermissions", {"chat": 0, "kick": 2, "chatclear": 3})
+    assert bot.capabilities == frozenset()
+    assert events == []
+
+    await bot.trigger("rank", 2)
+    assert bot.capabilities == {"chat", "kick"}
+    assert bot.can("kick") and not bot.can("chatclear") and not bot.can("nope")
+    assert events == [
+        {
+            "capabilities": {"chat", "kick"},
+            "added": {"chat", "kick"},
+            "removed": frozenset(),
+        }
+    ]
+
+    await bot.trigger("userlist", [{"name": "bot", "rank": 2}])
+    await bot.trigger("setUserRank", {"name": "bot", "rank": 3})
+    assert events[-1]["added"] == {"chatclear"}
+    await bot.trigger("setPermissions", {"chat": 0, "kick": 4, "chatclear": 3})
+    assert events[-1]["removed"] == {"kick"}
+    assert len(events) == 3
+    with pytest.raises(ChannelPermissionError, match="permission denied"):
+        bot._check_permission("kick")
+    with pytest.raises(ValueError):
+        bot._check_permission("nope")
+
+    # Permissions edited in place are picked up on request
+    bot.channel.permissions["kick"] = 0
+    assert not bot.can("kick")
+    bot._check_permission("kick")
+    assert "kick" in bot.update_capabilities()
+    assert bot.can("kick")
+
+
+@pytest.mark.asyncio
+async def test_capabilities_change_outside_handlers_is_triggered_right_away():
+    bot = make_bot()
+    events = []
+    bot.on("capabilities", lambda ev, data: events.append(data["removed"]))
+    await bot.trigger("setPermissions", {"chat": 0})
+    await bot.trigger("rank", 1)
+    events.clear()
+
+    # Outside of trigger, e.g. on disconnect
+    bot.user.rank = -1
+    assert not bot.can("chat")
+    await asyncio.sleep(0)
+    assert events == [{"chat"}]
+
+    # Deferred events are triggered even if the event is filtered out
+    def drop(event, data):
+        bot.user.rank = 1
+        return not bot.can("chatclear")
+
+    bot.add_filter("chatMsg", drop)
+    await bot.trigger("chatMsg", {"username": "al", "msg": "hi"})
+    assert events == [{"chat"}, frozenset()]
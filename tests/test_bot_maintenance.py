@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+import pytest
+
+from juiced.lib.bot import Bot
+from juiced.lib.database import BotDatabase
+
+
+def make_bot(db):
+    bot = Bot("example.com", "chan", user="bot", enable_db=False)
+    bot.db = db
+    return bot
+
+
+class HistoryDB:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get_user_count_history(self, hours=24):
+        return self.rows
+
+
+def test_quiet_hour_picks_hour_with_fewest_users():
+    rows = [
+        {"timestamp": 3 * 3600, "chat_users": 2},
+        {"timestamp": 3 * 3600 + 60, "chat_users": 4},
+        {"timestamp": 86400 + 4 * 3600, "chat_users": 1},
+        {"timestamp": 20 * 3600, "chat_users": 30},
+    ]
+    assert make_bot(HistoryDB(rows))._quiet_hour() == 4
+    assert make_bot(HistoryDB([]))._quiet_hour() is None
+    assert make_bot(object())._quiet_hour() is None
+
+
+def test_maintenance_delay():
+    bot = make_bot(None)
+    now = 10 * 86400 + 5 * 3600  # 05:00 UTC
+    assert bot._maintenance_delay(now, 300, None) == 300
+    # Later today
+    assert bot._maintenance_delay(now, 300, 6) == 3600
+    # Already past today, and never sooner than min_delay
+    assert bot._maintenance_delay(now, 300, 5) == 86400
+    assert bot._maintenance_delay(now, 7200, 6) == 86400 + 3600
+
+
+@pytest.mark.asyncio
+async def test_run_maintenance_in_chunks(tmp_path):
+    db = BotDatabase(str(tmp_path / "bot.db"), chat_history_size=1)
+    for i in range(5):
+        db.user_chat_message("alice", str(i))
+    bot = make_bot(db)
+    bot.MAINTENANCE_CHUNK = 2
+    bot.MAINTENANCE_PAUSE = 0
+
+    report = await bot._run_maintenance()
+    assert [step for step, _, _ in report] == list(db.MAINTENANCE_STEPS)
+    assert dict((step, count) for step, count, _ in report)["chat"] == 4
+    assert all(elapsed >= 0 for _, _, elapsed in report)
+    assert [m["message"] for m in db.get_recent_chat()] == ["4"]
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_run_maintenance_falls_back_to_perform_maintenance():
+    class LegacyDB:
+        def perform_maintenance(self):
+            return ["vacuumed"]
+
+    report = await make_bot(LegacyDB())._run_maintenance()
+    assert [(step, count) for step, count, _ in report] == [("all", 0)]
+
+
+@pytest.mark.asyncio
+async def test_outbound_job_does_not_wait_for_maintenance(tmp_path):
+    db = BotDatabase(str(tmp_path / "bot.db"))
+    db.add_outbound_message("hi")
+
+    def slow_optimize(conn, now, limit):
+        time.sleep(0.5)
+        return 0
+
+    slow_optimize.exclusive = True
+    db._maintenance_optimize = slow_optimize
+    bot = make_bot(db)
+    bot.socket = object()
+    bot.channel.permissions = {"chat": -1}
+    sent = []
+
+    async def chat(msg):
+        sent.append(msg)
+
+    bot.chat = chat
+
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    tick_task = asyncio.ensure_future(ticker())
+    loop = asyncio.get_running_loop()
+    maintenance = loop.run_in_executor(None, db.maintenance_step, "optimize")
+    await asyncio.sleep(0.05)
+    await bot._process_outbound_messages()
+    assert sent == ["hi"]
+    assert not maintenance.done()
+    await maintenance
+    tick_task.cancel()
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.2
+    db.close()
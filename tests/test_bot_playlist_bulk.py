@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+
+from juiced.lib.bot import Bot
+from juiced.lib.error import ChannelError, DuplicateMediaError
+from juiced.lib.media_link import MediaLink
+from juiced.lib.playlist import PlaylistItem
+
+
+class ServerSocket:
+    """Answers playlist requests after a delay, like a CyTube server."""
+
+    def __init__(self, bot, fail_ids=()):
+        self.bot = bot
+        self.fail_ids = set(fail_ids)
+        self.emitted = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.next_uid = 100
+
+    async def emit(self, event, data, match_response=None, response_timeout=None):
+        self.emitted.append((event, data))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            for response in self.respond(event, data):
+                if match_response(*response):
+                    return response
+            return None
+        finally:
+            self.in_flight -= 1
+
+    def respond(self, event, data):
+        name = self.bot.user.name
+        if event == "queue":
+            if data["id"] in self.fail_ids:
+                return [("queueFail", {"msg": "bad", "link": "", "id": data["id"]})]
+            self.next_uid += 1
+            media = {"type": data["type"], "id": data["id"]}
+            item = {"uid": self.next_uid, "media": media, "queueby": name}
+            return [("queue", {"item": item, "after": None})]
+        if event == "delete":
+            return [("delete", {"uid": data})]
+        if event == "moveMedia":
+            return [("moveVideo", data)]
+        return []
+
+
+def make_bot():
+    bot = Bot("example.com", "chan", user="bot")
+    bot.channel.permissions.update(
+        {
+            "oplaylistadd": -1,
+            "oplaylistnext": -1,
+            "oplaylistdelete": -1,
+            "oplaylistmove": -1,
+        }
+    )
+    return bot
+
+
+def make_item(uid):
+    return PlaylistItem(
+        {
+            "uid": uid,
+            "temp": True,
+            "queueby": "bot",
+            "media": {"type": "yt", "id": str(uid), "title": "", "seconds": 0},
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_add_media_many_pipelines_and_correlates_failures():
+    bot = make_bot()
+    bot.socket = ServerSocket(bot, fail_ids={"c"})
+    links = [MediaLink("yt", name) for name in "abcdef"]
+
+    results = await bot.add_media_many(links, window=3)
+
+    assert [event for event, _ in bot.socket.emitted] == ["queue"] * 6
+    assert 1 < bot.socket.max_in_flight <= 3
+    assert isinstance(results[2], ChannelError)
+    for link, res in zip(links, results):
+        if link.id != "c":
+            assert res["item"]["media"]["id"] == link.id
+
+
+@pytest.mark.asyncio
+async def test_add_media_many_next_keeps_order():
+    bot = make_bot()
+    bot.socket = ServerSocket(bot)
+    links = [MediaLink("yt", name) for name in "abc"]
+    results = await bot.add_media_many(links, append=False)
+    assert [data["id"] for _, data in bot.socket.emitted] == ["c", "b", "a"]
+    assert [res["item"]["media"]["id"] for res in results] == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_remove_media_many_returns_per_item_results():
+    bot = make_bot()
+    bot.channel.playlist.queue = [make_item(uid) for uid in (1, 2, 3)]
+    bot.socket = ServerSocket(bot)
+    results = await bot.remove_media_many([1, 3, 9])
+    assert results[:2] == [None, None]
+    assert isinstance(results[2], ValueError)
+    assert bot.socket.emitted == [("delete", 1), ("delete", 3)]
+
+
+@pytest.mark.asyncio
+async def test_reorder_skips_items_in_place():
+    bot = make_bot()
+    bot.channel.playlist.queue = [make_item(uid) for uid in (1, 2, 3, 4)]
+    bot.socket = ServerSocket(bot)
+
+    results = await bot.reorder([1, 3, 2])
+
+    assert results == [None, None, None]
+    assert bot.socket.emitted == [("moveMedia", {"from": 3, "after": 1})]
+
+    # Replaying the moves on the local playlist gives the requested order
+    for _, data in bot.socket.emitted:
+        bot._on_moveVideo(None, data)
+    assert [item.uid for item in bot.channel.playlist.queue] == [1, 3, 2, 4]
+
+
+@pytest.mark.asyncio
+async def test_reorder_to_front():
+    bot = make_bot()
+    bot.channel.playlist.queue = [make_item(uid) for uid in (1, 2, 3)]
+    bot.socket = ServerSocket(bot)
+    await bot.reorder([3, 1])
+    for _, data in bot.socket.emitted:
+        bot._on_moveVideo(None, data)
+    assert [item.uid for item in bot.channel.playlist.queue] == [3, 1, 2]
+    assert bot.socket.emitted[0] == ("moveMedia", {"from": 3, "after": "prepend"})
+
+
+@pytest.mark.asyncio
+async def test_add_media_refuses_duplicates():
+    bot = make_bot()
+    bot.channel.playlist.queue = [make_item(uid) for uid in (1, 2)]
+    bot.socket = ServerSocket(bot)
+    assert bot.find_media(MediaLink("yt", "2")) == [bot.channel.playlist.get(2)]
+    assert bot.find_media("https://youtu.be/3") == []
+
+    with pytest.raises(DuplicateMediaError):
+        await bot.add_media(MediaLink("yt", "2"), duplicate=False)
+    # Links being added count too
+    links = [MediaLink("yt", name) for name in ("3", "4", "3", "1")]
+    results = await bot.add_media_many(links, duplicate=False)
+    assert [data["id"] for _, data in bot.socket.emitted] == ["3", "4"]
+    assert [type(res) for res in results[2:]] == [DuplicateMediaError] * 2
+    assert not bot._queueing
@@ -0,0 +1,74 @@
+from juiced.lib.bot import Bot
+
+
+class StatusDB:
+    def __init__(self):
+        self.writes = []
+
+    def update_current_status(self, **fields):
+        self.writes.append(fields)
+
+    def user_joined(self, username):
+        pass
+
+    def update_high_water_mark(self, chat_users, connected_users):
+        pass
+
+
+def make_bot(heartbeat=60):
+    bot = Bot("example.com", "chan", user="bot", status_heartbeat=heartbeat)
+    bot.db = StatusDB()
+    return bot
+
+
+def test_first_update_writes_full_status():
+    bot = make_bot()
+    fields = bot._update_current_status(now=0)
+    assert fields["bot_name"] == "bot"
+    assert fields["channel_name"] == "chan"
+    assert bot.db.writes == [fields]
+
+
+def test_unchanged_state_is_not_written():
+    bot = make_bot()
+    bot._update_current_status(now=0)
+    assert bot._update_current_status(now=10) == {}
+    assert bot._update_current_status(now=20) == {}
+    assert len(bot.db.writes) == 1
+
+
+def test_only_changed_fields_are_written():
+    bot = make_bot()
+    bot._update_current_status(now=0)
+
+    bot._on_addUser(None, {"name": "alice"})
+    assert bot._update_current_status(now=10) == {
+        "current_chat_users": 1,
+        "current_connected_users": 1,
+    }
+
+    bot._on_rank(None, 3)
+    assert bot._update_current_status(now=20) == {"bot_rank": 3}
+
+
+def test_version_change_without_field_change_writes_nothing():
+    bot = make_bot()
+    bot._update_current_status(now=0)
+    bot._on_setMotd(None, "hello")
+    assert bot.channel.version == 1
+    assert bot._update_current_status(now=10) == {}
+    assert len(bot.db.writes) == 1
+
+
+def test_heartbeat_writes_full_status():
+    bot = make_bot(heartbeat=30)
+    full = bot._update_current_status(now=0)
+    assert bot._update_current_status(now=29) == {}
+    assert bot._update_current_status(now=30) == full
+    assert len(bot.db.writes) == 2
+
+
+def test_blank_username_does_not_bump_version():
+    bot = make_bot()
+    bot._on_setAFK(None, {"name": "", "afk": True})
+    assert bot.channel.version == 0
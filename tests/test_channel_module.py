@@ -1,6 +1,6 @@
 import pytest
 
-from juiced.lib.channel import Channel
+from juiced.lib.channel import Channel, EmoteRegistry
 from juiced.lib.error import ChannelPermissionError
 from juiced.lib.user import User
 
@@ -21,3 +21,45 @@ def test_channel_str_and_permissions():
     # has_permission returns bool
     ch.permissions["act2"] = 0.0
     assert ch.has_permission("act2", u) is True
+
+
+def test_permitted_actions_match_check_permission():
+    ch = Channel("mychan")
+    ch.permissions.update({"chat": 0, "kick": 1.5, "motdedit": 3, "leaderctl": 1.49999})
+    for rank in (-1, 0, 1, 1.5, 2, 3):
+        user = User("alice", rank=rank)
+        assert ch.permitted_actions(rank) == {
+            action for action in ch.permissions if ch.has_permission(action, user)
+        }
+    assert ch.permitted_actions(1.5) == {"chat", "kick", "leaderctl"}
+
+
+def test_emote_registry_deltas():
+    emotes = EmoteRegistry([{"name": "#smile", "image": "a"}, {"name": ":)"}])
+    assert len(emotes) == 2 and "#smile" in emotes
+    assert emotes.find("#smile :) #smiley a:)") == ("#smile", ":)")
+
+    emotes.update({"name": "#smile", "image": "b"})
+    emotes.update({"name": "#Smirk"})
+    emotes.rename({"old": ":)", "name": "#grin", "image": "c"})
+    emotes.remove({"name": "#nope"})
+    assert [emote["name"] for emote in emotes] == ["#smile", "#grin", "#Smirk"]
+    assert emotes["#smile"]["image"] == "b"
+    assert emotes["#grin"] == {"name": "#grin", "image": "c"}
+    assert emotes.names.search("#s") == ["#smile", "#Smirk"]
+    assert emotes.find("hi :) #grin") == ("#grin",)
+
+    emotes.remove("#smile")
+    assert emotes.get("#smile") is None
+    assert list(emotes.names) == ["#grin", "#Smirk"]
+
+    # Renaming onto an existing name replaces it in place
+    emotes.update({"name": "#smile"})
+    emotes.rename({"old": "#grin", "name": "#smile", "image": "d"})
+    assert [emote["name"] for emote in emotes] == ["#smile", "#Smirk"]
+    assert emotes["#smile"]["image"] == "d"
+    assert list(emotes.names) == ["#smile", "#Smirk"]
+
+    # Iterating caches the order, renames keep the position
+    emotes.rename({"old": "#smile", "name": "#z"})
+    assert [emote["name"] for emote in emotes] == ["#z", "#Smirk"]
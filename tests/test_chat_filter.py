@@ -0,0 +1,83 @@
+import pytest
+
+from juiced.lib.bot import Bot
+from juiced.lib.chat_filter import ChatFilter
+
+
+def msg(username, text):
+    return {"username": username, "msg": text}
+
+
+def test_ignore_and_patterns():
+    chat_filter = ChatFilter(["Spammer"], [r"buy\s+now", "free <b>"])
+    assert chat_filter("chatMsg", msg("spammer", "hi")) is True
+    assert chat_filter("chatMsg", msg("alice", "BUY now")) is None
+    assert chat_filter("chatMsg", msg("alice", "buy  now!")) is True
+    assert chat_filter("chatMsg", msg("alice", "free <b>stuff</b>")) is True
+    assert chat_filter("chatMsg", msg("alice", "hello")) is None
+    assert chat_filter.checked == 5
+    assert chat_filter.hits == {
+        "user:Spammer": 1,
+        r"pattern:buy\s+now": 1,
+        "pattern:free <b>": 1,
+    }
+
+
+def test_patterns_are_checked_one_by_one():
+    chat_filter = ChatFilter(["troll"], ["(", "(?i)buy now", r"(\w)\1{4}", "free"])
+    assert list(chat_filter.rejected) == ["("]
+    assert chat_filter.patterns == ("(?i)buy now", r"(\w)\1{4}", "free")
+    assert chat_filter("chatMsg", msg("alice", "BUY NOW")) is True
+    assert chat_filter("chatMsg", msg("alice", "aaaaa")) is True
+    assert chat_filter("chatMsg", msg("alice", "ab free")) is True
+    assert chat_filter("chatMsg", msg("alice", "abab")) is None
+    assert chat_filter("chatMsg", msg("Troll", "hi")) is True
+    assert chat_filter.hits == {
+        "pattern:(?i)buy now": 1,
+        r"pattern:(\w)\1{4}": 1,
+        "pattern:free": 1,
+        "user:troll": 1,
+    }
+
+
+def test_repeats_are_collapsed_within_window(monkeypatch):
+    now = [0]
+    chat_filter = ChatFilter(repeat_window=10)
+    monkeypatch.setattr(chat_filter, "_time", lambda: now[0])
+
+    assert chat_filter("chatMsg", msg("alice", "spam")) is None
+    now[0] = 5
+    assert chat_filter("chatMsg", msg("alice", "spam")) == (
+        "chatMsgRepeat",
+        {"username": "alice", "msg": "spam", "count": 2},
+    )
+    # Other users and events are tracked separately
+    assert chat_filter("chatMsg", msg("bob", "spam")) is None
+    assert chat_filter("pm", msg("alice", "spam")) is None
+    # The window slides with every repeat
+    now[0] = 14
+    assert chat_filter("chatMsg", msg("alice", "spam"))[1]["count"] == 3
+    now[0] = 30
+    assert chat_filter("chatMsg", msg("alice", "spam")) is None
+    assert chat_filter.hits == {"repeat": 2}
+
+
+@pytest.mark.asyncio
+async def test_bot_filters_run_before_handlers():
+    bot = Bot("example.com", "chan", user="bot")
+    seen = []
+    bot.on("chatMsg", lambda e, d: seen.append((e, d["msg"])))
+    bot.on("chatMsgRepeat", lambda e, d: seen.append((e, d["count"])))
+    chat_filter = ChatFilter(["troll"], repeat_window=60)
+    bot.add_filter("chatMsg", chat_filter)
+    bot.add_filter("chatMsg", chat_filter)
+    assert bot.filters["chatMsg"] == [chat_filter]
+
+    await bot.trigger("chatMsg", msg("troll", "hi"))
+    await bot.trigger("chatMsg", msg("alice", "hi"))
+    await bot.trigger("chatMsg", msg("alice", "hi"))
+    assert seen == [("chatMsg", "hi"), ("chatMsgRepeat", 2)]
+
+    bot.remove_filter("chatMsg", chat_filter)
+    await bot.trigger("chatMsg", msg("troll", "hi"))
+    assert seen[-1] == ("chatMsg", "hi")
@@ -143,6 +143,20 @@ def test_uncloak_ip_with_start():
     assert "127.0.0.1" in res
 
 
+def test_uncloak_ip_is_cached():
+    util_mod._uncloak_cached.cache_clear()
+    util_mod._uncloak_table.cache_clear()
+    first = util_mod.uncloak_ip(util_mod.cloak_ip("10.1.2.3"))
+    assert "10.1.2.3" in first
+    # The first part table is shared with every other IP
+    util_mod.uncloak_ip(util_mod.cloak_ip("10.1.2.4"))
+    assert util_mod._uncloak_table.cache_info().hits >= 3
+
+    first.append("changed")
+    assert util_mod.uncloak_ip(util_mod.cloak_ip("10.1.2.3")) == ["10.1.2.3"]
+    assert util_mod._uncloak_cached.cache_info().hits == 1
+
+
 def test_messageparser_edge_cases():
     """Test MessageParser edge cases."""
     # Test with no markup
@@ -167,6 +181,66 @@ def test_messageparser_edge_cases():
     assert "nested" in out4
 
 
+def test_messageparser_tables_and_cache():
+    # Markup for any tag keeps its place in the definition order
+    markup = [
+        (None, {"class": "x"}, "<", ">"),
+        ("b", None, "*", "*"),
+        (None, None, "[", "]"),
+    ]
+    p = util_mod.MessageParser(markup=markup, cache_size=2)
+    assert p.parse('<b class="x">a</b><b>b</b><i>c</i>') == "<a>*b*[c]"
+    assert p.parse("plain & simple") == "plain & simple"
+    assert p.parse("plain text") == "plain text"
+    assert p.message == "plain text"
+
+    p.parse("<b>x</b>")
+    p.parse("<b>x</b>")
+    assert p._parse_cached.cache_info().hits == 1
+    assert p.message == "*x*"
+
+    p.markup = [("b", None, "_", "_")]
+    assert p.parse("<b>x</b>") == "_x_"
+
+
+def test_messageparser_spans():
+    Span = util_mod.Span
+    p = util_mod.MessageParser(cache_size=4)
+    text, spans = p.parse_spans(
+        '<strong>a <em>b</em></strong> <img src="http://x/i.png"> &amp; '
+        '<span class="spoiler">s</span> <code>c'
+    )
+    assert text == "a b  http://x/i.png  & s c"
+    assert spans == (
+        Span(0, 3, "bold", None),
+        Span(2, 3, "italic", None),
+        Span(5, 19, "link", "http://x/i.png"),
+        Span(23, 24, "spoiler", None),
+        Span(25, 26, "code", None),
+    )
+    assert p.parse_spans("plain") == ("plain", ())
+    # Spans and delimited text are cached separately
+    assert p.parse("<em>b</em>") == "_b_"
+    assert p.parse_spans("<em>b</em>") == ("b", (Span(0, 1, "italic", None),))
+    assert p.parse("<em>b</em>") == "_b_"
+
+
+def test_prefix_index():
+    index = util_mod.PrefixIndex(["Bob", "alice", "Alex", "bo", "alice"])
+    assert list(index) == ["Alex", "alice", "bo", "Bob"]
+    assert index.search("AL") == ["Alex", "alice"]
+    assert index.search("b", limit=1) == ["bo"]
+    assert index.search("z") == []
+    assert "bo" in index and "BO" not in index
+
+    index.add("Al")
+    index.add("Al")
+    index.discard("bo")
+    index.discard("nope")
+    assert list(index) == ["Al", "Alex", "alice", "Bob"]
+    assert len(index) == 4
+
+
 def test_uncloak_ip_auto_detect_start():
     """Test uncloak_ip with auto-detection of start index."""
     # Use a properly cloaked IP
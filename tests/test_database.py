@@ -0,0 +1,221 @@
+import sqlite3
+import threading
+
+import pytest
+
+from juiced.lib.database import BotDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = BotDatabase(str(tmp_path / "bot.db"))
+    yield database
+    database.close()
+
+
+def test_wal_mode(db):
+    assert db._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_user_tracking(db):
+    db.user_joined("alice")
+    db.user_chat_message("alice", "hello")
+    db.user_chat_message("bob", "hi")
+    db.user_left("alice")
+    db.flush()
+
+    alice = db.get_user_stats("alice")
+    assert alice["total_chat_lines"] == 1
+    assert alice["current_session_start"] is None
+    assert db.get_user_stats("bob")["total_chat_lines"] == 1
+    assert db.get_user_stats("nobody") is None
+    assert [m["message"] for m in db.get_recent_chat()] == ["hello", "hi"]
+
+
+def test_high_water_mark_only_increases(db):
+    db.update_high_water_mark(5, 10)
+    db.update_high_water_mark(3, 12)
+    db.flush()
+    assert db.get_high_water_mark() == 5
+    assert db.get_high_water_mark_connected() == 12
+
+
+def test_user_count_history(db):
+    db.log_user_count(4, 9)
+    db.flush()
+    history = db.get_user_count_history(hours=1)
+    assert [(h["chat_users"], h["connected_users"]) for h in history] == [(4, 9)]
+
+
+def test_update_current_status_partial(db):
+    db.update_current_status(bot_name="bot", current_chat_users=3)
+    db.update_current_status(current_chat_users=4)
+    db.flush()
+    status = db.get_current_status()
+    assert status["bot_name"] == "bot"
+    assert status["current_chat_users"] == 4
+    assert status["last_updated"] is not None
+
+    with pytest.raises(ValueError):
+        db.update_current_status(nope=1)
+
+
+def test_outbound_messages(db):
+    first = db.add_outbound_message("one")
+    second = db.add_outbound_message("two")
+    third = db.add_outbound_message("three")
+
+    messages = db.get_unsent_outbound_messages(limit=20, max_retries=3)
+    assert [m["id"] for m in messages] == [first, second, third]
+    assert messages[0]["message"] == "one"
+    assert messages[0]["retry_count"] == 0
+
+    db.mark_outbound_sent(first)
+    db.mark_outbound_failed(second, "muted", is_permanent=True)
+    db.mark_outbound_failed(third, "timeout", is_permanent=False)
+
+    # The transient failure backs off before it is due again
+    assert db.get_unsent_outbound_messages() == []
+
+    db.retry_delay = 0
+    db.add_outbound_message("four")
+    db.mark_outbound_failed(third, "timeout", is_permanent=False)
+    db.flush()
+    messages = db.get_unsent_outbound_messages(max_retries=5)
+    assert [(m["message"], m["retry_count"]) for m in messages] == [
+        ("three", 2),
+        ("four", 0),
+    ]
+    # Messages that used up their retries are skipped
+    messages = db.get_unsent_outbound_messages(max_retries=2)
+    assert [m["message"] for m in messages] == ["four"]
+
+
+def test_outbound_reads_do_not_wait_for_the_writer(db):
+    first = db.add_outbound_message("one")
+    second = db.add_outbound_message("two")
+    release = threading.Event()
+    db._submit([(lambda conn: release.wait(5), ())])
+    db.mark_outbound_sent(first)
+
+    # Served while the writer is busy, without the message being marked
+    messages = db.get_unsent_outbound_messages(limit=1)
+    assert [m["id"] for m in messages] == [second]
+    release.set()
+    db.flush()
+    assert [m["id"] for m in db.get_unsent_outbound_messages()] == [second]
+
+
+def test_write_batch_runs_in_one_transaction(db):
+    db.write_batch(
+        [
+            ("user_joined", ("alice",)),
+            ("user_chat_message", ("alice", "hi")),
+            ("update_high_water_mark", (1, 2)),
+        ]
+    )
+    db.flush()
+    assert db.get_user_stats("alice")["total_chat_lines"] == 1
+    assert db.get_high_water_mark() == 1
+
+    with pytest.raises(ValueError):
+        db.write_batch([("drop_everything", ())])
+
+
+def test_failed_commit_fails_the_batch_and_keeps_the_writer(db):
+    class FailingCommit:
+        def __init__(self, conn):
+            self.conn = conn
+            self.fail = True
+
+        def execute(self, sql, *args):
+            if sql == "COMMIT" and self.fail:
+                self.fail = False
+                raise sqlite3.OperationalError("disk I/O error")
+            return self.conn.execute(sql, *args)
+
+        def __getattr__(self, name):
+            return getattr(self.conn, name)
+
+    db._conn = FailingCommit(db._conn)
+    with pytest.raises(sqlite3.OperationalError):
+        db.write_batch([("user_joined", ("alice",))]).result(timeout=5)
+    assert db.get_user_stats("alice") is None
+
+    db.write_batch([("user_joined", ("bob",))]).result(timeout=5)
+    assert db.get_user_stats("bob") is not None
+    db._conn = db._conn.conn
+
+
+def test_perform_maintenance(db):
+    db.chat_history_size = 2
+    for i in range(5):
+        db.user_chat_message("alice", str(i))
+    log = db.perform_maintenance()
+    assert "removed 3 chat rows" in log
+    assert [m["message"] for m in db.get_recent_chat()] == ["3", "4"]
+
+
+def test_memory_database():
+    database = BotDatabase(":memory:")
+    database.update_high_water_mark(7, 7)
+    assert database.get_high_water_mark() == 7
+    database.close()
+
+
+def test_close_stops_writer(tmp_path):
+    database = BotDatabase(str(tmp_path / "bot.db"))
+    database.user_joined("alice")
+    database.close()
+    assert not database._writer.is_alive()
+    with pytest.raises(sqlite3.ProgrammingError):
+        database.user_joined("bob")
+
+    reopened = BotDatabase(str(tmp_path / "bot.db"))
+    assert reopened.get_user_stats("alice") is not None
+    reopened.close()
+
+
+def test_maintenance_step_is_chunked(db):
+    db.chat_history_size = 2
+    for i in range(7):
+        db.user_chat_message("alice", str(i))
+    assert db.maintenance_step("chat", limit=2) == 2
+    assert db.maintenance_step("chat", limit=2) == 2
+    assert db.maintenance_step("chat", limit=2) == 1
+    assert db.maintenance_step("chat", limit=2) == 0
+    assert [m["message"] for m in db.get_recent_chat()] == ["5", "6"]
+
+    with pytest.raises(ValueError):
+        db.maintenance_step("drop_everything")
+
+
+def test_incremental_vacuum_frees_pages(db):
+    assert db._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    db.chat_history_size = 0
+    for i in range(200):
+        db.user_chat_message("alice", "x" * 2000)
+    assert db.maintenance_step("chat", limit=None) == 200
+    freed = db.maintenance_step("vacuum", limit=10)
+    assert freed == 10
+    assert db.maintenance_step("vacuum", limit=None) > 0
+    assert db._conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+
+def test_vacuum_converts_old_databases(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE filler (data TEXT)")
+    conn.executemany("INSERT INTO filler VALUES (?)", [("x" * 2000,)] * 50)
+    conn.commit()
+    conn.execute("DELETE FROM filler")
+    conn.commit()
+    conn.close()
+
+    database = BotDatabase(path)
+    assert database._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    assert database.maintenance_step("vacuum", limit=10) > 0
+    assert database._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert database._conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    assert database.maintenance_step("vacuum", limit=10) == 0
+    database.close()
@@ -0,0 +1,45 @@
+import pytest
+
+from juiced.lib.highlight import Highlighter
+
+
+@pytest.mark.parametrize("size", [3, 40])
+def test_search_finds_overlapping_keywords(size):
+    # Below and above Highlighter.LINEAR_KEYWORDS
+    filler = ["filler%d" % i for i in range(size)]
+    highlighter = Highlighter(["he", "She", "his", "hers"] + filler)
+    assert highlighter.search("uSHers said hi") == ("She", "he", "hers")
+    assert highlighter.search("nothing here") == ("he",)
+    assert highlighter.search("") == ()
+
+
+@pytest.mark.parametrize("size", [1, 40])
+def test_search_whole_words(size):
+    words = ["al"] + ["filler%d" % i for i in range(size)]
+    highlighter = Highlighter(words, whole_words=True)
+    assert highlighter.search("also") == ()
+    assert highlighter.search("also al_x Al!") == ("al",)
+
+
+@pytest.mark.parametrize("size", [1, 40])
+def test_search_offsets_survive_case_folding(size):
+    # "İ" lower cases to two characters
+    words = ["bot"] + ["filler%d" % i for i in range(size)]
+    highlighter = Highlighter(words, ["x"])
+    assert highlighter.search("İİİİİİ bot x") == ("bot", "x")
+    assert Highlighter(["istanbul"] + words).search("İSTANBUL") == ("istanbul",)
+
+
+def test_search_case_sensitive():
+    highlighter = Highlighter(["Al"], ignore_case=False)
+    assert highlighter.search("al") == ()
+    assert highlighter.search("hi Al") == ("Al",)
+
+
+def test_patterns_in_match_order():
+    highlighter = Highlighter(["bot"], [r"\bv\d+\b", "nope"])
+    assert highlighter.search("v2 of the BOT") == (r"\bv\d+\b", "bot")
+    assert len(highlighter) == 3
+
+    with pytest.raises(ValueError):
+        Highlighter(patterns=["("])
@@ -1,3 +1,5 @@
+import copy
+
 import pytest
 
 from juiced.lib.media_link import MediaLink
@@ -53,3 +55,36 @@ def test_medialink_equality():
     assert not (ml1 == ml3)
     assert not (ml1 == ml4)
     assert not (ml1 == "yt:abc")  # Not a MediaLink instance
+
+
+def test_medialink_is_shared_and_hashable():
+    """Test MediaLink flyweights."""
+    ml1 = MediaLink("yt", "abc")
+    assert MediaLink("yt", "abc") is ml1
+    assert MediaLink.from_url("https://youtu.be/abc") is ml1
+    assert {ml1, MediaLink("yt", "abc"), MediaLink("yt", "xyz")} == {
+        ml1,
+        MediaLink("yt", "xyz"),
+    }
+    with pytest.raises(AttributeError):
+        ml1.id = "xyz"
+    assert copy.copy(ml1) is ml1
+
+
+def test_from_url_resolver_keeps_pattern_order():
+    """Patterns are tried in URL_TO_LINK order for the host, then for any."""
+    ml = MediaLink.from_url("https://example.com/r?u=youtu.be/abc")
+    assert (ml.type, ml.id) == ("yt", "abc")
+    ml = MediaLink.from_url("https://clips.twitch.tv/Clip")
+    assert (ml.type, ml.id) == ("tc", "Clip")
+    ml = MediaLink.from_url("https://www.twitch.tv/videos/123")
+    assert (ml.type, ml.id) == ("tv", "v123")
+    ml = MediaLink.from_url("https://x.example.com/a.m3u8")
+    assert ml.type == "hl"
+    assert MediaLink.from_url(" yt:abc ") is MediaLink("yt", "abc")
+    ml = MediaLink.from_url("https://streamable.com/live.m3u8")
+    assert ml.type == "hl"
+    ml = MediaLink.from_url("www.youtube.com/watch?v=abc")
+    assert (ml.type, ml.id) == ("yt", "abc")
+    ml = MediaLink.from_url("https://youtube.com/redirect?u=vimeo.com/42")
+    assert (ml.type, ml.id) == ("vi", "42")
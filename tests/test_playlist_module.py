@@ -1,3 +1,6 @@
+import pytest
+
+from juiced.lib.media_link import MediaLink
 from juiced.lib.playlist import Playlist, PlaylistItem
 
 
@@ -10,6 +13,13 @@ def make_item_data(uid, title="t", seconds=10, queueby="u"):
     }
 
 
+def test_playlist_item_is_compact():
+    it = PlaylistItem(make_item_data(1))
+    assert not hasattr(it, "__dict__")
+    assert it.link is PlaylistItem(make_item_data(1)).link
+    assert (it.type, it.id) == ("yt", "id1")
+
+
 def test_playlist_item_and_eq_and_str():
     data = make_item_data(1, "Title")
     it = PlaylistItem(data)
@@ -39,3 +49,207 @@ def test_playlist_add_get_remove_move_clear():
 
     pl.clear()
     assert pl.queue == []
+
+
+def uids(pl):
+    return [item.uid for item in pl.queue]
+
+
+def test_playlist_order_and_lookup():
+    pl = Playlist()
+    for uid in (1, 2, 3):
+        pl.add(None, make_item_data(uid))
+    pl.add(1, make_item_data(4))
+    pl.add("prepend", make_item_data(5))
+    assert uids(pl) == [5, 1, 4, 2, 3]
+    assert [item.uid for item in pl] == uids(pl)
+    assert len(pl) == 5
+    assert 4 in pl and 9 not in pl
+    assert pl.index(2) == 3
+    assert pl.get(4).link.id == "id4"
+
+    pl.move(5, 3)
+    pl.move(2, "prepend")
+    assert uids(pl) == [2, 1, 4, 3, 5]
+    assert pl.index(5) == 4
+
+    with pytest.raises(ValueError):
+        pl.get(9)
+    with pytest.raises(ValueError):
+        pl.remove(9)
+    with pytest.raises(ValueError):
+        pl.move(1, 1)
+
+
+def test_playlist_add_replaces_existing_uid():
+    pl = Playlist()
+    pl.add(None, make_item_data(1))
+    pl.add(None, make_item_data(2))
+    pl.add(None, make_item_data(1, title="new"))
+    assert uids(pl) == [2, 1]
+    assert pl.get(1).title == "new"
+
+
+def test_playlist_remove_current_and_queue_assignment():
+    pl = Playlist()
+    pl.queue = [PlaylistItem(make_item_data(uid)) for uid in (1, 2)]
+    pl.current = 2
+    pl.paused = False
+    pl.remove(2)
+    assert pl.current is None
+    assert pl.paused is True
+    assert uids(pl) == [1]
+
+    pl.clear()
+    assert len(pl) == 0
+    assert pl  # an empty playlist is still truthy
+
+
+def test_playlist_aggregates():
+    pl = Playlist()
+    pl.add(None, make_item_data(1, seconds=10, queueby="a"))
+    pl.add(None, make_item_data(2, seconds=20, queueby="b"))
+    pl.add(None, make_item_data(3, seconds=30, queueby="a"))
+    assert pl.total_duration == 60
+    assert pl.temp_count == 0
+    assert pl.permanent_count == 3
+    assert pl.user_counts == {"a": 2, "b": 1}
+
+    pl.set_temp(2, True)
+    pl.set_temp(2, True)
+    assert pl.temp_count == 1
+
+    pl.move(1, 3)
+    assert pl.total_duration == 60
+    assert pl.user_counts == {"a": 2, "b": 1}
+
+    pl.remove(2)
+    assert pl.total_duration == 40
+    assert pl.temp_count == 0
+    assert pl.user_counts == {"a": 2}
+
+    pl.clear()
+    assert (pl.total_duration, pl.temp_count, pl.user_counts) == (0, 0, {})
+
+
+def test_playlist_positions_and_times():
+    pl = Playlist()
+    for uid, seconds in ((1, 10), (2, 20), (3, 30)):
+        pl.add(None, make_item_data(uid, seconds=seconds))
+    assert pl.current_index is None
+    assert pl.remaining_time == 60
+    assert pl.time_until(3) == 30
+
+    pl.current = 2
+    pl.current_time = 5
+    assert pl.current_index == 1
+    assert pl.remaining_time == 45
+    assert pl.time_until(2) == 0
+    assert pl.time_until(3) == 15
+    # Item 1 plays after wrapping around
+    assert pl.time_until(1) == 45
+
+    pl.move(3, "prepend")
+    assert pl.current_index == 2
+    assert pl.time_until(3) == 15
+    assert pl.index(1) == 1
+
+
+def test_playlist_lazy_items_are_built_on_access():
+    pl = Playlist()
+    for uid in range(1, 4):
+        pl.add(None, make_item_data(uid, seconds=uid * 10, queueby="a"))
+    assert all(node._item is None for node in pl._nodes.values())
+
+    # Lookups, totals and positions work from the stored fields
+    assert 2 in pl
+    assert len(pl) == 3
+    assert pl.total_duration == 60
+    assert pl.user_counts == {"a": 3}
+    assert pl.index(3) == 2
+    assert pl.time_until(3) == 30
+    pl.move(1, 3)
+    pl.remove(2)
+    assert pl.total_duration == 40
+    assert all(node._item is None for node in pl._nodes.values())
+
+    item = pl.get(3)
+    assert isinstance(item, PlaylistItem)
+    assert (item.uid, item.duration, item.username) == (3, 30, "a")
+    assert item.link.id == "id3"
+    assert pl.get(3) is item
+    assert pl._nodes[1]._item is None
+    assert [it.uid for it in pl.queue] == [3, 1]
+
+
+def test_playlist_eager():
+    pl = Playlist(lazy=False)
+    pl.add(None, make_item_data(1))
+    assert isinstance(pl._nodes[1]._item, PlaylistItem)
+
+
+def test_playlist_reconcile_keeps_unchanged_items():
+    pl = Playlist(lazy=False)
+    for uid in range(1, 6):
+        pl.add(None, make_item_data(uid))
+    items = {uid: pl.get(uid) for uid in range(1, 6)}
+    pl.current = 3
+
+    data = [make_item_data(uid) for uid in (2, 1, 3, 6, 5)]
+    data[2]["temp"] = True
+    data[4]["media"]["title"] = "changed"
+    changes = pl.reconcile(data)
+
+    assert [it.uid for it in pl.queue] == [2, 1, 3, 6, 5]
+    assert pl.get(1) is items[1] and pl.get(3) is items[3]
+    assert pl.get(5) is not items[5] and pl.get(5).title == "changed"
+    assert pl.current is items[3]
+    assert pl.temp_count == 1
+    assert changes == [
+        ("delete", {"uid": 4}),
+        ("setTemp", {"uid": 3, "temp": True}),
+        ("delete", {"uid": 5}),
+        ("moveVideo", {"from": 2, "after": "prepend"}),
+        ("queue", {"item": data[3], "after": 3}),
+        ("queue", {"item": data[4], "after": 6}),
+    ]
+    assert pl.reconcile(data) == []
+
+
+def test_playlist_reconcile_changes_replay_to_same_order():
+    import random
+
+    rnd = random.Random(3)
+    for _ in range(50):
+        pl = Playlist()
+        for uid in rnd.sample(range(30), 15):
+            pl.add(None, make_item_data(uid))
+        replay = Playlist()
+        replay.queue = list(pl.queue)
+        data = [make_item_data(uid) for uid in rnd.sample(range(30), 15)]
+        changes = pl.reconcile(data)
+        assert [it.uid for it in pl] == [d["uid"] for d in data]
+        for event, change in changes:
+            if event == "delete":
+                replay.remove(change["uid"])
+            elif event == "queue":
+                replay.add(change["after"], change["item"])
+            elif event == "moveVideo":
+                replay.move(change["from"], change["after"])
+        assert [it.uid for it in replay] == [d["uid"] for d in data]
+
+
+def test_playlist_find_media_link():
+    pl = Playlist()
+    for uid, media_id in ((1, "a"), (2, "b"), (3, "a")):
+        data = make_item_data(uid)
+        data["media"]["id"] = media_id
+        pl.add(None, data)
+    assert [it.uid for it in pl.find(MediaLink("yt", "a"))] == [1, 3]
+    assert pl.find(MediaLink("vi", "a")) == []
+    pl.remove(1)
+    assert [it.uid for it in pl.find(MediaLink("yt", "a"))] == [3]
+    pl.remove(3)
+    assert pl.find(MediaLink("yt", "a")) == []
+    pl.clear()
+    assert pl.find(MediaLink("yt", "b")) == []
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from juiced.lib.bot import Bot
+from juiced.lib.rate_limit import TokenBucket
+
+
+@pytest.mark.asyncio
+async def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket()
+    for _ in range(100):
+        assert await bucket.acquire() == 0
+    assert bucket.acquired == 100
+    assert bucket.max_wait == 0
+
+
+@pytest.mark.asyncio
+async def test_burst_then_sustained_rate():
+    bucket = TokenBucket(rate=100, burst=3)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for _ in range(3):
+        await bucket.acquire()
+    assert loop.time() - start < 0.01
+
+    for _ in range(3):
+        await bucket.acquire()
+    # Three more tokens at 100/s take about 30 ms
+    assert loop.time() - start >= 0.029
+    assert bucket.max_wait > 0
+    assert bucket.average_wait > 0
+
+
+@pytest.mark.asyncio
+async def test_bursts_are_queued_in_order():
+    bucket = TokenBucket(rate=200, burst=1)
+    order = []
+
+    async def send(i):
+        await bucket.acquire()
+        order.append(i)
+
+    tasks = [asyncio.ensure_future(send(i)) for i in range(5)]
+    await asyncio.sleep(0)
+    assert bucket.queued >= 4
+    await asyncio.gather(*tasks)
+    assert order == [0, 1, 2, 3, 4]
+    assert bucket.queued == 0
+    assert bucket.max_queued == 4
+
+
+@pytest.mark.asyncio
+async def test_drain_empties_bucket():
+    bucket = TokenBucket(rate=100, burst=5)
+    bucket.drain()
+    assert bucket.tokens < 1
+    assert await bucket.acquire() > 0
+
+
+@pytest.mark.asyncio
+async def test_configure_keeps_tokens():
+    bucket = TokenBucket(rate=1, burst=5)
+    bucket.drain()
+    bucket.configure(2, 5)
+    assert bucket.tokens < 1
+    bucket.configure(2, 3)
+    assert bucket.tokens < 1
+
+    bucket = TokenBucket(rate=1, burst=5)
+    bucket.configure(1, 2)
+    assert bucket.tokens == 2
+    bucket.configure(None)
+    bucket.configure(1, 4)
+    assert bucket.tokens == 4
+
+
+def test_channel_options_configure_chat_limiter():
+    bot = Bot("example.com", "chan", user="bot")
+    assert bot.chat_limiter.rate is None
+
+    bot._on_channelOpts(
+        None,
+        {
+            "chat_antiflood": True,
+            "chat_antiflood_params": {"burst": 3, "sustained": 2, "cooldown": 2},
+        },
+    )
+    assert bot.chat_limiter.burst == 3
+    assert bot.chat_limiter.rate == pytest.approx(2 * bot.ANTIFLOOD_MARGIN)
+
+    bot._on_channelOpts(None, {"chat_antiflood": True})
+    assert bot.chat_limiter.burst == bot.ANTIFLOOD_BURST
+
+    bot._on_channelOpts(None, {"chat_antiflood": False})
+    assert bot.chat_limiter.rate is None
+
+
+def test_moderators_are_not_paced():
+    bot = Bot("example.com", "chan", user="bot")
+    bot._on_channelOpts(None, {"chat_antiflood": True})
+    assert bot.chat_limiter.rate is not None
+
+    bot._on_rank(None, 2)
+    assert bot.chat_limiter.rate is None
+    bot._on_rank(None, 1)
+    assert bot.chat_limiter.burst == bot.ANTIFLOOD_BURST
+    assert bot.chat_limiter.rate == pytest.approx(
+        bot.ANTIFLOOD_SUSTAINED * bot.ANTIFLOOD_MARGIN
+    )
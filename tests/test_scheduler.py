@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from juiced.lib.scheduler import Scheduler
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_periodically_and_collect_metrics():
+    scheduler = Scheduler()
+    calls = []
+
+    async def async_job():
+        calls.append("async")
+
+    sync = scheduler.add("sync", lambda: calls.append("sync"), 0.01, delay=0)
+    scheduler.add("async", async_job, 0.01, delay=0)
+    scheduler.start()
+    await asyncio.sleep(0.055)
+    await scheduler.stop()
+
+    assert calls.count("sync") >= 3
+    assert calls.count("async") >= 3
+    assert sync.runs == calls.count("sync")
+    assert sync.failures == 0
+    assert sync.max_duration >= sync.last_duration >= 0
+    assert not scheduler.running
+
+
+@pytest.mark.asyncio
+async def test_overlapping_runs_are_skipped():
+    scheduler = Scheduler()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+
+    job = scheduler.add("slow", slow, 0.01, delay=0)
+    scheduler.start()
+    await asyncio.sleep(0.035)
+    assert job.running
+    assert job.skipped >= 2
+    assert job.runs == 0
+    await scheduler.stop()
+    assert not job.running
+
+
+@pytest.mark.asyncio
+async def test_failures_are_recorded_and_job_keeps_running():
+    scheduler = Scheduler()
+
+    def fail():
+        raise RuntimeError("boom")
+
+    job = scheduler.add("fail", fail, 0.01, delay=0)
+    scheduler.start()
+    await asyncio.sleep(0.025)
+    await scheduler.stop()
+    assert job.failures >= 2
+    assert job.runs == job.failures
+    assert isinstance(job.last_error, RuntimeError)
+
+
+@pytest.mark.asyncio
+async def test_add_and_remove_while_running():
+    scheduler = Scheduler()
+    calls = []
+    scheduler.start()
+    scheduler.add("late", lambda: calls.append(1), 10, delay=0)
+    await asyncio.sleep(0.01)
+    assert calls == [1]
+
+    scheduler.remove("late")
+    scheduler.add("other", lambda: calls.append(2), 0.01, delay=0.01)
+    await asyncio.sleep(0.015)
+    await scheduler.stop()
+    assert calls[0] == 1 and set(calls[1:]) == {2}
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_running_jobs_in_parallel():
+    scheduler = Scheduler()
+    cancelled = []
+
+    async def forever(name):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(name)
+            raise
+
+    for name in ("a", "b", "c"):
+        scheduler.add(name, lambda name=name: forever(name), 60, delay=0)
+    scheduler.start()
+    await asyncio.sleep(0.01)
+    await asyncio.wait_for(scheduler.stop(), 1)
+    assert sorted(cancelled) == ["a", "b", "c"]
+
+
+def test_add_validates_arguments():
+    scheduler = Scheduler()
+    scheduler.add("job", lambda: None, 1)
+    with pytest.raises(ValueError):
+        scheduler.add("job", lambda: None, 1)
+    with pytest.raises(ValueError):
+        scheduler.add("zero", lambda: None, 0)
+    with pytest.raises(KeyError):
+        scheduler.remove("missing")
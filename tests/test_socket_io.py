@@ -4,8 +4,17 @@ import json
 import pytest
 import websockets.exceptions
 
-from juiced.lib.error import ConnectionClosed, PingTimeout, SocketIOError
+from juiced.lib.bot import Bot
+from juiced.lib.error import (
+    ChannelError,
+    ChannelPermissionError,
+    ConnectionClosed,
+    PingTimeout,
+    SocketIOError,
+)
+from juiced.lib.media_link import MediaLink
 from juiced.lib.socket_io import SocketIO, SocketIOResponse
+from juiced.lib.user import User
 
 
 class FakeWebSocket:
@@ -404,6 +413,100 @@ async def test_recv_task_response_matching():
     await sio.close()
 
 
+async def wait_responses(sio, count):
+    while len(sio.response) < count:
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_recv_task_sets_every_matching_response():
+    loop = asyncio.get_running_loop()
+    ws = FakeWebSocket()
+    config = {"pingInterval": 100000, "pingTimeout": 100000}
+    sio = SocketIO(ws, config, qsize=10, loop=loop)
+
+    first = SocketIOResponse(lambda e, d: e == "errorMsg")
+    second = SocketIOResponse(lambda e, d: e == "errorMsg")
+    sio.response.extend([first, second])
+    ws._recv_q.put_nowait('42["errorMsg",{"msg":"no"}]')
+
+    assert await first.future == ("errorMsg", {"msg": "no"})
+    assert await second.future == ("errorMsg", {"msg": "no"})
+    await sio.close()
+
+
+@pytest.mark.asyncio
+async def test_recv_task_sets_one_exclusive_response_per_event():
+    loop = asyncio.get_running_loop()
+    ws = FakeWebSocket()
+    config = {"pingInterval": 100000, "pingTimeout": 100000}
+    sio = SocketIO(ws, config, qsize=10, loop=loop)
+
+    def match(event, data):
+        return event == "queueFail"
+
+    match.exclusive = True
+    first = SocketIOResponse(match)
+    second = SocketIOResponse(match)
+    broad = SocketIOResponse(lambda e, d: e == "queueFail")
+    sio.response.extend([first, second, broad])
+
+    ws._recv_q.put_nowait('42["queueFail",{"msg":"one"}]')
+    assert await first.future == ("queueFail", {"msg": "one"})
+    assert await broad.future == ("queueFail", {"msg": "one"})
+    assert not second.future.done()
+
+    ws._recv_q.put_nowait('42["queueFail",{"msg":"two"}]')
+    assert await second.future == ("queueFail", {"msg": "two"})
+    await sio.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_pm_and_kick_both_get_error():
+    loop = asyncio.get_running_loop()
+    ws = FakeWebSocket()
+    config = {"pingInterval": 100000, "pingTimeout": 100000}
+    bot = Bot("example.com", "chan", user="bot")
+    bot.socket = SocketIO(ws, config, qsize=10, loop=loop)
+    bot.channel.permissions.update({"chat": -1, "kick": -1})
+    bot.user.rank = 100
+    bot.channel.userlist.add(User("alice", rank=0))
+
+    pm = loop.create_task(bot.pm("alice", "hi"))
+    kick = loop.create_task(bot.kick("alice"))
+    await wait_responses(bot.socket, 2)
+    ws._recv_q.put_nowait('42["errorMsg",{"msg":"no"}]')
+
+    with pytest.raises(ChannelError, match="no"):
+        await pm
+    with pytest.raises(ChannelPermissionError, match="no"):
+        await kick
+    await bot.socket.close()
+
+
+@pytest.mark.asyncio
+async def test_queue_fail_without_id_fails_one_add():
+    loop = asyncio.get_running_loop()
+    ws = FakeWebSocket()
+    config = {"pingInterval": 100000, "pingTimeout": 100000}
+    bot = Bot("example.com", "chan", user="bot")
+    bot.socket = SocketIO(ws, config, qsize=10, loop=loop)
+    bot.channel.permissions["oplaylistadd"] = -1
+
+    first = loop.create_task(bot.add_media(MediaLink("yt", "a")))
+    second = loop.create_task(bot.add_media(MediaLink("yt", "b")))
+    await wait_responses(bot.socket, 2)
+    ws._recv_q.put_nowait('42["queueFail",{"msg":"bad"}]')
+
+    with pytest.raises(ChannelError, match="bad"):
+        await first
+    await asyncio.sleep(0.05)
+    assert not second.done()
+    await bot.socket.close()
+    with pytest.raises(ConnectionClosed):
+        await second
+
+
 @pytest.mark.asyncio
 async def test_connect_with_retry():
     """Test connect with retry logic."""
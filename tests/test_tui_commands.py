@@ -53,6 +53,16 @@ class SimplePlaylist:
         self._current = current
         self.paused = False
 
+    def __len__(self):
+        return len(self.queue)
+
+    def __iter__(self):
+        return iter(self.queue)
+
+    @property
+    def total_duration(self):
+        return sum(item.duration for item in self.queue)
+
     @property
     def current(self):
         return self._current
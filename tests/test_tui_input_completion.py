@@ -127,3 +127,42 @@ async def test_process_command_sends_chat_and_handles_slash(monkeypatch):
     await bot.process_command()
     await asyncio.sleep(0.01)
     assert called.get("slash") == "/help"
+
+
+def test_emote_completion_follows_single_emote_events():
+    bot = make_bot()
+
+    async def events():
+        emotes = [{"name": "#smile"}, {"name": "#sad"}]
+        await bot.trigger("emoteList", emotes)
+        await bot.trigger("updateEmote", {"name": "#smirk"})
+        await bot.trigger("renameEmote", {"old": "#sad", "name": "#sob"})
+        await bot.trigger("removeEmote", {"name": "#smile"})
+
+    asyncio.run(events())
+    assert list(bot.emotes) == ["#smirk", "#sob"]
+    assert bot._get_completion_matches("#S", is_emote=True) == ["#smirk", "#sob"]
+
+
+def test_username_completion_ranks_recent_speakers_first():
+    from juiced.lib.user import User, UserList
+
+    bot = make_bot()
+    users = UserList()
+    for name in ("alex", "Alice", "alfred", "bob"):
+        users.add(User(name))
+    bot.channel = SimpleNamespace(userlist=users)
+    assert bot._get_completion_matches("al", is_emote=False) == [
+        "alex",
+        "alfred",
+        "Alice",
+    ]
+
+    bot._add_speaker("alfred")
+    bot._add_speaker("Alice")
+    bot._add_speaker("bob")
+    assert bot._get_completion_matches("AL", is_emote=False) == [
+        "Alice",
+        "alfred",
+        "alex",
+    ]
@@ -1,3 +1,4 @@
+import asyncio
 from types import SimpleNamespace
 
 
@@ -76,6 +77,166 @@ def test_render_chat_wraps_long_lines(monkeypatch):
     assert long_msg[-10:] in joined
 
 
+def test_chat_spans_are_styled_per_wrapped_line(monkeypatch):
+    bot = make_bot()
+
+    class StyleTerm(FakeTerm):
+        def bold(self, s=""):
+            return "<b>%s</b>" % s
+
+        def underline(self, s=""):
+            return "<u>%s</u>" % s
+
+    bot.term = StyleTerm(width=47, height=12)
+    bot.user = None
+    out = capture_prints(monkeypatch)
+
+    msg = 'aaaa <strong>bb cc</strong> <a href="u">x</a>'
+    asyncio.run(bot.handle_chat("chatMsg", {"username": "al", "msg": msg}))
+    assert bot.chat_history[-1]["message"] == "aaaa bb cc  u x"
+    joined = "\n".join(out)
+    # The bold span is split across the wrap point
+    assert "<b>bb</b>" in joined and "<b>cc</b>" in joined
+    assert "<u>u</u>" in joined
+
+
+def test_highlights_are_classified_once(monkeypatch):
+    bot = make_bot()
+    bot.term = FakeTerm()
+    bot.user = SimpleNamespace(name="Me")
+    bot.highlight_words = ["pizza"]
+    monkeypatch.setattr(bot, "render_chat", lambda: None)
+    monkeypatch.setattr(bot, "render_input", lambda: None)
+
+    bot.add_chat_line("al", "hey me")
+    bot.add_chat_line("al", "PIZZA now")
+    bot.add_chat_line("al", "nothing")
+    assert [m["highlights"] for m in bot.chat_history] == [("Me",), ("pizza",), ()]
+
+    # The highlighter is rebuilt when the name changes
+    bot.user.name = "al"
+    assert bot.get_highlights("hey al") == ("al",)
+
+
+def test_highlights_follow_name_and_settings(monkeypatch):
+    bot = make_bot()
+    bot.term = FakeTerm()
+    bot.user = SimpleNamespace(name="Me")
+    bot.highlight_words = ["pizza"]
+    capture_prints(monkeypatch)
+
+    for text in ("hey me", "hi al", "PIZZA"):
+        bot.add_chat_line("bo", text)
+    assert [m["highlights"] for m in bot.chat_history] == [("Me",), (), ("pizza",)]
+
+    bot.user.name = "al"
+    bot.render_chat()
+    assert [m["highlights"] for m in bot.chat_history] == [(), ("al",), ("pizza",)]
+
+    bot.highlight_words = []
+    bot.render_chat()
+    assert [m["highlights"] for m in bot.chat_history] == [(), ("al",), ()]
+
+
+def test_filtered_repeats_collapse_into_last_line(monkeypatch):
+    import juiced.tui_bot as tui_mod
+
+    bot = tui_mod.TUIBot(
+        tui_config={"ignore_users": ["troll"], "repeat_window": 60},
+        config_file="cfg.json",
+        domain="example.com",
+        channel="test",
+        log_path=str(_TEST_LOG_DIR),
+    )
+    bot.term = FakeTerm()
+    out = capture_prints(monkeypatch)
+    now = [0]
+    monkeypatch.setattr(bot.chat_filter, "_time", lambda: now[0])
+
+    async def chat(username, text):
+        await bot.trigger("chatMsg", {"username": username, "msg": text})
+
+    for username in ("troll", "al", "al", "al"):
+        asyncio.run(chat(username, "<em>spam</em>"))
+    assert [m["message"] for m in bot.chat_history] == ["spam"]
+    assert bot.chat_history[0]["repeats"] == 3
+    bot.render_chat()
+    assert "spam (x3)" in "\n".join(out)
+    assert bot.chat_filter.hits == {"user:troll": 1, "repeat": 2}
+
+    # Repeats coalesced after the filter window keep counting up
+    now[0] = 1000
+    asyncio.run(chat("al", "<em>spam</em>"))
+    assert bot.chat_history[0]["repeats"] == 4
+    asyncio.run(chat("al", "<em>spam</em>"))
+    assert [m.get("repeats") for m in bot.chat_history] == [5]
+
+
+def test_repeat_of_another_message_gets_its_own_line(monkeypatch):
+    bot = make_bot()
+    bot.term = FakeTerm()
+    capture_prints(monkeypatch)
+
+    async def run():
+        await bot.handle_chat("chatMsg", {"username": "al", "msg": "one"})
+        await bot.handle_chat("chatMsg", {"username": "bo", "msg": "hi"})
+        repeat = {"username": "al", "msg": "<b>two</b>", "count": 2}
+        await bot.handle_chat_repeat("chatMsgRepeat", repeat)
+        await bot.handle_chat_repeat("chatMsgRepeat", dict(repeat, count=3))
+
+    asyncio.run(run())
+    assert [(m["message"], m.get("repeats")) for m in bot.chat_history] == [
+        ("one", None),
+        ("hi", None),
+        ("two", 2),
+    ]
+
+def test_consecutive_duplicates_share_a_line(monkeypatch):
+    bot = make_bot()
+    bot.term = FakeTerm()
+    out = capture_prints(monkeypatch)
+
+    for text in ("raid", "raid", "raid", "other", "raid"):
+        bot.add_chat_line("al", text)
+    bot.add_chat_line("bo", "raid")
+    bot.add_system_message("reconnecting")
+    bot.add_system_message("reconnecting")
+    assert [(m["message"], m.get("repeats")) for m in bot.chat_history] == [
+        ("raid", 3),
+        ("other", None),
+        ("raid", None),
+        ("raid", None),
+        ("reconnecting", 2),
+    ]
+    assert "raid (x3)" in "\n".join(out)
+
+
+def test_join_quit_bursts_share_a_summary(monkeypatch):
+    bot = make_bot()
+    bot.term = FakeTerm()
+    capture_prints(monkeypatch)
+    now = [0]
+    monkeypatch.setattr(bot, "_time", lambda: now[0])
+
+    async def burst():
+        for i in range(8):
+            await bot.handle_user_join("addUser", {"name": "u%d" % i})
+        await bot.handle_user_leave("userLeave", {"name": "u0"})
+        await bot.handle_user_leave("userLeave", {"name": "old"})
+        await bot.handle_user_join("addUser", {"name": "old"})
+        await bot.handle_user_leave("userLeave", {"name": "gone"})
+        now[0] = 3
+        await bot.handle_user_join("addUser", {"name": "late"})
+
+    asyncio.run(burst())
+    assert [m["message"] for m in bot.chat_history] == [
+        "u1, u2, u3, u4, u5 and 2 others have joined; gone has left; "
+        "u0 joined and left; old left and rejoined",
+        "late has joined",
+    ]
+    assert bot.chat_history[-1]["color"] == "bright_green"
+
+
 def test_on_changeMedia_updates_state_and_adds_system_message(monkeypatch):
     bot = make_bot()
     bot.chat_history.clear()
@@ -107,6 +268,17 @@ def test_pending_uid_resolved_on_queue_and_playlist(monkeypatch):
             self.queue = queue
             self._current = None
 
+        def __len__(self):
+            return len(self.queue)
+
+        @property
+        def current(self):
+            return self._current
+
+        @current.setter
+        def current(self, item):
+            self._current = item
+
         def add(self, after, item_dict):
             # mimic playlist.add API used by bot._on_queue
             new_item = Item(item_dict.get("uid"), item_dict.get("title", ""))
@@ -116,6 +288,13 @@ def test_pending_uid_resolved_on_queue_and_playlist(monkeypatch):
         def clear(self):
             self.queue.clear()
 
+        def reconcile(self, items):
+            # mimic playlist.reconcile API used by bot._on_playlist
+            self.clear()
+            for item_dict in items:
+                self.add(None, item_dict)
+            return []
+
         def get(self, uid):
             for it in self.queue:
                 if it.uid == uid:
@@ -124,7 +303,7 @@ def test_pending_uid_resolved_on_queue_and_playlist(monkeypatch):
 
     it = Item(42, "Queued Song")
     pl = Playlist([it])
-    bot.channel = SimpleNamespace(playlist=pl)
+    bot.channel = SimpleNamespace(playlist=pl, version=0)
 
     # simulate setCurrent occurred before queue, so pending_media_uid was set
     bot.pending_media_uid = 42
@@ -151,3 +330,25 @@ def test_pending_uid_resolved_on_queue_and_playlist(monkeypatch):
         or bot.current_media_title in ("Queued Song", "Playlist Song")
         or any("Now playing" in m["message"] for m in bot.chat_history)
     )
+
+
+def test_pending_uid_changes_bump_channel_version(monkeypatch):
+    bot = make_bot()
+    bot.term = FakeTerm()
+    capture_prints(monkeypatch)
+    playlist = bot.channel.playlist
+    media = {"type": "yt", "id": "abc", "title": "Song", "seconds": 60}
+    playlist.add(None, {"uid": 7, "temp": True, "queueby": "al", "media": media})
+
+    for handler in (bot.handle_queue, bot.handle_playlist):
+        playlist.current = None
+        bot.pending_media_uid = 7
+        version = bot.channel.version
+        asyncio.run(handler(None, {}))
+        assert playlist.current.uid == 7
+        assert bot.channel.version > version
+
+    version = bot.channel.version
+    bot._on_setCurrent(None, 99)
+    assert playlist.current is None
+    assert bot.channel.version > version
@@ -88,6 +88,12 @@ async def test_debug_command_no_playlist_and_with_playlist():
             self.queue = queue
             self._current = None
 
+        def __len__(self):
+            return len(self.queue)
+
+        def __iter__(self):
+            return iter(self.queue)
+
         def get(self, uid):
             for it in self.queue:
                 if it.uid == uid:
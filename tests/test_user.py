@@ -81,3 +81,78 @@ def test_user_meta_setter():
     assert u.afk is True
     assert u.muted is False  # default
     assert u.smuted is False  # default
+
+
+def test_user_uncloaked_ip_is_lazy(monkeypatch):
+    calls = []
+
+    def fake_uncloak(ip):
+        calls.append(ip)
+        return ["1.2.3.4"]
+
+    monkeypatch.setattr("juiced.lib.user.uncloak_ip", fake_uncloak)
+    u = User("dan", meta={"ip": "a.b.c.d"})
+    assert not u.uncloaked
+    assert str(u) == '<user "dan" [a.b.c.d] (rank -1.00)>'
+    assert calls == []
+
+    assert u.uncloaked_ip == ["1.2.3.4"]
+    assert u.uncloaked_ip == ["1.2.3.4"]
+    assert calls == ["a.b.c.d"]
+    assert "1.2.3.4" in str(u)
+
+    u.ip = None
+    assert u.uncloaked and u.uncloaked_ip is None
+
+
+def test_userlist_indexes_follow_changes():
+    ul = UserList()
+    for name, rank, afk in [
+        ("zed", 1, False),
+        ("Amy", 1, True),
+        ("mod", 2, True),
+        ("Owner", 4, False),
+        ("bob", 0, False),
+        ("admin", 3, False),
+    ]:
+        ul.add(User(name, rank=rank, meta={"afk": afk}))
+
+    def names(**kwargs):
+        return [user.name for user in ul.ordered(**kwargs)]
+
+    assert names() == ["Owner", "admin", "mod", "bob", "zed", "Amy"]
+    assert names(hide_afk=True) == ["Owner", "admin", "mod", "bob", "zed"]
+    assert names(limit=2) == ["Owner", "admin"]
+    assert ul.sorted_names() == ["admin", "Amy", "bob", "mod", "Owner", "zed"]
+    assert ul.ranks[1] == {"zed", "Amy"}
+    assert ul.afk == {"Amy", "mod"}
+
+    ul.set_afk("Amy", False)
+    ul.set_rank("zed", 2)
+    ul.set_meta("bob", {"afk": True, "muted": True})
+    assert ul.update_user({"name": "admin", "rank": 3}) is False
+    assert ul.update_user({"name": "admin", "rank": 5}) is True
+    assert names() == ["admin", "Owner", "mod", "zed", "Amy", "bob"]
+    assert ul.ranks == {
+        5: {"admin"},
+        4: {"Owner"},
+        2: {"mod", "zed"},
+        1: {"Amy"},
+        0: {"bob"},
+    }
+    assert ul.afk == {"mod", "bob"} and ul.muted == {"bob"}
+
+    del ul["mod"]
+    assert ul.pop("bob").name == "bob"
+    assert ul.pop("nobody", None) is None
+    assert names() == ["admin", "Owner", "zed", "Amy"]
+    assert ul.sorted_names() == ["admin", "Amy", "Owner", "zed"]
+    assert 0 not in ul.ranks and not ul.afk and not ul.muted
+
+    # Changed directly, then re-indexed
+    ul["Amy"].afk = True
+    ul.refresh("Amy")
+    assert names(hide_afk=True) == ["admin", "Owner", "zed"]
+
+    ul.clear()
+    assert ul.ordered() == [] and ul.sorted_names() == [] and not ul.ranks
@@ -0,0 +1,133 @@
+import threading
+
+from juiced.lib.write_behind import WriteBehindDatabase
+
+
+class FakeDB:
+    def __init__(self):
+        self.calls = []
+        self.threads = set()
+        self.closed = False
+
+    def _record(self, *call):
+        self.threads.add(threading.current_thread().name)
+        self.calls.append(call)
+
+    def user_joined(self, username):
+        self._record("joined", username)
+
+    def user_left(self, username):
+        self._record("left", username)
+
+    def user_chat_message(self, username, message):
+        self._record("chat", username, message)
+
+    def update_high_water_mark(self, chat_users, connected_users):
+        self._record("hwm", chat_users, connected_users)
+
+    def get_high_water_mark(self):
+        return 7
+
+    def close(self):
+        self.closed = True
+
+
+class BatchDB(FakeDB):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def write_batch(self, calls):
+        self.batches.append(list(calls))
+        self.committed = False
+
+    def flush(self):
+        self.committed = True
+
+
+def test_calls_are_buffered_until_flush():
+    db = FakeDB()
+    wb = WriteBehindDatabase(db, flush_interval=60)
+    wb.user_joined("alice")
+    wb.user_chat_message("alice", "hi")
+    wb.user_left("alice")
+    assert db.calls == []
+    assert wb.pending == 3
+
+    wb.flush()
+    assert db.calls == [("joined", "alice"), ("chat", "alice", "hi"), ("left", "alice")]
+    assert wb.pending == 0
+    assert wb.flushed == 3
+    wb.close()
+
+
+def test_high_water_mark_updates_are_merged():
+    db = FakeDB()
+    wb = WriteBehindDatabase(db, flush_interval=60)
+    wb.update_high_water_mark(3, 10)
+    wb.update_high_water_mark(5, 8)
+    wb.update_high_water_mark(4, 12)
+    assert wb.pending == 1
+    wb.flush()
+    assert db.calls == [("hwm", 5, 12)]
+    wb.close()
+
+
+def test_bounded_buffer_drops_oldest():
+    db = FakeDB()
+    wb = WriteBehindDatabase(db, max_pending=2, flush_interval=60, batch_size=100)
+    for name in ("a", "b", "c"):
+        wb.user_joined(name)
+    assert wb.dropped == 1
+    wb.flush()
+    assert db.calls == [("joined", "b"), ("joined", "c")]
+    wb.close()
+
+
+def test_background_thread_flushes_and_close_drains():
+    db = FakeDB()
+    wb = WriteBehindDatabase(db, flush_interval=0.01)
+    wb.user_joined("alice")
+    wb.close()
+    assert db.calls == [("joined", "alice")]
+    assert "juiced-write-behind" in db.threads
+    assert db.closed is True
+
+    # Calls after close are not buffered and lost
+    wb.user_left("alice")
+    wb.update_high_water_mark(1, 2)
+    assert db.calls[1:] == [("left", "alice"), ("hwm", 1, 2)]
+    assert wb.pending == 0
+
+
+def test_write_batch_is_used_when_available():
+    db = BatchDB()
+    wb = WriteBehindDatabase(db, flush_interval=60)
+    wb.user_joined("alice")
+    wb.update_high_water_mark(1, 2)
+    wb.flush()
+    assert db.batches == [
+        [("user_joined", ("alice",)), ("update_high_water_mark", (1, 2))]
+    ]
+    # flush waits for the database to commit the batch
+    assert db.committed is True
+    wb.close()
+
+
+def test_other_attributes_are_delegated():
+    wb = WriteBehindDatabase(FakeDB())
+    assert wb.get_high_water_mark() == 7
+
+
+def test_thread_safe_databases_are_not_locked():
+    class ThreadSafeDB(FakeDB):
+        THREAD_SAFE = True
+
+    wb = WriteBehindDatabase(ThreadSafeDB(), flush_interval=60)
+    with wb._db_lock:
+        # A flush holds the lock, reads do not wait for it
+        reader = threading.Thread(target=wb.get_high_water_mark)
+        reader.start()
+        reader.join(5)
+        assert not reader.is_alive()
+    wb.close()